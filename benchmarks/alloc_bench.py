@@ -0,0 +1,85 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import delta_types
+from delta_program import DeltaProgram
+
+
+VALUE_CLASSES = ["DeltaNumber", "DeltaBool", "DeltaString", "DeltaArray", "DeltaNone"]
+
+OPERATORS = ["+", "-", "*", "==", "!=", "<", ">", "<=", ">="]
+
+
+def generate(count: int) -> str:
+	# straight-line code, so every BinOpNode in the source is executed exactly once
+	rng = random.Random(count)
+	lines = ["let a = 3;\n", "let b = 7;\n"]
+
+	for n in range(count):
+		left = rng.choice(["a", "b", str(rng.randint(0, 50)), str(rng.randint(1000, 5000))])
+		right = rng.choice(["a", "b", str(rng.randint(0, 50))])
+		op = rng.choice(OPERATORS)
+		lines.append(f"let r_{n % 64} = {left} {op} {right};\n")
+
+	return "{" + "".join(lines) + "}"
+
+
+def counted(counts: dict) -> list:
+	# wraps every value class's __init__ so each new instance is counted
+	originals = []
+
+	for name in VALUE_CLASSES:
+		cls = getattr(delta_types, name)
+		init = cls.__init__
+		originals.append((cls, cls.__dict__.get("__init__")))
+
+		def wrapper(self, *args, init=init, name=name):
+			counts[name] = counts.get(name, 0) + 1
+			init(self, *args)
+
+		cls.__init__ = wrapper
+
+	return originals
+
+
+def restore(originals: list) -> None:
+	for cls, init in originals:
+		if init is None:
+			del cls.__init__
+		else:
+			cls.__init__ = init
+
+
+def measure(program: DeltaProgram, engine: str) -> dict:
+	counts = {}
+	originals = counted(counts)
+
+	try:
+		program.run(engine=engine)
+	finally:
+		restore(originals)
+
+	return counts
+
+
+def main() -> None:
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+	program = DeltaProgram(generate(count))
+	binops = count
+
+	print(f"{binops:,} BinOpNodes executed")
+
+	for engine in (DeltaProgram.ENGINE_VM, DeltaProgram.ENGINE_TREE):
+		counts = measure(program, engine)
+		total = sum(counts.values())
+
+		detail = ", ".join(f"{name} {counts.get(name, 0):,}" for name in VALUE_CLASSES)
+		print(f"{engine:<6}{total:>12,} allocations{total / binops:>8.2f} per BinOpNode  ({detail})")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,74 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from delta_lexer import DeltaLexer
+from delta_parser import DeltaParser, Node
+
+
+def walk(node, seen: set, totals: dict) -> None:
+	"""
+	Adds the bytes held by `node` and everything under it to `totals`, per node type.
+
+	A node is charged for itself, the tuples it owns and the literals in its
+	slots. Objects reachable from more than one place are only counted once.
+	"""
+	if id(node) in seen:
+		return
+
+	seen.add(id(node))
+
+	size = sys.getsizeof(node)
+	children = []
+
+	for name in type(node).__slots__:
+		value = getattr(node, name)
+
+		if isinstance(value, Node):
+			children.append(value)
+
+		elif isinstance(value, tuple):
+			size += sys.getsizeof(value)
+			children.extend(value)
+
+		elif value is not None and id(value) not in seen:
+			seen.add(id(value))
+			size += sys.getsizeof(value)
+
+	count, total = totals.get(type(node).__name__, (0, 0))
+	totals[type(node).__name__] = (count + 1, total + size)
+
+	for child in children:
+		walk(child, seen, totals)
+
+
+def report(path: str) -> None:
+	with open(path) as file:
+		tree = DeltaParser(DeltaLexer(file.read()).parse()).parse()
+
+	totals = {}
+	walk(tree, set(), totals)
+
+	print(path)
+	print(f"{'node':<20}{'count':>10}{'bytes':>14}{'bytes/node':>12}")
+
+	for name, (count, size) in sorted(totals.items(), key=lambda item: -item[1][1]):
+		print(f"{name:<20}{count:>10,}{size:>14,}{size / count:>12.1f}")
+
+	count = sum(count for count, _ in totals.values())
+	size = sum(size for _, size in totals.values())
+	print(f"{'total':<20}{count:>10,}{size:>14,}{size / max(count, 1):>12.1f}")
+
+
+def main() -> None:
+	if len(sys.argv) < 2:
+		print(f"usage: {sys.argv[0]} script.delta [script.delta ...]")
+		sys.exit(1)
+
+	for path in sys.argv[1:]:
+		report(path)
+
+
+if __name__ == "__main__":
+	main()
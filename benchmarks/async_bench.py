@@ -0,0 +1,100 @@
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from delta_program import DeltaProgram
+from delta_async import DeltaAsyncExecutor
+from delta_stack_executor import DeltaStackExecutor
+from delta_output import CaptureOutput
+
+
+def countdown(depth: int) -> str:
+	return f"let n = {depth}; func down( ) {{ let n = n - 1; if n > 0 then {{ down( ); }}; return n * 2 + 1; }}; let result = down( );"
+
+
+def jain(values: list) -> float:
+	# 1 when every value is the same, 1/n when one of n has everything
+	return sum(values) ** 2 / (len(values) * sum(value * value for value in values))
+
+
+async def ticker(lags: list, stop: asyncio.Event) -> None:
+	# how late the loop gets back to a task that asked to wake in 1ms
+	while not stop.is_set():
+		start = time.perf_counter()
+		await asyncio.sleep(0.001)
+		lags.append(time.perf_counter() - start - 0.001)
+
+
+async def run_all(programs: list, depths: list, slice: int) -> dict:
+	executors = [DeltaAsyncExecutor(program.tree, program.resolution, output=CaptureOutput(), slice=slice) for program in programs]
+	finished = [None] * len(executors)
+	progress = None
+	longest = max(depths)
+
+	lags = []
+	stop = asyncio.Event()
+
+	async def run(index: int, executor: DeltaAsyncExecutor) -> None:
+		nonlocal progress
+		await executor.execute_async()
+		finished[index] = time.perf_counter() - start
+
+		if progress is None and depths[index] == longest:
+			# how far the programs as long as this one had got, they should be about as far
+			progress = [other.steps for other, depth in zip(executors, depths) if depth == longest]
+
+	start = time.perf_counter()
+	tick = asyncio.create_task(ticker(lags, stop))
+
+	await asyncio.gather(*(run(index, executor) for index, executor in enumerate(executors)))
+	wall = time.perf_counter() - start
+
+	stop.set()
+	await tick
+
+	return {
+		"wall": wall,
+		"steps": sum(executor.steps for executor in executors),
+		"finished": finished,
+		"fairness": jain(progress),
+		"lag_p50": statistics.median(lags) if lags else 0.0,
+		"lag_max": max(lags) if lags else 0.0,
+	}
+
+
+def main() -> None:
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+	rng = random.Random(count)
+
+	# mostly short scripts and a few long ones, the short ones shouldn't wait on the long
+	depths = [rng.choice([50, 200, 1000, 1000, 5000, 10000]) for _ in range(count)]
+	programs = [DeltaProgram(countdown(depth)) for depth in depths]
+
+	start = time.perf_counter()
+
+	for program in programs:
+		DeltaStackExecutor(program.tree, program.resolution, output=CaptureOutput()).execute()
+
+	sequential = time.perf_counter() - start
+
+	print(f"{count} scripts, {sum(depths):,} calls, run one after the other: {sequential:.3f}s")
+	print("slice      wall      steps/s   overhead   short p50   long p50   fairness   loop lag p50 / max")
+
+	for slice in (100, 1000, 10000):
+		result = asyncio.run(run_all(programs, depths, slice))
+
+		short = [time for time, depth in zip(result["finished"], depths) if depth <= 200]
+		long = [time for time, depth in zip(result["finished"], depths) if depth == max(depths)]
+
+		print(f"{slice:<8}{result['wall']:>7.3f}s{result['steps'] / result['wall']:>13,.0f}{result['wall'] / sequential - 1:>10.1%}"
+			f"{statistics.median(short) * 1000:>10.1f}ms{statistics.median(long) * 1000:>9.1f}ms{result['fairness']:>11.3f}"
+			f"{result['lag_p50'] * 1000:>12.2f} / {result['lag_max'] * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from delta_program import DeltaProgram
+from delta_modules import MODULE_CACHE
+from delta_output import CaptureOutput
+
+
+def library(functions: int, eager: bool) -> str:
+	# a shared helper library, any top-level statement but `func` and `import` makes it run when imported
+	parts = ["let version = 1;\n"] if eager else []
+
+	for n in range(functions):
+		parts.append(f"func helper_{n}( ) {{ let x = {n} * 2 + 1; if x > {n} then {{ let x = x - 1; }}; return x * 3 - {n}; }};\n")
+
+	return "".join(parts)
+
+
+def script(n: int, functions: int) -> str:
+	# each script uses a handful of the helpers
+	calls = " + ".join(f"helper_{(n * 7 + k * 13) % functions}( )" for k in range(5))
+	return f"let total = {calls};\nprint total;\n"
+
+
+def measure(sources: list) -> float:
+	start = time.perf_counter()
+
+	for source in sources:
+		DeltaProgram(source).run(output=CaptureOutput())
+
+	return (time.perf_counter() - start) / len(sources)
+
+
+def main() -> None:
+	functions = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+	count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+	print(f"{count} scripts, each using 5 functions of a {functions} function library, time per script:")
+
+	with tempfile.TemporaryDirectory() as directory:
+		MODULE_CACHE.path = [directory]
+
+		for eager in (False, True):
+			name = "eager_helpers" if eager else "helpers"
+			source = library(functions, eager)
+
+			with open(os.path.join(directory, name + ".delta"), "w") as file:
+				file.write(source)
+
+			pasted = measure([source + script(n, functions) for n in range(count)])
+
+			start = time.perf_counter()
+			MODULE_CACHE.load(name)
+			first = time.perf_counter() - start
+
+			imported = measure([f"import {name};\n" + script(n, functions) for n in range(count)])
+
+			print(f"\t{'eager' if eager else 'lazy':<8}pasted in {pasted * 1000:>9.2f} ms   imported {imported * 1000:>7.2f} ms"
+				f"   {pasted / imported:>6.1f}x   (first import compiles it in {first * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,86 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from delta_lexer import DeltaLexer, DeltaCharLexer
+
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), "..", "delta_scripts")
+
+STATEMENTS = [
+	"let value_{n} = ({n} + 2.5) * 3 - 4 / 2 ^ 2;\n",
+	"print \"line {n}\\tof \\\"output\\\"\\n\";\n",
+	"func helper_{n}( ) {{ return value_{n} >= {n}; }};\n",
+	"if value_{n} != {n} then {{ print [1, 2, 3] : [{n}]; }};\n",
+	"# a comment that runs to the end of the line {n}\n",
+	"#> a multiline comment\nspanning a few lines {n} <#\n",
+	"print 1 + # inline comment # 2 <= 3;\n",
+]
+
+
+def generate(size: int) -> str:
+	rng = random.Random(size)
+	parts = []
+	length = 0
+	n = 0
+
+	while length < size:
+		part = rng.choice(STATEMENTS).format(n=n)
+		parts.append(part)
+		length += len(part)
+		n += 1
+
+	return "".join(parts)
+
+
+def token_key(tokens: list) -> list:
+	return [(token.tok_type, token.value) if token is not None else None for token in tokens]
+
+
+def check_scripts() -> None:
+	for name in sorted(os.listdir(SCRIPTS_DIR)):
+		source = open(os.path.join(SCRIPTS_DIR, name)).read()
+
+		if token_key(DeltaLexer(source).parse()) != token_key(DeltaCharLexer(source).parse()):
+			raise AssertionError(f"token mismatch in {name}")
+
+
+def measure(lexer_class, source: str, repeat: int) -> tuple:
+	best = None
+
+	for _ in range(repeat):
+		start = time.perf_counter()
+		tokens = lexer_class(source).parse()
+		elapsed = time.perf_counter() - start
+
+		best = elapsed if best is None else min(best, elapsed)
+
+	return tokens, best
+
+
+def main() -> None:
+	size = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+	repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+	check_scripts()
+
+	source = generate(size)
+	print(f"source: {len(source):,} characters")
+
+	results = {}
+
+	for lexer_class in (DeltaCharLexer, DeltaLexer):
+		tokens, best = measure(lexer_class, source, repeat)
+		results[lexer_class] = tokens
+
+		print(f"{lexer_class.__name__:<16}{len(tokens):>12,} tokens{best:>10.3f}s{len(tokens) / best:>14,.0f} tokens/s")
+
+	if token_key(results[DeltaLexer]) != token_key(results[DeltaCharLexer]):
+		raise AssertionError("token mismatch in generated source")
+
+
+if __name__ == "__main__":
+	main()
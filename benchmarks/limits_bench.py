@@ -0,0 +1,59 @@
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from suite import WORKLOADS
+from delta_program import DeltaProgram
+from delta_limits import DeltaLimits
+from delta_output import CaptureOutput
+
+
+def best(functions: tuple, repeat: int) -> list:
+	# the functions take turns, so a machine getting slower or faster affects them alike
+	results = [None] * len(functions)
+
+	for _ in range(repeat):
+		for n, function in enumerate(functions):
+			gc.collect()
+			gc.disable()
+
+			start = time.perf_counter()
+			function()
+			elapsed = time.perf_counter() - start
+
+			gc.enable()
+			results[n] = elapsed if results[n] is None else min(results[n], elapsed)
+
+	return results
+
+
+def main() -> None:
+	scale = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+	repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+
+	print(f"tree engine, unlimited against DeltaLimits.untrusted(), best of {repeat}:")
+
+	total_plain = total_limited = 0.0
+
+	for name, workload in WORKLOADS.items():
+		program = DeltaProgram(workload(scale))
+
+		plain, limited = best((
+			lambda: program.run(engine=DeltaProgram.ENGINE_TREE, output=CaptureOutput()),
+			lambda: program.run(engine=DeltaProgram.ENGINE_TREE, output=CaptureOutput(), limits=DeltaLimits.untrusted()),
+		), repeat)
+
+		total_plain += plain
+		total_limited += limited
+
+		print(f"\t{name:<12}{plain * 1000:>10.2f} ms{limited * 1000:>10.2f} ms{limited / plain - 1:>+9.1%}")
+
+	print(f"\t{'total':<12}{total_plain * 1000:>10.2f} ms{total_limited * 1000:>10.2f} ms{total_limited / total_plain - 1:>+9.1%}")
+
+
+if __name__ == "__main__":
+	main()
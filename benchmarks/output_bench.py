@@ -0,0 +1,89 @@
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from delta_program import DeltaProgram
+from delta_output import DeltaOutput, TextOutput, BinaryOutput, CaptureOutput
+
+
+class CountedFile(io.FileIO):
+	# a file whose writes are counted, each one is a syscall
+	def __init__(self, path: str) -> None:
+		super().__init__(path, "w")
+		self.calls = 0
+
+
+	def write(self, data) -> int:
+		self.calls += 1
+		return super().write(data)
+
+
+
+class PrintOutput(DeltaOutput):
+	# what the engines did before, builtin print once per line
+	def __init__(self, stream) -> None:
+		super().__init__()
+		self.stream = stream
+
+
+	def print(self, value) -> None:
+		print(value, file=self.stream)
+
+
+
+def generate(count: int) -> str:
+	parts = ["let a = 12;\n", "let s = \"line\";\n"]
+
+	for n in range(count):
+		parts.append(f"print a * {n % 100};\n" if n % 2 else "print s;\n")
+
+	return "".join(parts)
+
+
+def terminal(raw: CountedFile):
+	# stdout attached to a terminal is line buffered
+	return io.TextIOWrapper(io.BufferedWriter(raw), line_buffering=True)
+
+
+def measure(program: DeltaProgram, engine: str, make_output) -> tuple:
+	raw = CountedFile(os.devnull)
+	output = make_output(raw)
+
+	start = time.perf_counter()
+	program.run(engine=engine, output=output)
+	elapsed = time.perf_counter() - start
+
+	raw.close()
+	return elapsed, raw.calls
+
+
+def main() -> None:
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+	program = DeltaProgram(generate(count))
+
+	capture = CaptureOutput()
+	program.run(output=capture)
+	assert len(capture.getlines()) == count
+
+	outputs = {
+		"print, line buffered":		lambda raw: PrintOutput(terminal(raw)),
+		"TextOutput, line buffered":	lambda raw: TextOutput(terminal(raw)),
+		"TextOutput, flush per line":	lambda raw: TextOutput(terminal(raw), flush=DeltaOutput.FLUSH_LINE),
+		"BinaryOutput, raw file":		lambda raw: BinaryOutput(raw),
+		"CaptureOutput":				lambda raw: CaptureOutput(),
+	}
+
+	print(f"{count:,} lines printed")
+
+	for engine in (DeltaProgram.ENGINE_VM, DeltaProgram.ENGINE_TREE):
+		for name, make_output in outputs.items():
+			elapsed, calls = measure(program, engine, make_output)
+			print(f"\t{engine:<6}{name:<30}{elapsed:>8.3f}s{calls:>10,} writes")
+
+
+if __name__ == "__main__":
+	main()
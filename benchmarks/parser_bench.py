@@ -0,0 +1,99 @@
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from delta_lexer import DeltaLexer
+from delta_parser import DeltaParser, DeltaPrattParser, Node
+
+
+OPERATORS = ["+", "-", "*", "/", "^", "==", "!=", "<", ">", "<=", ">="]
+OPERANDS = ["1", "2.5", "x", "y", "total", "f( )", "true"]
+
+
+def expression(rng: random.Random, depth: int) -> str:
+	roll = rng.random()
+
+	if depth == 0 or roll < 0.25:
+		return rng.choice(OPERANDS)
+	elif roll < 0.35:
+		return "- " + expression(rng, depth - 1)
+	elif roll < 0.5:
+		return "( " + expression(rng, depth - 1) + " )"
+
+	return f"{expression(rng, depth - 1)} {rng.choice(OPERATORS)} {expression(rng, depth - 1)}"
+
+
+def generate(size: int) -> str:
+	rng = random.Random(size)
+	parts = []
+	length = 0
+
+	while length < size:
+		part = f"let v = {expression(rng, 6)};\n"
+		parts.append(part)
+		length += len(part)
+
+	return "".join(parts)
+
+
+def shape(node):
+	# a comparable form of a tree, node classes have no __eq__
+	if isinstance(node, Node):
+		return (type(node).__name__,) + tuple(shape(getattr(node, name)) for name in type(node).__slots__)
+	elif isinstance(node, tuple):
+		return tuple(shape(child) for child in node)
+
+	return node
+
+
+def measure(parser_class, tokens, repeat: int) -> tuple:
+	best = None
+
+	for _ in range(repeat):
+		# like timeit, without the collector walking the trees built so far
+		tree = None
+		gc.collect()
+		gc.disable()
+
+		start = time.perf_counter()
+		tree = parser_class(tokens).parse()
+		elapsed = time.perf_counter() - start
+
+		gc.enable()
+
+		best = elapsed if best is None else min(best, elapsed)
+
+	return tree, best
+
+
+def main() -> None:
+	size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+	repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+	# spaced out, the lexer reads a run of operator characters like "-(" as a single operator
+	source = generate(size)
+	tokens = DeltaLexer(source).parse()
+	count = len(tokens)
+
+	print(f"source: {len(source):,} characters, {count:,} tokens")
+
+	descent_tree, descent_time = measure(DeltaParser, tokens, repeat)
+
+	if descent_tree is None or len(descent_tree.statements) < source.count(";"):
+		raise AssertionError("the source didn't parse")
+
+	pratt_tree, pratt_time = measure(DeltaPrattParser, tokens, repeat)
+
+	if shape(descent_tree) != shape(pratt_tree):
+		raise AssertionError("the parsers disagree")
+
+	print(f"{'DeltaParser':<20}{descent_time:>10.3f}s{count / descent_time:>14,.0f} tokens/s")
+	print(f"{'DeltaPrattParser':<20}{pratt_time:>10.3f}s{count / pratt_time:>14,.0f} tokens/s  ({descent_time / pratt_time:.2f}x)")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,88 @@
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+sys.path.insert(0, SRC)
+
+from delta_server import DeltaClient
+
+
+SCRIPT = "let a = 3; func twice( ) { return a * 2; }; print twice( ) + 1; print \"done\";"
+
+
+def percentiles(times: list) -> str:
+	times = sorted(times)
+	p50 = statistics.median(times)
+	p99 = times[min(len(times) - 1, int(len(times) * 0.99))]
+
+	return f"p50 {p50 * 1000:>8.3f} ms   p99 {p99 * 1000:>8.3f} ms"
+
+
+def wait_for(path: str) -> None:
+	for _ in range(500):
+		if os.path.exists(path):
+			return
+
+		time.sleep(0.01)
+
+	raise RuntimeError("the server didn't start")
+
+
+def main() -> None:
+	requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+	spawns = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, "delta.sock")
+		script = os.path.join(directory, "script.delta")
+
+		with open(script, "w") as file:
+			file.write(SCRIPT)
+
+		times = []
+
+		for _ in range(spawns):
+			start = time.perf_counter()
+			subprocess.run([sys.executable, os.path.join(SRC, "main.py"), script], check=True, capture_output=True)
+			times.append(time.perf_counter() - start)
+
+		print(f"{'process per script':<28}{percentiles(times)}")
+
+		server = subprocess.Popen([sys.executable, os.path.join(SRC, "delta_server.py"), "serve", path])
+
+		try:
+			wait_for(path)
+
+			with DeltaClient(path) as client:
+				first = client.run(SCRIPT)
+				assert first["ok"] and first["output"] == "7\ndone\n", first
+
+				times = []
+
+				for _ in range(requests):
+					start = time.perf_counter()
+					result = client.run(SCRIPT)
+					times.append(time.perf_counter() - start)
+
+				assert result["cached"]
+				print(f"{'server, cached program':<28}{percentiles(times)}")
+
+				times = []
+
+				for n in range(requests):
+					start = time.perf_counter()
+					client.run(SCRIPT + f" let n = {n};")
+					times.append(time.perf_counter() - start)
+
+				print(f"{'server, new program':<28}{percentiles(times)}")
+		finally:
+			server.terminate()
+			server.wait()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,121 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from delta_lexer import Token
+from delta_parser import BinOpNode, NumberNode, ReturnNode, ScopeNode
+from delta_program import DeltaProgram
+from delta_errors import DeltaSyntaxError
+from delta_resolver import Resolution
+from delta_runtime import make_namespaces
+from delta_executor import DeltaExecutor
+from delta_stack_executor import DeltaStackExecutor
+
+
+def generate(count: int) -> str:
+	# straight-line work mixed with calls, ifs and nested scopes, nothing printed
+	parts = ["let total = 0;\n"]
+
+	for n in range(count):
+		parts.append(f"func work_{n}( ) {{ let a = {n} * 2 + 1; if a > {n} then {{ let b = a - {n}; }}; return {{ return a * a - 3; }}; }};\n")
+		parts.append(f"let total = total + work_{n}( ) / 2;\n")
+		parts.append(f"{{ let c = total >= {n}; let d = (1 + 2) * (3 - 4) ^ 2; }};\n")
+
+	return "".join(parts)
+
+
+def countdown(depth: int) -> str:
+	# a Delta function recursing `depth` calls deep
+	return f"let n = {depth}; func down( ) {{ let n = n - 1; if n > 0 then {{ down( ); }}; return n; }}; let result = down( );"
+
+
+def nested_source(depth: int) -> dict:
+	# real scripts, run through the whole front end
+	return {
+		"scopes": "let x = " + "{ return " * depth + "1" + "; }" * depth + ";",
+		"brackets": "let x = " + "( " * depth + "1" + " + 1 )" * depth + ";",
+		"operators": "let x = 1" + " + 1" * depth + ";",
+	}
+
+
+def deep_expression(depth: int) -> ScopeNode:
+	# built directly, the parser and resolver would recurse as deep themselves
+	node = NumberNode(1)
+
+	for _ in range(depth):
+		node = BinOpNode(node, Token.OP_PLUS, NumberNode(1))
+
+	return ScopeNode((ReturnNode(node),))
+
+
+def deep_scopes(depth: int) -> ScopeNode:
+	node = ScopeNode((ReturnNode(NumberNode(depth)),))
+
+	for _ in range(depth):
+		node = ScopeNode((ReturnNode(node),))
+
+	return node
+
+
+def best(function, repeat: int) -> float:
+	result = None
+
+	for _ in range(repeat):
+		start = time.perf_counter()
+		function()
+		elapsed = time.perf_counter() - start
+
+		result = elapsed if result is None else min(result, elapsed)
+
+	return result
+
+
+def attempt(function) -> str:
+	start = time.perf_counter()
+
+	try:
+		value = function()
+	except RecursionError:
+		return "RecursionError"
+	except DeltaSyntaxError as error:
+		return f"DeltaSyntaxError: {error}"
+
+	return f"{value} in {time.perf_counter() - start:.3f}s"
+
+
+def main() -> None:
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+	depth = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+	repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+	program = DeltaProgram(generate(count), optimize=False)
+	results = {engine: program.run(engine=engine)["total"].value for engine in (DeltaProgram.ENGINE_TREE, DeltaProgram.ENGINE_STACK)}
+	assert len(set(results.values())) == 1, results
+
+	print(f"throughput, {count:,} functions and calls, best of {repeat}:")
+
+	for engine in (DeltaProgram.ENGINE_TREE, DeltaProgram.ENGINE_STACK):
+		print(f"\t{engine:<8}{best(lambda: program.run(engine=engine), repeat):>10.4f}s")
+
+	print(f"depth {depth:,}:")
+
+	calls = DeltaProgram(countdown(depth))
+	expression = deep_expression(depth)
+	scopes = deep_scopes(depth)
+
+	for engine, executor_class in ((DeltaProgram.ENGINE_TREE, DeltaExecutor), (DeltaProgram.ENGINE_STACK, DeltaStackExecutor)):
+		print(f"\t{engine:<8}recursive calls:  {attempt(lambda: calls.run(engine=engine)['n'])}")
+		print(f"\t{engine:<8}nested BinOpNodes: {attempt(lambda: executor_class(expression, Resolution()).execute_in(make_namespaces()))}")
+		print(f"\t{engine:<8}nested scopes:    {attempt(lambda: executor_class(scopes, Resolution()).execute_in(make_namespaces()))}")
+
+	print("parsed from source, on the stack engine:")
+
+	for nesting in (100, 150, 200, 300, 1000, 3000):
+		for name, source in nested_source(nesting).items():
+			print(f"\t{nesting:<8,}{name + ':':<11}{attempt(lambda: DeltaProgram(source).run(engine=DeltaProgram.ENGINE_STACK)['x'])}")
+
+
+if __name__ == "__main__":
+	main()
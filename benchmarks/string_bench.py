@@ -0,0 +1,60 @@
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from delta_program import DeltaProgram
+from delta_output import CaptureOutput
+
+
+def generate(steps: int) -> str:
+	# a string built one piece at a time, then looked at once at the end
+	parts = ["let s = \"\";\n"]
+
+	for n in range(steps):
+		parts.append(f"let s = s + \"piece {n % 10} \";\n")
+
+	parts.append("let same = s == s + \"\";\n")
+	parts.append("print s == \"\";\n")
+
+	return "".join(parts)
+
+
+def measure(program: DeltaProgram, engine: str, repeat: int) -> float:
+	best = None
+
+	for _ in range(repeat):
+		gc.collect()
+		gc.disable()
+
+		start = time.perf_counter()
+		program.run(engine=engine, output=CaptureOutput())
+		elapsed = time.perf_counter() - start
+
+		gc.enable()
+		best = elapsed if best is None else min(best, elapsed)
+
+	return best
+
+
+def main() -> None:
+	largest = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+	repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+	sizes = [largest // 8, largest // 4, largest // 2, largest]
+
+	print(f"`let s = s + ...` repeated, running time only, best of {repeat}; linear when ns per step stays flat:")
+	print("engine        steps        total     ns/step")
+
+	for engine in (DeltaProgram.ENGINE_VM, DeltaProgram.ENGINE_TREE):
+		for steps in sizes:
+			program = DeltaProgram(generate(steps))
+			elapsed = measure(program, engine, repeat)
+
+			print(f"{engine:<8}{steps:>11,}{elapsed * 1000:>11.1f}ms{elapsed / steps * 1e9:>12,.0f}")
+
+
+if __name__ == "__main__":
+	main()
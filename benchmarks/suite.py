@@ -0,0 +1,293 @@
+"""
+Times the lexer, the parser and the engines on generated workloads.
+
+	python benchmarks/suite.py --output before.json
+	python benchmarks/suite.py --compare before.json
+
+Every workload is generated from a fixed seed, so runs at the same scale
+time the same source. Each measurement is repeated and kept as min,
+median, mean and standard deviation, compared by median. Comparing
+exits with 1 if anything got slower by more than the threshold.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from delta_lexer import DeltaLexer
+from delta_parser import DeltaPrattParser
+from delta_program import DeltaProgram
+from delta_output import CaptureOutput
+from delta_types import numpy
+
+
+FORMAT_VERSION = 1
+
+ENGINES = (DeltaProgram.ENGINE_VM, DeltaProgram.ENGINE_TREE)
+
+
+def arithmetic(scale: float) -> str:
+	# deeply nested expressions, over variables so the optimizer can't fold them away
+	rng = random.Random(1)
+	parts = ["let a = 3;\n", "let b = 7;\n"]
+
+	def expression(depth: int) -> str:
+		if depth == 0:
+			return rng.choice(["a", "b", str(rng.randint(0, 9))])
+
+		left, right = expression(depth - 1), rng.choice(["a", "b", str(rng.randint(1, 9))])
+		return f"( {left} {rng.choice(['+', '-', '*'])} {right} )" if rng.random() < 0.5 else f"( {right} {rng.choice(['+', '-', '*'])} {left} )"
+
+	for n in range(int(4000 * scale)):
+		parts.append(f"let r = {expression(12)} > {n};\n")
+
+	return "".join(parts)
+
+
+def bindings(scale: float) -> str:
+	# many lets, in scopes nested 16 deep
+	parts = []
+
+	for n in range(int(1000 * scale)):
+		parts.append("let v_0 = 1;\n")
+
+		for depth in range(1, 16):
+			parts.append(f"{{ let v_{depth} = v_{depth - 1} + {n}; let w_{depth} = v_{depth} * 2; ")
+
+		parts.append("}; " * 15 + "\n")
+
+	return "".join(parts)
+
+
+def calls(scale: float) -> str:
+	# chains of functions calling each other, each called many times
+	parts = ["let total = 0;\n", "func f_0( ) { return 1; };\n"]
+
+	for n in range(1, 20):
+		parts.append(f"func f_{n}( ) {{ let x = f_{n - 1}( ); return x + {n}; }};\n")
+
+	for n in range(int(2000 * scale)):
+		parts.append(f"let total = total + f_{n % 20}( );\n")
+
+	return "".join(parts)
+
+
+def strings(scale: float) -> str:
+	# long literals with escapes, and a string grown by concatenation
+	rng = random.Random(4)
+	words = ["delta", "string", "\\n", "\\\"quoted\\\"", "\\t", "benchmark"]
+	parts = ["let s = \"\";\n"]
+
+	for n in range(int(2000 * scale)):
+		literal = " ".join(rng.choice(words) for _ in range(40))
+		parts.append(f"let t = \"{literal}\";\n")
+		parts.append(f"let s = s + \"{n} \";\n")
+
+	parts.append("let same = s == t;\n")
+	return "".join(parts)
+
+
+def arrays(scale: float) -> str:
+	# big array literals, and elementwise arithmetic over them
+	parts = []
+	size = 1000
+
+	for n in range(int(40 * scale)):
+		first = ", ".join(str((n + i) % 97) for i in range(size))
+		second = ", ".join(str((n * i) % 89 + 1) for i in range(size))
+
+		parts.append(f"let a = [{first}];\n")
+		parts.append(f"let b = [{second}];\n")
+		parts.append("let c = a * b + a - b * 2;\n")
+		parts.append("let d = c >= a;\n")
+
+	return "".join(parts)
+
+
+def comments(scale: float) -> str:
+	# mostly comments, line and block, with a little code in between
+	parts = []
+
+	for n in range(int(3000 * scale)):
+		parts.append(f"# line comment number {n}, with some words in it to skip over\n")
+		parts.append(f"let c_{n % 8} = {n} + # an inline comment # 1;\n")
+		parts.append("#> a block comment\nspanning\nseveral lines, # with a hash inside\n<#\n")
+
+	return "".join(parts)
+
+
+WORKLOADS = {
+	"arithmetic":	arithmetic,
+	"bindings":		bindings,
+	"calls":		calls,
+	"strings":		strings,
+	"arrays":		arrays,
+	"comments":		comments,
+}
+
+
+def timed(function, repeat: int) -> tuple:
+	# like timeit, with the collector off while timing
+	times = []
+	result = None
+
+	for _ in range(repeat):
+		result = None
+		gc.collect()
+		gc.disable()
+
+		try:
+			start = time.perf_counter()
+			result = function()
+			times.append(time.perf_counter() - start)
+		finally:
+			gc.enable()
+
+	return result, times
+
+
+def summary(times: list, items: int, unit: str) -> dict:
+	median = statistics.median(times)
+
+	return {
+		"min": min(times),
+		"median": median,
+		"mean": statistics.fmean(times),
+		"stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+		"runs": len(times),
+		"items": items,
+		"unit": unit,
+		"per_second": items / median if median else 0.0,
+	}
+
+
+def run_workload(source: str, repeat: int) -> dict:
+	results = {}
+
+	tokens, times = timed(lambda: DeltaLexer(source).parse(), repeat)
+	results["lex"] = summary(times, len(source), "chars")
+
+	tree, times = timed(lambda: DeltaPrattParser(tokens).parse(), repeat)
+	results["parse"] = summary(times, len(tokens), "tokens")
+
+	program = DeltaProgram(source)
+	nodes = program.optimization.nodes_after
+
+	for engine in ENGINES:
+		_, times = timed(lambda: program.run(engine=engine, output=CaptureOutput()), repeat)
+		results[f"execute/{engine}"] = summary(times, nodes, "nodes")
+
+	return results
+
+
+def revision() -> str:
+	try:
+		return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> int:
+	if baseline.get("format") != FORMAT_VERSION:
+		print(f"baseline is format {baseline.get('format')}, expected {FORMAT_VERSION}")
+		return 2
+
+	if baseline["config"] != results["config"]:
+		print(f"warning: configs differ, {baseline['config']} against {results['config']}")
+
+	regressions = 0
+
+	print(f"\ncompared to {baseline.get('revision') or 'baseline'}, by median, threshold {threshold:.0%}:")
+
+	for name, stats in results["benchmarks"].items():
+		before = baseline["benchmarks"].get(name)
+
+		if before is None:
+			print(f"\t{name:<30}new")
+			continue
+
+		ratio = stats["median"] / before["median"]
+
+		# the noise of both runs is allowed for as well
+		noise = (stats["stdev"] + before["stdev"]) / before["median"]
+
+		if ratio > 1 + threshold + noise:
+			verdict = "REGRESSION"
+			regressions += 1
+		elif ratio < 1 - threshold - noise:
+			verdict = "faster"
+		else:
+			verdict = ""
+
+		print(f"\t{name:<30}{before['median'] * 1000:>10.2f} ms ->{stats['median'] * 1000:>10.2f} ms{ratio:>8.2f}x  {verdict}")
+
+	# only for the workloads that were run, --only leaves the others out
+	workloads = {name.split("/")[0] for name in results["benchmarks"]}
+
+	for name in sorted(baseline["benchmarks"].keys() - results["benchmarks"].keys()):
+		if name.split("/")[0] in workloads:
+			print(f"\t{name:<30}missing")
+
+	return 1 if regressions else 0
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser(description="Times the Delta pipeline on generated workloads.")
+	parser.add_argument("--scale", type=float, default=1.0, help="multiplies the size of every workload")
+	parser.add_argument("--repeat", type=int, default=5, help="runs of each measurement")
+	parser.add_argument("--only", help="comma separated workloads to run, out of " + ", ".join(WORKLOADS))
+	parser.add_argument("--output", help="write the results to this JSON file")
+	parser.add_argument("--compare", metavar="BASELINE", help="compare against the results in this JSON file")
+	parser.add_argument("--threshold", type=float, default=0.10, help="slowdown allowed before flagging a regression")
+	args = parser.parse_args()
+
+	names = args.only.split(",") if args.only else list(WORKLOADS)
+
+	for name in names:
+		if name not in WORKLOADS:
+			parser.error(f"unknown workload '{name}'")
+
+	results = {
+		"format": FORMAT_VERSION,
+		"revision": revision(),
+		"time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+		"python": platform.python_version(),
+		"implementation": platform.python_implementation(),
+		"machine": platform.machine(),
+		"numpy": numpy is not None,
+		"config": {"scale": args.scale, "repeat": args.repeat},
+		"benchmarks": {},
+	}
+
+	for name in names:
+		source = WORKLOADS[name](args.scale)
+		print(f"{name}: {len(source):,} characters")
+
+		for phase, stats in run_workload(source, args.repeat).items():
+			key = f"{name}/{phase}"
+			results["benchmarks"][key] = stats
+
+			print(f"\t{phase:<16}{stats['median'] * 1000:>10.2f} ms  ±{stats['stdev'] * 1000:>7.2f}{stats['per_second']:>16,.0f} {stats['unit']}/s")
+
+	if args.output:
+		with open(args.output, "w") as file:
+			json.dump(results, file, indent=2)
+
+	if args.compare:
+		with open(args.compare) as file:
+			return compare(results, json.load(file), args.threshold)
+
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
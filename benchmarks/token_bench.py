@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from delta_lexer import DeltaLexer, DeltaCharLexer
+from delta_parser import DeltaParser
+from lexer_bench import generate
+
+
+def traced(function) -> tuple:
+	tracemalloc.start()
+	result = function()
+	size = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+
+	return result, size
+
+
+def timed_parse(tokens, repeat: int) -> float:
+	best = None
+
+	for _ in range(repeat):
+		start = time.perf_counter()
+		DeltaParser(tokens).parse()
+		elapsed = time.perf_counter() - start
+
+		best = elapsed if best is None else min(best, elapsed)
+
+	return best
+
+
+def main() -> None:
+	size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+	repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+	source = generate(size)
+	print(f"source: {len(source):,} characters")
+
+	token_list, list_bytes = traced(lambda: DeltaCharLexer(source).parse())
+	buffer, buffer_bytes = traced(lambda: DeltaLexer(source).parse())
+	count = len(buffer)
+
+	print(f"{'list of Token':<16}{list_bytes:>14,} bytes{list_bytes / count:>10.1f} bytes/token")
+	print(f"{'TokenBuffer':<16}{buffer_bytes:>14,} bytes{buffer_bytes / count:>10.1f} bytes/token  ({buffer.nbytes() / count:.1f} in columns)")
+
+	list_time = timed_parse(token_list, repeat)
+	buffer_time = timed_parse(buffer, repeat)
+
+	print(f"{'parse list':<16}{list_time:>14.3f}s{count / list_time:>14,.0f} tokens/s")
+	print(f"{'parse buffer':<16}{buffer_time:>14.3f}s{count / buffer_time:>14,.0f} tokens/s")
+
+
+if __name__ == "__main__":
+	main()
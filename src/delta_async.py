@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+from delta_parser import ScopeNode
+from delta_stack_executor import DeltaStackExecutor
+from delta_runtime import Frame, VARIABLES, make_namespaces
+from delta_errors import DeltaLimitError, DeltaTimeoutError
+from delta_memo import MemoCache
+from delta_output import DeltaOutput
+
+
+class DeltaAsyncExecutor(DeltaStackExecutor):
+	"""
+	Runs a program as a coroutine, giving the event loop a turn every `slice` steps.
+
+	A step is one task off DeltaStackExecutor's work stack, entering or
+	finishing a node, so everything the program does, function calls and
+	the top level of the modules it imports included, is counted and can
+	be paused between two steps. Many
+	programs awaited together take turns, the loop is never held for
+	longer than a slice of any of them.
+
+	`budget` caps the steps a run may take and `timeout` the seconds it
+	may run for, wall clock, time spent waiting for other programs
+	included. Both raise a DeltaLimitError, the timeout a
+	DeltaTimeoutError, checked every step and every slice respectively.
+	"""
+
+	DEFAULT_SLICE = 1000
+
+	def __init__(self, program: ScopeNode, resolution=None, memo: MemoCache = None, output: DeltaOutput = None,
+			slice: int = DEFAULT_SLICE, budget: int = None, timeout: float = None) -> None:
+		super().__init__(program, resolution, memo, output)
+
+		self.slice = slice
+		self.budget = budget
+		self.timeout = timeout
+
+		self.steps = 0		# steps taken by the last run, or so far while it runs
+		self.yields = 0		# times it gave the loop a turn
+
+
+	def spawn(self, module):
+		# imported modules run on this executor's work stack, see step_ImportNode, so its budget and timeout cover them
+		return DeltaAsyncExecutor(module.tree, module.resolution, self.memo, self.output, self.slice, self.budget, self.timeout)
+
+
+	async def execute_async(self, variables: dict = None) -> dict:
+		namespaces = make_namespaces(variables)
+
+		try:
+			await self.execute_in_async(namespaces)
+		finally:
+			self.output.finish()
+
+		return namespaces[VARIABLES]
+
+
+	async def execute_in_async(self, namespaces: tuple):
+		frame = Frame(self.resolution.frame_size, None, namespaces)
+		return await self.run_async(self.program, frame, self)
+
+
+	async def run_async(self, node, frame, owner):
+		work = [(self.enter[type(node)], node, frame, owner)]
+		values = []
+
+		budget = self.budget
+		deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+
+		steps = 0
+		pause = self.slice
+		stop = pause if budget is None else min(pause, budget)
+
+		self.yields = 0
+
+		try:
+			while work:
+				handler, node, frame, owner = work.pop()
+				handler(node, frame, owner, work, values)
+
+				steps += 1
+
+				# one comparison per step, the slice and the budget are both folded into `stop`
+				if steps >= stop:
+					if budget is not None and steps >= budget and work:
+						raise DeltaLimitError(f"step budget of {budget:,} exceeded")
+
+					if deadline is not None and time.monotonic() > deadline:
+						raise DeltaTimeoutError(f"timed out after {self.timeout:g}s")
+
+					self.steps = steps
+					await asyncio.sleep(0)
+					self.yields += 1
+
+					pause = steps + self.slice
+					stop = pause if budget is None else min(pause, budget)
+		finally:
+			self.steps = steps
+
+		return values.pop()
@@ -0,0 +1,311 @@
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout
+
+from delta_program import DeltaProgram
+from delta_cache import DeltaCache
+from delta_output import CaptureOutput
+from delta_modules import MODULE_CACHE
+from delta_errors import DeltaTimeoutError
+
+
+SUFFIX = ".delta"
+
+
+class ScriptResult:
+	def __init__(self, path: str) -> None:
+		self.path = path
+		self.ok = False
+		self.output = ""
+		self.error = None		# "ErrorType: message" when the script failed
+
+		self.compile_time = 0.0
+		self.execute_time = 0.0
+		self.worker = None		# pid of the process that ran it
+
+
+	@property
+	def time(self) -> float:
+		return self.compile_time + self.execute_time
+
+
+	def to_dict(self) -> dict:
+		return {
+			"path": self.path,
+			"ok": self.ok,
+			"output": self.output,
+			"error": self.error,
+			"compile_time": self.compile_time,
+			"execute_time": self.execute_time,
+			"worker": self.worker,
+		}
+
+
+
+class BatchReport:
+	def __init__(self, results: list, wall_time: float, workers: int) -> None:
+		self.results = results	# ScriptResults, in the order the scripts were given
+		self.wall_time = wall_time
+		self.workers = workers
+
+
+	@property
+	def failed(self) -> list:
+		return [result for result in self.results if not result.ok]
+
+
+	@property
+	def throughput(self) -> float:
+		# scripts per second of wall time
+		return len(self.results) / self.wall_time if self.wall_time else 0.0
+
+
+	def to_dict(self) -> dict:
+		busy = sum(result.time for result in self.results)
+
+		return {
+			"scripts": len(self.results),
+			"failed": len(self.failed),
+			"workers": self.workers,
+			"wall_time": self.wall_time,
+			"script_time": busy,
+			"throughput": self.throughput,
+			"results": [result.to_dict() for result in self.results],
+		}
+
+
+
+def collect(sources: list) -> list:
+	"""
+	The scripts named by `sources`, in order. A directory stands for every
+	.delta file under it, sorted by path. Any other file that isn't a .delta
+	script is read as a manifest: one path per line, relative to the
+	manifest, with blank lines and lines starting with # skipped.
+	"""
+	paths = []
+
+	for source in sources:
+		if os.path.isdir(source):
+			found = []
+
+			for root, _, names in os.walk(source):
+				found.extend(os.path.join(root, name) for name in names if name.endswith(SUFFIX))
+
+			paths.extend(sorted(found))
+		elif source.endswith(SUFFIX):
+			paths.append(source)
+		else:
+			base = os.path.dirname(source)
+
+			with open(source) as file:
+				for line in file:
+					line = line.strip()
+
+					if line and not line.startswith("#"):
+						paths.append(os.path.join(base, line))
+
+	return paths
+
+
+# state each worker process keeps between scripts
+worker_options = None
+worker_module_path = None
+
+
+def start_worker(engine: str, optimize: bool, cache_directory: str, timeout: float) -> None:
+	# a worker is set up once and reused for every script it is given
+	global worker_options, worker_module_path
+
+	cache = DeltaCache(cache_directory or None) if cache_directory is not None else None
+	worker_options = (engine, optimize, cache, timeout)
+	worker_module_path = list(MODULE_CACHE.path)
+
+	signal.signal(signal.SIGALRM, time_out)
+
+
+def time_out(signum, frame) -> None:
+	# raised in the script's run, wherever it is, which then fails like any other error
+	raise DeltaTimeoutError(f"timed out after {worker_options[3]:g}s")
+
+
+def describe(error: Exception) -> str:
+	# the one form of every error in a result, whether the script raised it or the pool did
+	return f"{type(error).__name__}: {error}"
+
+
+def run_script(path: str) -> ScriptResult:
+	engine, optimize, cache, timeout = worker_options
+
+	# a script imports from its own directory first, the modules stay cached for the next one
+	MODULE_CACHE.path = [os.path.dirname(path) or os.curdir] + worker_module_path
+
+	result = ScriptResult(path)
+	result.worker = os.getpid()
+
+	output = CaptureOutput()
+	stray = io.StringIO()	# the parser prints its warnings itself
+
+	if timeout is not None:
+		signal.setitimer(signal.ITIMER_REAL, timeout)
+
+	try:
+		with redirect_stdout(stray):
+			start = time.perf_counter()
+			program = DeltaProgram.from_file(path, optimize, cache)
+			result.compile_time = time.perf_counter() - start
+
+			start = time.perf_counter()
+
+			try:
+				program.run(engine=engine, output=output)
+			finally:
+				result.execute_time = time.perf_counter() - start
+
+		result.ok = True
+	except RecursionError:
+		result.error = describe(RecursionError("the script nests too deeply"))
+	except Exception as error:
+		# anything a script does stays in its own result
+		result.error = describe(error)
+	finally:
+		signal.setitimer(signal.ITIMER_REAL, 0)
+
+	result.output = stray.getvalue() + output.getvalue()
+	return result
+
+
+class DeltaBatch:
+	"""
+	Runs many independent scripts over a pool of worker processes.
+
+	Each worker imports the interpreter once and then runs script after
+	script, so the per-script cost is the script's own. Results come back
+	in the order the scripts were given, however the work was spread. A
+	script that raises only fails itself, and one that takes its worker
+	down fails along with those the pool could no longer run.
+
+	A script still running after `timeout` seconds fails with a
+	DeltaTimeoutError, and its worker goes on to the next one. One stuck
+	in a single operation that can't be interrupted, such as a huge power,
+	gets GRACE more seconds. After that the pool's workers are killed, and
+	the scripts that hadn't finished run again on a new pool.
+	"""
+
+	DEFAULT_TIMEOUT = 60.0
+	GRACE = 5.0
+
+	def __init__(self, workers: int = None, engine: str = DeltaProgram.ENGINE_VM, optimize: bool = True, cache_directory: str = None,
+			timeout: float = DEFAULT_TIMEOUT) -> None:
+		self.workers = workers or os.cpu_count() or 1
+		self.engine = engine
+		self.optimize = optimize
+		self.cache_directory = cache_directory	# "" for the default directory, None for no cache
+		self.timeout = timeout					# None for no timeout
+
+
+	def run(self, paths: list) -> BatchReport:
+		start = time.perf_counter()
+		results = [None] * len(paths)
+		pending = list(range(len(paths)))
+
+		while pending:
+			pending = self.run_pool(paths, pending, results)
+
+		return BatchReport(results, time.perf_counter() - start, self.workers)
+
+
+	def run_pool(self, paths: list, indices: list, results: list) -> list:
+		# runs the scripts at `indices` on a new pool, returns the ones left to run if it had to be killed
+		before = set(multiprocessing.active_children())
+		pool = ProcessPoolExecutor(self.workers, initializer=start_worker, initargs=(self.engine, self.optimize, self.cache_directory, self.timeout))
+
+		futures = [pool.submit(run_script, paths[index]) for index in indices]
+		workers = [process for process in multiprocessing.active_children() if process not in before]
+
+		# the scripts before a script have all finished by the time it is waited for, so it has a worker of its own by then
+		wait = self.timeout + DeltaBatch.GRACE if self.timeout is not None else None
+
+		for position, (index, future) in enumerate(zip(indices, futures)):
+			try:
+				results[index] = future.result(wait)
+			except TimeoutError:
+				results[index] = DeltaBatch.failed(paths[index], DeltaTimeoutError(f"still running {wait:g}s after it started, its worker was killed"))
+
+				for process in workers:
+					process.kill()
+
+				pool.shutdown(wait=True, cancel_futures=True)
+				return [index for index, future in zip(indices[position + 1:], futures[position + 1:]) if not DeltaBatch.collect(future, results, index)]
+			except BrokenProcessPool:
+				results[index] = DeltaBatch.failed(paths[index], BrokenProcessPool("a worker died before this script finished"))
+			except Exception as error:
+				# the timeout going off just as the script finished, outside of its own handling
+				results[index] = DeltaBatch.failed(paths[index], error)
+
+		pool.shutdown()
+		return []
+
+
+	@staticmethod
+	def collect(future, results: list, index: int) -> bool:
+		# keeps the result of a script that finished before its pool was killed
+		if future.done() and not future.cancelled() and future.exception() is None:
+			results[index] = future.result()
+			return True
+
+		return False
+
+
+	@staticmethod
+	def failed(path: str, error: Exception) -> ScriptResult:
+		result = ScriptResult(path)
+		result.error = describe(error)
+		return result
+
+
+
+def main(argv: list = None) -> int:
+	parser = argparse.ArgumentParser(prog="delta-batch", description="Runs many Delta scripts over a pool of processes.")
+	parser.add_argument("sources", nargs="+", help="scripts, directories of scripts or manifest files listing scripts")
+	parser.add_argument("-j", "--workers", type=int, help="worker processes (default: one per cpu)")
+	parser.add_argument("-e", "--engine", choices=(DeltaProgram.ENGINE_VM, DeltaProgram.ENGINE_TREE, DeltaProgram.ENGINE_STACK), default=DeltaProgram.ENGINE_VM)
+	parser.add_argument("-O", "--no-optimize", dest="optimize", action="store_false", help="skip the optimizer")
+	parser.add_argument("-t", "--timeout", type=float, default=DeltaBatch.DEFAULT_TIMEOUT, metavar="SECONDS", help=f"fail a script still running after SECONDS, 0 for none (default: {DeltaBatch.DEFAULT_TIMEOUT:g})")
+	parser.add_argument("--cache", nargs="?", const="", metavar="DIR", help="share compiled programs between workers through DIR, or the default cache directory")
+	parser.add_argument("--show-output", action="store_true", help="print every script's output, in order")
+	parser.add_argument("--json", metavar="FILE", help="write every result, output included, to FILE")
+	args = parser.parse_args(argv)
+
+	paths = collect(args.sources)
+	report = DeltaBatch(args.workers, args.engine, args.optimize, args.cache, args.timeout or None).run(paths)
+
+	for result in report.results:
+		status = "ok" if result.ok else "FAILED"
+		print(f"{status:<8}{result.compile_time * 1000:>10.2f} ms{result.execute_time * 1000:>10.2f} ms  {result.path}")
+
+		if result.error:
+			print(f"\t{result.error}")
+
+		if args.show_output and result.output:
+			print("\t" + result.output.rstrip("\n").replace("\n", "\n\t"))
+
+	print(f"{len(report.results):,} scripts, {len(report.failed):,} failed, {report.workers} workers, "
+		f"{report.wall_time:.3f}s, {report.throughput:,.1f} scripts/s")
+
+	if args.json:
+		with open(args.json, "w") as file:
+			json.dump(report.to_dict(), file, indent=2)
+
+	return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
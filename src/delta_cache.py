@@ -0,0 +1,175 @@
+import hashlib
+import os
+import pickle
+import sys
+
+from delta_types import numpy
+
+
+class DeltaCache:
+	"""
+	An on-disk cache of compiled programs, like python's .pyc files.
+
+	Each entry is a .deltac file named after a hash of the source, the
+	interpreter version and the options it was compiled with, holding the
+	tree, resolution and code of the program pickled together. An entry that
+	doesn't validate is deleted and counted as a miss. When the files go over
+	`max_bytes` the least recently used ones are removed.
+
+	Entries are unpickled, so the directory must only be writable by whoever
+	runs the scripts, the same as a __pycache__ directory.
+	"""
+
+	# bump whenever a change to the nodes, the resolver or the compiler makes old entries wrong
+	VERSION = 3
+
+	MAGIC = b"DELTAC"
+	SUFFIX = ".deltac"
+
+	DIRECTORY_VARIABLE = "DELTA_CACHE_DIR"
+	DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "delta")
+	DEFAULT_MAX_BYTES = 64 << 20
+
+	def __init__(self, directory: str = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+		self.directory = directory or os.environ.get(DeltaCache.DIRECTORY_VARIABLE) or DeltaCache.DEFAULT_DIRECTORY
+		self.max_bytes = max_bytes
+
+		self.hits = 0
+		self.misses = 0
+		self.stores = 0
+		self.evictions = 0
+		self.invalid = 0	# entries that were there but couldn't be used
+
+
+	def __repr__(self) -> str:
+		return (f"DeltaCache({self.directory}, hits={self.hits}, misses={self.misses}, "
+			f"stores={self.stores}, evictions={self.evictions}, invalid={self.invalid})")
+
+
+	def key(self, source: str, options: tuple = ()) -> str:
+		# the python version matters too, the entries hold pickled python objects
+		version = f"delta {DeltaCache.VERSION} python {sys.version_info[0]}.{sys.version_info[1]} numpy {numpy is not None} {options}"
+
+		digest = hashlib.sha256(version.encode())
+		digest.update(b"\0")
+		digest.update(source.encode())
+
+		return digest.hexdigest()
+
+
+	def path(self, key: str) -> str:
+		return os.path.join(self.directory, key + DeltaCache.SUFFIX)
+
+
+	def header(self, key: str) -> bytes:
+		return DeltaCache.MAGIC + DeltaCache.VERSION.to_bytes(2, "little") + bytes.fromhex(key)
+
+
+	def load(self, key: str):
+		"""
+		Returns what was stored under `key`, or None if there is no usable entry.
+		"""
+		path = self.path(key)
+
+		try:
+			with open(path, "rb") as file:
+				data = file.read()
+		except OSError:
+			self.misses += 1
+			return None
+
+		header = self.header(key)
+
+		try:
+			if not data.startswith(header):
+				raise ValueError("bad header")
+
+			value = pickle.loads(data[len(header):])
+		except Exception:
+			self.invalid += 1
+			self.misses += 1
+			self.remove(path)
+			return None
+
+		# the modification time doubles as the last use, for eviction
+		try:
+			os.utime(path)
+		except OSError:
+			pass
+
+		self.hits += 1
+		return value
+
+
+	def store(self, key: str, value) -> bool:
+		"""
+		Stores `value` under `key`, returns whether it was written. A cache that
+		can't be written to is not an error, the program just runs uncached.
+		"""
+		try:
+			data = self.header(key) + pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+		except (pickle.PicklingError, RecursionError, TypeError):
+			return False
+
+		if len(data) > self.max_bytes:
+			return False
+
+		path = self.path(key)
+		temp = f"{path}.{os.getpid()}.tmp"
+
+		try:
+			os.makedirs(self.directory, exist_ok=True)
+
+			with open(temp, "wb") as file:
+				file.write(data)
+
+			# readers never see a half written entry
+			os.replace(temp, path)
+		except OSError:
+			self.remove(temp)
+			return False
+
+		self.stores += 1
+		self.evict()
+
+		return True
+
+
+	def evict(self) -> None:
+		entries = []
+
+		try:
+			for entry in os.scandir(self.directory):
+				if entry.name.endswith(DeltaCache.SUFFIX):
+					stat = entry.stat()
+					entries.append((stat.st_mtime, stat.st_size, entry.path))
+		except OSError:
+			return
+
+		total = sum(size for _, size, _ in entries)
+
+		for _, size, path in sorted(entries):
+			if total <= self.max_bytes:
+				break
+
+			if self.remove(path):
+				self.evictions += 1
+
+			total -= size
+
+
+	def clear(self) -> None:
+		try:
+			for entry in os.scandir(self.directory):
+				if entry.name.endswith(DeltaCache.SUFFIX):
+					self.remove(entry.path)
+		except OSError:
+			pass
+
+
+	def remove(self, path: str) -> bool:
+		try:
+			os.remove(path)
+			return True
+		except OSError:
+			return False
@@ -0,0 +1,342 @@
+from delta_lexer import Token
+from delta_parser import Node, ScopeNode, ReturnNode, VarAssignNode, FunctionDefineNode, PrintNode, ImportNode, NumberNode, BooleanNode
+from delta_resolver import Resolution
+from delta_runtime import VARIABLES, FUNCTIONS
+from delta_types import *
+
+
+class Op:
+	LOAD_CONST		=	0x00
+	LOAD_LOCAL		=	0x01
+	STORE_LOCAL		=	0x02
+	LOAD_OUTER		=	0x03
+	STORE_OUTER		=	0x04
+	LOAD_GLOBAL		=	0x05
+	STORE_GLOBAL	=	0x06
+
+	MAKE_FUNCTION	=	0x07
+	CALL			=	0x08
+	RETURN			=	0x09
+
+	POP				=	0x0A
+	PRINT			=	0x0B
+	BINARY_OP		=	0x0C
+	UNARY_PLUS		=	0x0D
+	UNARY_MINUS		=	0x0E
+	BUILD_ARRAY		=	0x0F
+
+	JUMP			=	0x10
+	JUMP_IF_FALSE	=	0x11
+
+	IMPORT			=	0x12
+
+	NAMES = {
+		LOAD_CONST:				"LOAD_CONST",
+		LOAD_LOCAL:				"LOAD_LOCAL",
+		STORE_LOCAL:			"STORE_LOCAL",
+		LOAD_OUTER:				"LOAD_OUTER",
+		STORE_OUTER:			"STORE_OUTER",
+		LOAD_GLOBAL:			"LOAD_GLOBAL",
+		STORE_GLOBAL:			"STORE_GLOBAL",
+
+		MAKE_FUNCTION:			"MAKE_FUNCTION",
+		CALL:					"CALL",
+		RETURN:					"RETURN",
+
+		POP:					"POP",
+		PRINT:					"PRINT",
+		BINARY_OP:				"BINARY_OP",
+		UNARY_PLUS:				"UNARY_PLUS",
+		UNARY_MINUS:			"UNARY_MINUS",
+		BUILD_ARRAY:			"BUILD_ARRAY",
+
+		JUMP:					"JUMP",
+		JUMP_IF_FALSE:			"JUMP_IF_FALSE",
+
+		IMPORT:					"IMPORT",
+	}
+
+	# method names on the delta_types values, looked up once at compile time
+	BINARY_METHODS = {
+		Token.OP_PLUS: 			"add",
+		Token.OP_MINUS:			"subtract",
+		Token.OP_MULTIPLY:		"multiply",
+		Token.OP_DIVIDE:		"divide",
+		Token.OP_POWER:			"power",
+		Token.OP_EQUALS:		"comp_ee",
+		Token.OP_NEQUALS:		"comp_ne",
+		Token.OP_LESSER:		"comp_lr",
+		Token.OP_GREATER:		"comp_gr",
+		Token.OP_LEQUALS:		"comp_le",
+		Token.OP_GEQUALS:		"comp_ge",
+	}
+
+
+
+class DeltaCode:
+	def __init__(self, name: str, instructions: list, constants: list, frame_size: int, guards: frozenset = None) -> None:
+		self.name = name
+		self.instructions = instructions	# list of (opcode, argument) pairs
+		self.constants = constants
+		self.frame_size = frame_size
+		self.guards = guards	# see Resolution.pure, None unless the function is pure
+
+
+	def __repr__(self) -> str:
+		return f"Code({self.name}, {len(self.instructions)} instructions)"
+
+
+	def disassemble(self) -> str:
+		lines = [f"code {self.name} ({self.frame_size} slots):"]
+
+		for index, (opcode, arg) in enumerate(self.instructions):
+			if opcode == Op.LOAD_CONST:
+				arg = f"{arg} ({self.constants[arg]!r})"
+
+			lines.append(f"\t{index:>4}  {Op.NAMES[opcode]:<24}{'' if arg is None else arg}")
+
+		for constant in self.constants:
+			if isinstance(constant, DeltaCode):
+				lines.append("")
+				lines.append(constant.disassemble())
+
+		return "\n".join(lines)
+
+
+
+class DeltaCompiler:
+	"""
+	Lowers the ScopeNode tree produced by DeltaParser into flat DeltaCode,
+	using the frame slots assigned by DeltaResolver.
+
+	Every expression leaves exactly one value on the stack. Statements whose
+	value is always null (print, let, func, import) are compiled without it,
+	so they don't need a following POP.
+	"""
+
+	# bigger literal arrays are built when they run, where limits can stop them
+	MAX_CONSTANT_ARRAY = 1 << 16
+
+	def __init__(self, resolution: Resolution) -> None:
+		self.resolution = resolution
+
+		self.instructions = None
+		self.constants = None
+		self.constant_keys = None
+
+
+	def compile(self, program: ScopeNode) -> DeltaCode:
+		return self.compile_unit(self.resolution.frame_size, program.statements, "<program>")
+
+
+	def compile_toplevel(self, statement: Node) -> DeltaCode:
+		# a single program-scope statement, resolved with DeltaResolver.resolve_statement
+		return self.compile_unit(self.resolution.frame_size, [statement], "<statement>")
+
+
+	def compile_unit(self, frame_size: int, statements: list, name: str, guards: frozenset = None) -> DeltaCode:
+		outer = (self.instructions, self.constants, self.constant_keys)
+
+		self.instructions = []
+		self.constants = []
+		self.constant_keys = {}
+
+		self.compile_statements(statements)
+		self.emit(Op.RETURN)
+
+		code = DeltaCode(name, self.instructions, self.constants, frame_size, guards)
+
+		self.instructions, self.constants, self.constant_keys = outer
+
+		return code
+
+
+	def emit(self, opcode: int, arg=None) -> int:
+		self.instructions.append((opcode, arg))
+		return len(self.instructions) - 1
+
+
+	def patch(self, index: int) -> None:
+		opcode, _ = self.instructions[index]
+		self.instructions[index] = (opcode, len(self.instructions))
+
+
+	def add_constant(self, value) -> int:
+		# delta values are deduplicated by type and literal, code objects and arrays never are
+		if isinstance(value, (DeltaCode, DeltaArray)):
+			key = id(value)
+		else:
+			literal = getattr(value, "value", None)
+			key = (type(value), type(literal), repr(literal))
+
+		if key not in self.constant_keys:
+			self.constant_keys[key] = len(self.constants)
+			self.constants.append(value)
+
+		return self.constant_keys[key]
+
+
+	def load_constant(self, value) -> None:
+		self.emit(Op.LOAD_CONST, self.add_constant(value))
+
+
+	def load(self, node, name, namespace) -> None:
+		self.emit_access(node, name, namespace, Op.LOAD_LOCAL, Op.LOAD_OUTER, Op.LOAD_GLOBAL)
+
+
+	def store(self, node, name, namespace) -> None:
+		self.emit_access(node, name, namespace, Op.STORE_LOCAL, Op.STORE_OUTER, Op.STORE_GLOBAL)
+
+
+	def emit_access(self, node, name, namespace, local_opcode, outer_opcode, global_opcode) -> None:
+		# slots carry their name too, they fall back to the global of that name while unbound
+		address = self.resolution.addresses.get(node)
+
+		if address is None:
+			self.emit(global_opcode, (name, namespace))
+		elif address[0] == 0:
+			self.emit(local_opcode, (address[1], name, namespace))
+		else:
+			self.emit(outer_opcode, (address[0], address[1], name, namespace))
+
+
+	#####
+
+
+	def compile_statement(self, node) -> None:
+		if isinstance(node, PrintNode):
+			self.compile_expression(node.node)
+			self.emit(Op.PRINT)
+
+		elif isinstance(node, VarAssignNode):
+			self.compile_expression(node.node)
+			self.store(node, node.name, VARIABLES)
+
+		elif isinstance(node, FunctionDefineNode):
+			code = self.compile_unit(self.resolution.frame_sizes[node], node.scope.statements, node.name, self.resolution.pure.get(node))
+
+			self.emit(Op.MAKE_FUNCTION, self.add_constant(code))
+			self.store(node, node.name, FUNCTIONS)
+
+		elif isinstance(node, ImportNode):
+			self.emit(Op.IMPORT, node.name)
+
+		else:
+			self.compile_expression(node)
+			self.emit(Op.POP)
+
+
+	def compile_expression(self, node) -> None:
+		method_name = f"compile_{(type(node)).__name__}"
+		method = getattr(self, method_name)
+		method(node)
+
+
+	def compile_NumberNode(self, node) -> None:
+		self.load_constant(make_number(node.value))
+
+
+	def compile_BooleanNode(self, node) -> None:
+		self.load_constant(make_bool(node.value))
+
+
+	def compile_StringNode(self, node) -> None:
+		self.load_constant(DeltaString(node.value))
+
+
+	def compile_ArrayNode(self, node) -> None:
+		if (all(isinstance(value, (NumberNode, BooleanNode)) for value in node.value) and isinstance(node.length, NumberNode)
+				and node.length.value <= DeltaCompiler.MAX_CONSTANT_ARRAY):
+			# operations never change an array in place, so a literal one is built once, unboxed
+			values = [make_number(value.value) if isinstance(value, NumberNode) else make_bool(value.value) for value in node.value]
+			self.load_constant(DeltaArray(make_number(node.length.value), values))
+			return
+
+		for value in node.value:
+			self.compile_expression(value)
+
+		self.compile_expression(node.length)
+		self.emit(Op.BUILD_ARRAY, len(node.value))
+
+
+	def compile_FunctionCallNode(self, node) -> None:
+		name = node.name
+
+		self.load(node, name, FUNCTIONS)
+		self.emit(Op.CALL, name)
+
+
+	def compile_FunctionDefineNode(self, node) -> None:
+		self.compile_statement(node)
+		self.load_constant(NULL)
+
+
+	def compile_ImportNode(self, node) -> None:
+		self.compile_statement(node)
+		self.load_constant(NULL)
+
+
+	def compile_VarAccessNode(self, node) -> None:
+		self.load(node, node.name, VARIABLES)
+
+
+	def compile_VarAssignNode(self, node) -> None:
+		self.compile_statement(node)
+		self.load_constant(NULL)
+
+
+	def compile_PrintNode(self, node) -> None:
+		self.compile_statement(node)
+		self.load_constant(NULL)
+
+
+	def compile_ScopeNode(self, node) -> None:
+		# nested scopes live in the enclosing frame, so they cost no instructions
+		self.compile_statements(node.statements)
+
+
+	def compile_statements(self, statements: list) -> None:
+		# leaves the value of the scope: whatever it returns, or null
+		for statement in statements:
+			if isinstance(statement, ReturnNode):
+				# scopes never loop, so nothing after a return can run
+				self.compile_expression(statement.node)
+				break
+
+			self.compile_statement(statement)
+
+		else:
+			self.load_constant(NULL)
+
+
+	def compile_ReturnNode(self, node) -> None:
+		self.compile_expression(node.node)
+
+
+	def compile_IfNode(self, node) -> None:
+		self.compile_expression(node.eval_scope)
+		skip = self.emit(Op.JUMP_IF_FALSE)
+
+		self.compile_expression(node.action_scope)
+		self.emit(Op.POP)
+		self.load_constant(TRUE)
+		end = self.emit(Op.JUMP)
+
+		self.patch(skip)
+		self.load_constant(FALSE)
+		self.patch(end)
+
+
+	def compile_BinOpNode(self, node) -> None:
+		self.compile_expression(node.left_node)
+		self.compile_expression(node.right_node)
+		self.emit(Op.BINARY_OP, Op.BINARY_METHODS[node.op])
+
+
+	def compile_UnaryOpNode(self, node) -> None:
+		self.compile_expression(node.node)
+
+		if node.op == Token.OP_PLUS:
+			self.emit(Op.UNARY_PLUS)
+		elif node.op == Token.OP_MINUS:
+			self.emit(Op.UNARY_MINUS)
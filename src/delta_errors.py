@@ -0,0 +1,27 @@
+class DeltaError(Exception):
+	pass
+
+
+
+class DeltaRuntimeError(DeltaError):
+	pass
+
+
+
+class DeltaSyntaxError(DeltaError):
+	pass
+
+
+
+class DeltaImportError(DeltaRuntimeError):
+	pass
+
+
+
+class DeltaLimitError(DeltaRuntimeError):
+	pass
+
+
+
+class DeltaTimeoutError(DeltaLimitError):
+	pass
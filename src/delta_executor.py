@@ -1,125 +1,222 @@
 from delta_types import *
 from delta_parser import Node, ReturnNode, ScopeNode
 from delta_lexer import Token
+from delta_resolver import DeltaResolver, Resolution
+from delta_runtime import Frame, DeltaFunction, VARIABLES, FUNCTIONS, make_namespaces
+from delta_memo import MemoCache, MISS
+from delta_output import DeltaOutput, TextOutput
+from delta_specialize import BinOpSite
+from delta_modules import import_module, define
 
 
 class DeltaExecutor:
-	def __init__(self, program: ScopeNode) -> None:
+	OP_METHODS = {
+		Token.OP_PLUS: 			"add",
+		Token.OP_MINUS:			"subtract",
+		Token.OP_MULTIPLY:		"multiply",
+		Token.OP_DIVIDE:		"divide",
+		Token.OP_POWER:			"power",
+		Token.OP_EQUALS:		"comp_ee",
+		Token.OP_NEQUALS:		"comp_ne",
+		Token.OP_LESSER:		"comp_lr",
+		Token.OP_GREATER:		"comp_gr",
+		Token.OP_LEQUALS:		"comp_le",
+		Token.OP_GEQUALS:		"comp_ge",
+	}
+
+	def __init__(self, program: ScopeNode, resolution: Resolution = None, memo: MemoCache = None, output: DeltaOutput = None) -> None:
 		self.program = program
+		self.resolution = resolution if resolution else DeltaResolver().resolve(program)
+		self.memo = memo	# pure function results are kept here, if given
+		self.output = output if output is not None else TextOutput()
+
+		self.addresses = self.resolution.addresses
+		self.frame_sizes = self.resolution.frame_sizes
+		self.pure = self.resolution.pure
+
+		# BinOpNode -> its BinOpSite, kept here rather than on the nodes since a program may run on many threads
+		self.sites = {}
 
 	
-	def execute(self) -> None:
-		self.visit(self.program, None)
+	def execute(self, variables: dict = None) -> dict:
+		namespaces = make_namespaces(variables)
+
+		try:
+			self.execute_in(namespaces)
+		finally:
+			self.output.finish()
+
+		return namespaces[VARIABLES]
+
+
+	def execute_in(self, namespaces: tuple):
+		# all run state but the output lives in the frames
+		frame = Frame(self.resolution.frame_size, None, namespaces)
+		return self.visit(self.program, frame)
+
+
+	def spawn(self, module):
+		# an executor like this one for a module the run imports, subclasses pass on their own state
+		return type(self)(module.tree, module.resolution, self.memo, self.output)
+
+
+	def make_function(self, stand_in, state, namespaces: tuple):
+		# see delta_modules.define, a lazy module's functions share an executor and a frame per run
+		if state is None:
+			module = stand_in.module
+			state = (self.spawn(module), Frame(module.resolution.frame_size, None, namespaces))
+
+		executor, frame = state
+		return DeltaFunction(stand_in.node.name, stand_in.node, frame, executor), state
 	
 
-	def visit(self, node, scope) -> Node:
+	def visit(self, node, frame) -> Node:
 		method_name = f"visit_{(type(node)).__name__}"
 		method = getattr(self, method_name)
-		return method(node, scope)
+		return method(node, frame)
 	
 
-	def visit_NumberNode(self, node, scope):
-		return DeltaNumber(node.tok.value)
+	def visit_NumberNode(self, node, frame):
+		return make_number(node.value)
 	
 
-	def visit_BooleanNode(self, node, scope):
-		return DeltaBool(node.tok.value)
+	def visit_BooleanNode(self, node, frame):
+		return make_bool(node.value)
 	
 
-	def visit_StringNode(self, node, scope):
-		return DeltaString(node.tok.value)
+	def visit_StringNode(self, node, frame):
+		return DeltaString(node.value)
 	
 
-	def visit_ArrayNode(self, node, scope):
+	def visit_ArrayNode(self, node, frame):
 		temp = []
 		for value in node.value:
-			temp.append(self.visit(value, scope))
+			temp.append(self.visit(value, frame))
+
+		return DeltaArray(self.visit(node.length, frame), temp)
+
+
+	def visit_FunctionCallNode(self, node, frame):
+		name = node.name
+		function = frame.load(self.addresses.get(node), name, FUNCTIONS)
+
+		if not isinstance(function, DeltaFunction):
+			# a lazy module's function, called for the first time, or an error
+			function = define(function, name, frame.namespaces, self.make_function)
+
+		# the body runs under the executor that defined it, streamed statements each have their own
+		executor = function.executor
+		body = function.body
+
+		call_frame = Frame(executor.frame_sizes[body], function.frame, frame.namespaces)
 
-		return DeltaArray(self.visit(node.length, scope), temp)
+		if executor.memo is not None and body in executor.pure and executor.can_memoize(body, frame.namespaces):
+			key = MemoCache.key(body)
+			value = executor.memo.get(key)
 
+			if value is MISS:
+				value = executor.visit(body.scope, call_frame)
+				executor.memo.put(key, value)
 
-	def visit_FunctionCallNode(self, node, scope):
-		res = scope.get(node.name_tok.value, "functions")
-		res = self.visit(res, scope)
-		return res
+			return value
 
+		return executor.visit(body.scope, call_frame)
 
-	def visit_FunctionDefineNode(self, node, scope):
-		scope.set(node.name_tok.value, node.scope, "functions")
-		return DeltaNone()
 
+	def can_memoize(self, body, namespaces: tuple) -> bool:
+		# a global of the same name would be what an unwritten slot reads and writes
+		for namespace, name in self.pure[body]:
+			if name in namespaces[namespace]:
+				return False
 
-	def visit_VarAccessNode(self, node, scope):
-		return scope.get(node.name_tok.value, "variables")
+		return True
 
 
-	def visit_VarAssignNode(self, node, scope):
-		scope.set(node.name_tok.value, self.visit(node.node, scope), "variables")
-		return DeltaNone()
+	def visit_FunctionDefineNode(self, node, frame):
+		name = node.name
+		frame.store(self.addresses.get(node), name, FUNCTIONS, DeltaFunction(name, node, frame, self))
+		return NULL
 
 
-	def visit_PrintNode(self, node, scope):
-		print(self.visit(node.node, scope))
-		return DeltaNone()
+	def visit_ImportNode(self, node, frame):
+		namespaces = frame.namespaces
+		import_module(node.name, namespaces, lambda module: self.spawn(module).execute_in(namespaces))
+
+		return NULL
+
+
+	def visit_VarAccessNode(self, node, frame):
+		return frame.load(self.addresses.get(node), node.name, VARIABLES)
+
+
+	def visit_VarAssignNode(self, node, frame):
+		frame.store(self.addresses.get(node), node.name, VARIABLES, self.visit(node.node, frame))
+		return NULL
+
+
+	def visit_PrintNode(self, node, frame):
+		self.output.print(self.visit(node.node, frame))
+		return NULL
 	
 
-	def visit_ScopeNode(self, node, scope):
+	def visit_ScopeNode(self, node, frame):
+		# nested scopes share the frame, the resolver gave their bindings separate slots
 		for statement in node.statements:
-			if isinstance(statement, ScopeNode):
-				statement.parent = node
-			
-			res = self.visit(statement, node)
+			res = self.visit(statement, frame)
 
 			if isinstance(statement, ReturnNode):
 				return res
 		
-		return DeltaNone()
+		return NULL
 	
 
-	def visit_ReturnNode(self, node, scope):
-		return self.visit(node.node, scope)
+	def visit_ReturnNode(self, node, frame):
+		return self.visit(node.node, frame)
 
 
-	def visit_IfNode(self, node, scope):
-		res = self.visit(node.eval_scope, scope)
+	def visit_IfNode(self, node, frame):
+		res = self.visit(node.eval_scope, frame)
 
 		if res.value == True:
-			self.visit(node.action_scope, scope)
-			return DeltaBool(True)
+			self.visit(node.action_scope, frame)
+			return TRUE
 		
-		return DeltaBool(False)
-
-
-	def visit_BinOpNode(self, node, scope):
-		OP_METHODS = {
-			Token.OP_PLUS: 			"add",
-			Token.OP_MINUS:			"subtract",
-			Token.OP_MULTIPLY:		"multiply",
-			Token.OP_DIVIDE:		"divide",
-			Token.OP_POWER:			"power",
-			Token.OP_EQUALS:		"comp_ee",
-			Token.OP_NEQUALS:		"comp_ne",
-			Token.OP_LESSER:		"comp_lr",
-			Token.OP_GREATER:		"comp_gr",
-			Token.OP_LEQUALS:		"comp_le",
-			Token.OP_GEQUALS:		"comp_ge",
-		}
-
-		left = self.visit(node.left_node, scope)
-		right = self.visit(node.right_node, scope)
-
-		op_method = getattr(left, OP_METHODS[node.op_tok.tok_type])
-		result = op_method(right)
+		return FALSE
 
-		return result
+
+	def visit_BinOpNode(self, node, frame):
+		left = self.visit(node.left_node, frame)
+		right = self.visit(node.right_node, frame)
+
+		if frame.parent is None:
+			# the program's own statements run once per run, only function bodies make a site hot
+			return getattr(left, DeltaExecutor.OP_METHODS[node.op])(right)
+
+		site = self.sites.get(node)
+
+		# a hit is the common case, the operands have the types the site specialized for
+		if site is not None and type(left) is site.left and type(right) is site.right:
+			site.hits += 1
+			return site.function(left, right)
+
+		return self.miss(node, left, right)
+
+
+	def miss(self, node, left, right):
+		site = self.sites.get(node)
+
+		if site is None:
+			site = self.sites[node] = BinOpSite(DeltaExecutor.OP_METHODS[node.op])
+
+		return site.miss(left, right)
 	
 
-	def visit_UnaryOpNode(self, node, scope):
-		number = self.visit(node.node, scope)
+	def visit_UnaryOpNode(self, node, frame):
+		number = self.visit(node.node, frame)
 
-		if node.op_tok.matches(Token.OP_PLUS):
+		if node.op == Token.OP_PLUS:
 			result = number.abs()
-		elif node.op_tok.matches(Token.OP_MINUS):
+		elif node.op == Token.OP_MINUS:
 			result = number.neg()
 		
 		return result
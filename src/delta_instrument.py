@@ -0,0 +1,177 @@
+from time import perf_counter
+
+from delta_executor import DeltaExecutor
+from delta_memo import MemoCache
+from delta_output import DeltaOutput
+from delta_specialize import report_sites
+
+
+class FunctionStats:
+	__slots__ = ("calls", "inclusive", "exclusive")
+
+	def __init__(self) -> None:
+		self.calls = 0
+		self.inclusive = 0.0	# seconds, recursive calls counted once
+		self.exclusive = 0.0	# seconds spent in the function's own body
+
+
+
+class Instrumentation:
+	"""
+	What a DeltaInstrumentedExecutor measured, over one or more runs.
+
+	`visits` counts visits per node class. `functions` maps each Delta
+	function's name to its FunctionStats. `lookups` counts variable and
+	function lookups by the depth the resolver found them at, how many
+	function frames out, None for globals. `stacks` holds the exclusive
+	time of every call stack seen, which `write_collapsed` writes out in
+	the folded format flamegraph.pl, inferno and speedscope read. `sites`
+	maps each BinOpNode run to its BinOpSite, with its inline cache's hits
+	and misses.
+	"""
+
+	ROOT = "<script>"
+
+	def __init__(self) -> None:
+		self.visits = {}
+		self.functions = {}
+		self.lookups = {}
+		self.stacks = {}
+		self.sites = {}
+
+		self.calls = []		# [name, start, time spent in callees] of every call in progress
+		self.active = {}	# name -> how many calls to it are in progress
+
+
+	def enter(self, name: str) -> None:
+		self.calls.append([name, perf_counter(), 0.0])
+		self.active[name] = self.active.get(name, 0) + 1
+
+
+	def leave(self) -> None:
+		name, start, callees = self.calls.pop()
+		elapsed = perf_counter() - start
+
+		stats = self.functions.get(name)
+
+		if stats is None:
+			stats = self.functions[name] = FunctionStats()
+
+		stats.calls += 1
+		stats.exclusive += elapsed - callees
+
+		self.active[name] -= 1
+
+		if not self.active[name]:
+			# only the outermost of a recursion, the inner calls are inside its time already
+			stats.inclusive += elapsed
+
+		stack = tuple(call[0] for call in self.calls) + (name,)
+		self.stacks[stack] = self.stacks.get(stack, 0.0) + elapsed - callees
+
+		if self.calls:
+			self.calls[-1][2] += elapsed
+
+
+	def write_collapsed(self, file) -> None:
+		# one "outer;inner microseconds" line per stack
+		for stack, seconds in sorted(self.stacks.items()):
+			microseconds = round(seconds * 1_000_000)
+
+			if microseconds:
+				file.write(f"{';'.join(stack)} {microseconds}\n")
+
+
+	def report(self, file) -> None:
+		print("node visits:", file=file)
+
+		for name, count in sorted(self.visits.items(), key=lambda item: -item[1]):
+			print(f"\t{name:<20}{count:>12,}", file=file)
+
+		print("functions:               calls    inclusive ms    exclusive ms", file=file)
+
+		for name, stats in sorted(self.functions.items(), key=lambda item: -item[1].exclusive):
+			print(f"\t{name:<20}{stats.calls:>8,}{stats.inclusive * 1000:>16.3f}{stats.exclusive * 1000:>16.3f}", file=file)
+
+		print("lookups by depth:", file=file)
+
+		for depth, count in sorted(self.lookups.items(), key=lambda item: (item[0] is None, item[0] or 0)):
+			print(f"\t{'global' if depth is None else depth:<20}{count:>12,}", file=file)
+
+		report_sites(self.sites, file)
+
+
+
+class DeltaInstrumentedExecutor(DeltaExecutor):
+	"""
+	A DeltaExecutor that records what it does into an Instrumentation.
+
+	The measuring lives in this subclass alone, so DeltaExecutor's visit
+	path is the same whether or not anything is being measured. Functions
+	run under the executor that defined them, so every executor of a run,
+	the streamed statements' included, should share one Instrumentation.
+	"""
+
+	def __init__(self, program, resolution=None, memo: MemoCache = None, output: DeltaOutput = None, instrumentation: Instrumentation = None) -> None:
+		super().__init__(program, resolution, memo, output)
+		self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+		self.sites = self.instrumentation.sites
+
+		self.root = Instrumentation.ROOT	# what its top level shows as in the call stacks
+
+
+	def spawn(self, module):
+		executor = DeltaInstrumentedExecutor(module.tree, module.resolution, self.memo, self.output, self.instrumentation)
+		executor.root = f"<{module.name}>"
+
+		return executor
+
+
+	def execute_in(self, namespaces: tuple):
+		self.instrumentation.enter(self.root)
+
+		try:
+			return super().execute_in(namespaces)
+		finally:
+			self.instrumentation.leave()
+
+
+	def visit(self, node, frame):
+		name = type(node).__name__
+		visits = self.instrumentation.visits
+		visits[name] = visits.get(name, 0) + 1
+
+		return getattr(self, f"visit_{name}")(node, frame)
+
+
+	def lookup(self, node) -> None:
+		address = self.addresses.get(node)
+		depth = address[0] if address is not None else None
+
+		lookups = self.instrumentation.lookups
+		lookups[depth] = lookups.get(depth, 0) + 1
+
+
+	def visit_VarAccessNode(self, node, frame):
+		self.lookup(node)
+		return super().visit_VarAccessNode(node, frame)
+
+
+	def visit_VarAssignNode(self, node, frame):
+		self.lookup(node)
+		return super().visit_VarAssignNode(node, frame)
+
+
+	def visit_FunctionDefineNode(self, node, frame):
+		self.lookup(node)
+		return super().visit_FunctionDefineNode(node, frame)
+
+
+	def visit_FunctionCallNode(self, node, frame):
+		self.lookup(node)
+		self.instrumentation.enter(node.name)
+
+		try:
+			return super().visit_FunctionCallNode(node, frame)
+		finally:
+			self.instrumentation.leave()
@@ -1,3 +1,8 @@
+import re
+from array import array
+from itertools import chain
+
+from delta_errors import DeltaSyntaxError
 from delta_types import DeltaNumber
 
 
@@ -34,47 +39,47 @@ class Token:
 	OP_COMMA		=	0x01_0014
 	OP_SPECIFY		=	0x01_0015
 
+	REPR_KEY = {
+		TYPE_INT:			"INT",
+		TYPE_FLOAT:		"FLOAT",
+		TYPE_IDENTIFER:	"IDENT",
+		TYPE_KEYWORD:		"KEYWORD",
+		TYPE_STRING:		"STRING",
+
+		OP_EOS:			"EOS",
+		OP_EOF:			"EOF",
+
+		OP_PLUS:			"OP_PLUS",
+		OP_MINUS:			"OP_MINUS",
+		OP_MULTIPLY:		"OP_MULTIPLY",
+		OP_DIVIDE:		"OP_DIVIDE",
+		OP_LBRACKET:		"OP_LBRACKET",
+		OP_RBRACKET:		"OP_RBRACKET",
+		OP_ASSIGN:		"OP_ASSIGN",
+		OP_POWER:			"OP_POWER",
+
+		OP_EQUALS:		"OP_EQUALS",
+		OP_NEQUALS:		"OP_NEQUALS",
+		OP_LESSER:		"OP_LESSER",
+		OP_GREATER:		"OP_GREATER",
+		OP_LEQUALS:		"OP_LEQUALS",
+		OP_GEQUALS:		"OP_GEQUALS",
+
+		OP_SCOPE_BEGIN:	"OP_SCOPE_BEGIN",
+		OP_SCOPE_END:		"OP_SCOPE_END",
+		OP_ARRAY_BEGIN:	"OP_ARRAY_BEGIN",
+		OP_ARRAY_END:		"OP_ARRAY_END",
+		OP_COMMA:			"OP_COMMA",
+		OP_SPECIFY:		"OP_SPECIFY"
+	}
+
 	def __init__(self, tok_type: int, value=None) -> None:
 		self.tok_type = tok_type
 		self.value = value
 	
 
 	def __repr__(self) -> str:
-		REPR_KEY = {
-			Token.TYPE_INT:			"INT",
-			Token.TYPE_FLOAT:		"FLOAT",
-			Token.TYPE_IDENTIFER:	"IDENT",
-			Token.TYPE_KEYWORD:		"KEYWORD",
-			Token.TYPE_STRING:		"STRING",
-
-			Token.OP_EOS:			"EOS",
-			Token.OP_EOF:			"EOF",
-
-			Token.OP_PLUS:			"OP_PLUS",
-			Token.OP_MINUS:			"OP_MINUS",
-			Token.OP_MULTIPLY:		"OP_MULTIPLY",
-			Token.OP_DIVIDE:		"OP_DIVIDE",
-			Token.OP_LBRACKET:		"OP_LBRACKET",
-			Token.OP_RBRACKET:		"OP_RBRACKET",
-			Token.OP_ASSIGN:		"OP_ASSIGN",
-			Token.OP_POWER:			"OP_POWER",
-
-			Token.OP_EQUALS:		"OP_EQUALS",
-			Token.OP_NEQUALS:		"OP_NEQUALS",
-			Token.OP_LESSER:		"OP_LESSER",
-			Token.OP_GREATER:		"OP_GREATER",
-			Token.OP_LEQUALS:		"OP_LEQUALS",
-			Token.OP_GEQUALS:		"OP_GEQUALS",
-
-			Token.OP_SCOPE_BEGIN:	"OP_SCOPE_BEGIN",
-			Token.OP_SCOPE_END:		"OP_SCOPE_END",
-			Token.OP_ARRAY_BEGIN:	"OP_ARRAY_BEGIN",
-			Token.OP_ARRAY_END:		"OP_ARRAY_END",
-			Token.OP_COMMA:			"OP_COMMA",
-			Token.OP_SPECIFY:		"OP_SPECIFY"
-		}
-
-		return f"{REPR_KEY[self.tok_type]}({self.value})" if self.value != None else f"{REPR_KEY[self.tok_type]}"
+		return f"{Token.REPR_KEY[self.tok_type]}({self.value})" if self.value != None else f"{Token.REPR_KEY[self.tok_type]}"
 	
 
 	def matches(self, comp_tok_type) -> bool:
@@ -86,6 +91,131 @@ class Token:
 
 
 
+class TokenBuffer:
+	"""
+	A token stream stored column-wise instead of as one Token per token.
+
+	`types` holds the token type codes, `values` an index into `table` and
+	`offsets` the source offset each token starts at (-1 for the tokens the
+	lexer adds itself). Slot 0 of `table` is the None of valueless tokens,
+	and equal values share one slot. A type of -1 marks an invalid token.
+	"""
+
+	INVALID = -1
+	NO_VALUE = 0
+
+	def __init__(self) -> None:
+		self.types = array("i")
+		self.values = array("i")
+		self.offsets = array("q")
+		self.table = [None]
+
+
+	def __len__(self) -> int:
+		return len(self.types)
+
+
+	def __getitem__(self, index: int) -> Token:
+		tok_type = self.types[index]
+
+		if tok_type == TokenBuffer.INVALID:
+			return None
+
+		return Token(tok_type, self.table[self.values[index]])
+
+
+	def __iter__(self):
+		for index in range(len(self.types)):
+			yield self[index]
+
+
+	def intern(self, value) -> int:
+		self.table.append(value)
+		return len(self.table) - 1
+
+
+	def append(self, tok_type: int, value_index: int = NO_VALUE, offset: int = -1) -> None:
+		self.types.append(tok_type)
+		self.values.append(value_index)
+		self.offsets.append(offset)
+
+
+	@classmethod
+	def from_tokens(cls, tokens):
+		buffer = cls()
+		interned = {}
+
+		for token in tokens:
+			if token is None:
+				buffer.append(TokenBuffer.INVALID)
+			elif token.value is None:
+				buffer.append(token.tok_type)
+			else:
+				# keyed by type as well, so 1 and 1.0 stay apart
+				key = (type(token.value), token.value)
+
+				if key not in interned:
+					interned[key] = buffer.intern(token.value)
+
+				buffer.append(token.tok_type, interned[key])
+
+		return buffer
+
+
+	def cursor(self):
+		return TokenCursor(self)
+
+
+	def nbytes(self) -> int:
+		# the columns only, the value table is shared by every repeat of a value
+		return sum(column.itemsize * len(column) for column in (self.types, self.values, self.offsets))
+
+
+
+class TokenCursor:
+	"""
+	Reads a TokenBuffer one token at a time without making Token objects.
+
+	`next` returns the (type, value) pair of the following token. The pairs
+	are zipped straight out of the columns, so advancing runs no Python code.
+	"""
+
+	def __init__(self, buffer: TokenBuffer) -> None:
+		self.buffer = buffer
+
+		if TokenBuffer.INVALID in buffer.types:
+			index = buffer.types.index(TokenBuffer.INVALID)
+			raise DeltaSyntaxError(f"invalid token at offset {buffer.offsets[index]}")
+
+		pairs = zip(buffer.types, map(buffer.table.__getitem__, buffer.values))
+		self.next = chain(pairs, self.end()).__next__
+
+
+	@staticmethod
+	def end():
+		raise DeltaSyntaxError("unexpected end of input")
+		yield
+
+
+
+class TokenIterCursor:
+	# the same interface over any iterable of Token objects, such as DeltaLexer.stream
+	def __init__(self, tokens) -> None:
+		self.tokens = iter(tokens)
+
+
+	def next(self) -> tuple:
+		token = next(self.tokens, False)
+
+		if token is False:
+			raise DeltaSyntaxError("unexpected end of input")
+		elif token is None:
+			raise DeltaSyntaxError("invalid token")
+
+		return token.tok_type, token.value
+
+
+
 class DeltaLexer:
 	COMMENT_CHAR = "#"
 	OPEN_MULTILINE_COMMENT_CHAR = ">"
@@ -127,11 +257,199 @@ class DeltaLexer:
 		"then",
 		"return",
 		"let",
-		"func"
+		"func",
+		"import"
 	]
 	STRING_WRAP = "\""
 	ESCAPE_CHAR = "\\"
+	ESCAPE_SEQUENCES = {
+		"\"":	"\"",
+		"n":	"\n",
+		"b":	"\b",
+		"a":	"\a",
+		"t":	"\t",
+		"v":	"\v",
+		"r":	"\r",
+		"f":	"\f"
+	}
+
+	# one group per token kind, tried in this order at every position. characters
+	# none of them match are skipped, the same as in DeltaCharLexer.
+	PATTERN = re.compile(
+		r"(\#>(?:.*?<\#|.*)|\#[^\n\#]*[\n\#]?)"	# comments: `#>` until `<#`, `#` until a newline or `#`
+		r"|([a-z_][a-z_0-9]*)"						# identifiers and keywords
+		r"|([;+\-*/()=!<>^{}\[\],:]+)"				# operators, a whole run of them at once
+		r"|([0-9.]+)"								# numbers
+		r"|(\")((?:[^\"\\]|\\.?)*)\"?",			# strings, the quote and the contents
+		re.DOTALL
+	)
+	ESCAPE_PATTERN = re.compile(r"\\(.?)", re.DOTALL)
+
+
+	def __init__(self, source: str) -> None:
+		self.source = source
+
+
+	def parse(self) -> TokenBuffer:
+		"""
+		Lexes the whole source in one pass over a compiled master pattern.
+
+		The tokens go straight into a TokenBuffer. Every distinct identifier,
+		number and string is converted and stored in its table once, however
+		often it repeats.
+		"""
+		buffer = TokenBuffer()
+		types = buffer.types
+		values = buffer.values
+		offsets = buffer.offsets
+
+		buffer.append(Token.OP_SCOPE_BEGIN)
+
+		keywords = frozenset(DeltaLexer.KEYWORDS)
+		identifiers = {}
+		operators = {}
+		numbers = {}
+		strings = {}
+
+		for match in DeltaLexer.PATTERN.finditer(self.source):
+			_, identifier, operator, number, quote, string = match.groups()
+
+			if identifier:
+				if identifier not in identifiers:
+					identifiers[identifier] = buffer.intern(identifier)
+
+				types.append(Token.TYPE_KEYWORD if identifier in keywords else Token.TYPE_IDENTIFER)
+				values.append(identifiers[identifier])
+
+			elif operator:
+				if operator not in operators:
+					token = self.make_operator(operator)
+					operators[operator] = token.tok_type if token else TokenBuffer.INVALID
+
+				types.append(operators[operator])
+				values.append(TokenBuffer.NO_VALUE)
+
+			elif number:
+				if number not in numbers:
+					token = self.make_number(number)
+					numbers[number] = (token.tok_type, buffer.intern(token.value)) if token else (TokenBuffer.INVALID, TokenBuffer.NO_VALUE)
+
+				tok_type, value = numbers[number]
+				types.append(tok_type)
+				values.append(value)
+
+			elif quote:
+				if string not in strings:
+					strings[string] = buffer.intern(self.make_string(string).value)
+
+				types.append(Token.TYPE_STRING)
+				values.append(strings[string])
+
+			else:
+				continue
+
+			offsets.append(match.start())
+
+		buffer.append(Token.OP_SCOPE_END)
+		buffer.append(Token.OP_EOF)
+
+		return buffer
+
+
+	@staticmethod
+	def stream(file, chunk_size: int = 1 << 16):
+		"""
+		Lexes a file object lazily, yielding the same tokens `parse` would.
+
+		Only the unconsumed tail of the source is held in memory. A token that
+		reaches the end of the buffer might continue in the next chunk, so it
+		is only yielded once more of the file has been read, or it has ended.
+		"""
+		lexer = DeltaLexer("")
+		keywords = frozenset(DeltaLexer.KEYWORDS)
+		operators = {}
+
+		yield Token(Token.OP_SCOPE_BEGIN)
+
+		buffer = ""
+		pos = 0
+		eof = False
+
+		while True:
+			match = DeltaLexer.PATTERN.search(buffer, pos)
+
+			if match is None or (match.end() == len(buffer) and not eof):
+				if eof:
+					break
+
+				# keep the unfinished token, reading at least as much again so long tokens stay linear
+				buffer = buffer[match.start():] if match else ""
+				pos = 0
+
+				chunk = file.read(max(chunk_size, len(buffer)))
+				eof = not chunk
+				buffer += chunk
+				continue
+
+			pos = match.end()
+			_, identifier, operator, number, quote, string = match.groups()
+
+			if identifier:
+				yield Token(Token.TYPE_KEYWORD if identifier in keywords else Token.TYPE_IDENTIFER, identifier)
+
+			elif operator:
+				if operator not in operators:
+					operators[operator] = lexer.make_operator(operator)
+
+				yield operators[operator]
+
+			elif number:
+				yield lexer.make_number(number)
+
+			elif quote:
+				yield lexer.make_string(string)
+
+		yield Token(Token.OP_SCOPE_END)
+		yield Token(Token.OP_EOF)
+
+
+	def make_operator(self, operator: str) -> Token:
+		# the longest combo the run starts with wins, the rest of the run is dropped
+		if operator[:2] in DeltaLexer.OPERATORS_COMBOS:
+			return Token(DeltaLexer.OPERATORS_COMBOS[operator[:2]])
+		elif operator[:1] in DeltaLexer.OPERATORS_COMBOS:
+			return Token(DeltaLexer.OPERATORS_COMBOS[operator[:1]])
+		else:
+			# error message!
+			pass
+
+
+	def make_string(self, string: str) -> Token:
+		if DeltaLexer.ESCAPE_CHAR in string:
+			string = DeltaLexer.ESCAPE_PATTERN.sub(lambda match: DeltaLexer.ESCAPE_SEQUENCES[match.group(1)], string)
+
+		return Token(Token.TYPE_STRING, string)
+
+
+	def make_number(self, text: str) -> Token:
+		dot_count = text.count(".")
+
+		if not dot_count:
+			return Token(Token.TYPE_INT, int(text))
+		elif dot_count == 1:
+			return Token(Token.TYPE_FLOAT, float(text))
+		else:
+			# error message!
+			pass
+
+
+
+class DeltaCharLexer:
+	"""
+	The original character-at-a-time lexer.
 
+	Kept as the reference DeltaLexer is checked against, see benchmarks/lexer_bench.py.
+	"""
 
 	def __init__(self, source: str) -> None:
 		self.source = source
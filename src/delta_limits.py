@@ -0,0 +1,307 @@
+import math
+import sys
+
+from delta_types import DeltaNumber, DeltaString, DeltaArray, NULL
+from delta_lexer import Token
+from delta_parser import ReturnNode
+from delta_executor import DeltaExecutor
+from delta_errors import DeltaLimitError
+from delta_memo import MemoCache, MISS
+from delta_runtime import Frame, DeltaFunction, FUNCTIONS
+from delta_modules import define
+from delta_output import DeltaOutput
+
+
+# the operators the checks look for, read as globals on every BinOpNode
+PLUS = Token.OP_PLUS
+MULTIPLY = Token.OP_MULTIPLY
+POWER = Token.OP_POWER
+
+GROWING = frozenset([PLUS, MULTIPLY, POWER])
+
+# past this a float power is checked however small its base, 2 ^ (62 * 16) is still well within a float
+SMALL_EXPONENT = 16
+
+
+class DeltaLimits:
+	"""
+	Caps on what one run may do, for running scripts that aren't trusted.
+
+		steps			statements run, function bodies' included
+		string_length	characters in a string
+		array_length	elements an array has room for
+		integer_bits	bits in an integer
+		depth			Delta function calls in progress at once
+
+	None leaves a limit off. Going over any of them raises a
+	DeltaLimitError. Values are checked before they are made, so a power
+	too big to compute is refused instead of computed. A DeltaLimits also
+	counts the run's usage against it, so each run needs one of its own.
+	"""
+
+	UNLIMITED = sys.maxsize
+
+	def __init__(self, steps: int = None, string_length: int = None, array_length: int = None, integer_bits: int = None, depth: int = None) -> None:
+		self.max_steps = steps if steps is not None else DeltaLimits.UNLIMITED
+		self.max_string_length = string_length if string_length is not None else DeltaLimits.UNLIMITED
+		self.max_array_length = array_length if array_length is not None else DeltaLimits.UNLIMITED
+		self.max_integer_bits = integer_bits if integer_bits is not None else DeltaLimits.UNLIMITED
+		self.max_depth = depth if depth is not None else DeltaLimits.UNLIMITED
+
+		# operands under `small_integer` can be multiplied, or raised to `small_exponent`, without checking the result
+		small_bits = min(self.max_integer_bits // 2, 62)
+		self.small_integer = 1 << small_bits
+		self.small_exponent = min(SMALL_EXPONENT, self.max_integer_bits // max(small_bits, 1))
+
+		self.steps = 0
+		self.depth = 0
+
+
+	@classmethod
+	def untrusted(cls):
+		# generous for any reasonable script, small enough to keep a worker responsive
+		return cls(steps=50_000_000, string_length=16 << 20, array_length=16 << 20, integer_bits=1 << 20, depth=10_000)
+
+
+	def check_operation(self, method: str, left, right) -> None:
+		# only operations that can grow a value are checked, by how big the result would be
+		if method == "add":
+			if type(left) is DeltaString and type(right) is DeltaString:
+				self.check_string(left.length + right.length)
+
+		elif method == "multiply":
+			if type(left) is DeltaNumber and type(right) is DeltaNumber:
+				if type(left.value) is int and type(right.value) is int:
+					self.check_integer(left.value.bit_length() + right.value.bit_length())
+			elif integer_bits_bound(left) + integer_bits_bound(right) > self.max_integer_bits:
+				self.check_integer(integer_bits(left) + integer_bits(right))
+
+		elif method == "power":
+			exponent = integer_exponent(right)
+
+			if exponent > 0 and integer_bits_bound(left) * exponent > self.max_integer_bits and integer_magnitude(left) > 1:
+				self.check_integer(integer_bits(left) * exponent)
+
+			if makes_floats(left, right):
+				self.check_float_power(left, right)
+
+
+	def check_string(self, length: int) -> None:
+		if length > self.max_string_length:
+			raise DeltaLimitError(f"string of {length:,} characters is over the limit of {self.max_string_length:,}")
+
+
+	def check_integer(self, bits: int) -> None:
+		if bits > self.max_integer_bits:
+			raise DeltaLimitError(f"integer of about {bits:,} bits is over the limit of {self.max_integer_bits:,}")
+
+
+	def check_float_power(self, left, right) -> None:
+		# a float too big is an error in python rather than something slow, refused the same way all the same
+		bases = [abs(item) for item in numbers(left) if item]
+		# clamped, an int exponent too big for a float would overflow the estimate itself
+		exponents = [max(-sys.float_info.max, min(sys.float_info.max, item)) for item in numbers(right)]
+
+		if not bases or not exponents:
+			return
+
+		# the power is monotonic in each operand, so its largest result is at one of the corners
+		logs = (math.log2(min(bases)), math.log2(max(bases)))
+		bits = max(log * exponent for log in logs for exponent in (min(exponents), max(exponents)))
+
+		if bits >= sys.float_info.max_exp:
+			raise DeltaLimitError(f"number of about 2^{bits:,.0f} is too big for a float")
+
+
+	def check_array(self, length) -> None:
+		length = getattr(length, "value", None)
+
+		if type(length) is int and length > self.max_array_length:
+			raise DeltaLimitError(f"array of {length:,} elements is over the limit of {self.max_array_length:,}")
+
+
+
+def numbers(value) -> list:
+	# the python numbers behind a value
+	if isinstance(value, DeltaNumber):
+		return [value.value]
+
+	if isinstance(value, DeltaArray) and value.kind in DeltaArray.NUMERIC_KINDS:
+		return value.raw(list)
+
+	return []
+
+
+def integer_magnitude(value) -> int:
+	# the largest of the ints behind a value, the ones that can grow without bound
+	if isinstance(value, DeltaNumber):
+		return abs(value.value) if type(value.value) is int else 0
+
+	if isinstance(value, DeltaArray) and value.kind == DeltaArray.KIND_INT:
+		buffer = value.raw()
+		return max(map(abs, buffer), default=0) if isinstance(buffer, list) else DeltaArray.int_magnitude(buffer)
+
+	return 0
+
+
+def integer_bits(value) -> int:
+	return integer_magnitude(value).bit_length()
+
+
+def integer_bits_bound(value) -> int:
+	# at least integer_bits, numpy's ints are known to fit their dtype without looking at each one
+	if isinstance(value, DeltaArray) and value.kind == DeltaArray.KIND_INT and not isinstance(value.raw(), list):
+		return value.raw().dtype.itemsize * 8
+
+	return integer_bits(value)
+
+
+def integer_exponent(value) -> int:
+	if isinstance(value, DeltaNumber):
+		return value.value if type(value.value) is int else 0
+
+	if isinstance(value, DeltaArray) and value.kind == DeltaArray.KIND_INT:
+		return max(value.raw(list), default=0)
+
+	return 0
+
+
+def makes_floats(left, right) -> bool:
+	# whether a power gives floats: of a float, or to a negative exponent
+	if isinstance(left, DeltaNumber) and isinstance(right, DeltaNumber):
+		return type(left.value) is float or type(right.value) is float or right.value < 0
+
+	return DeltaArray.KIND_FLOAT in (getattr(left, "kind", None), getattr(right, "kind", None)) or any(item < 0 for item in numbers(right))
+
+
+
+class DeltaLimitedExecutor(DeltaExecutor):
+	"""
+	A DeltaExecutor that enforces a DeltaLimits.
+
+	The checks live in this subclass alone, so DeltaExecutor runs as fast
+	as ever when nothing is limited. Steps are counted per statement rather
+	than per node, a statement's own nodes are bounded by the source, and a
+	scope's statements are all counted as it is entered, with one check.
+	Only the operators that can grow a value are checked. Functions run
+	under the executor that defined them, so every executor of a run should
+	share one DeltaLimits.
+	"""
+
+	def __init__(self, program, resolution=None, memo: MemoCache = None, output: DeltaOutput = None, limits: DeltaLimits = None) -> None:
+		super().__init__(program, resolution, memo, output)
+		self.limits = limits if limits is not None else DeltaLimits.untrusted()
+
+
+	def spawn(self, module):
+		return DeltaLimitedExecutor(module.tree, module.resolution, self.memo, self.output, self.limits)
+
+
+	def execute_in(self, namespaces: tuple):
+		try:
+			return super().execute_in(namespaces)
+		except RecursionError:
+			# deeper than python's own stack allows, whatever the depth limit says
+			raise DeltaLimitError("nested too deeply to evaluate") from None
+		except OverflowError as error:
+			# whatever the checks didn't see coming, e.g. an int too big to divide into a float
+			raise DeltaLimitError(f"number too big: {error}") from None
+
+
+	def visit_ScopeNode(self, node, frame):
+		# a scope's statements are counted all at once, as it is entered, rather than one by one
+		limits = self.limits
+		limits.steps += len(node.statements)
+
+		if limits.steps > limits.max_steps:
+			raise DeltaLimitError(f"step limit of {limits.max_steps:,} exceeded")
+
+		for statement in node.statements:
+			res = self.visit(statement, frame)
+
+			if isinstance(statement, ReturnNode):
+				return res
+
+		return NULL
+
+
+	def visit_BinOpNode(self, node, frame):
+		left = self.visit(node.left_node, frame)
+		right = self.visit(node.right_node, frame)
+		op = node.op
+
+		# the operators that can make a value bigger than their operands, small numbers get past without a call
+		if op in GROWING:
+			limits = self.limits
+			small = limits.small_integer
+
+			if op == PLUS:
+				if type(left) is DeltaString and type(right) is DeltaString and left.length + right.length > limits.max_string_length:
+					limits.check_string(left.length + right.length)
+
+			elif type(left) is DeltaNumber and type(right) is DeltaNumber and abs(left.value) < small:
+				if op == MULTIPLY:
+					if not abs(right.value) < small:
+						limits.check_operation("multiply", left, right)
+
+				elif not 0 <= right.value <= limits.small_exponent:
+					limits.check_operation("power", left, right)
+
+			else:
+				limits.check_operation("multiply" if op == MULTIPLY else "power", left, right)
+
+		if frame.parent is None:
+			return getattr(left, DeltaExecutor.OP_METHODS[op])(right)
+
+		site = self.sites.get(node)
+
+		if site is not None and type(left) is site.left and type(right) is site.right:
+			site.hits += 1
+			return site.function(left, right)
+
+		return self.miss(node, left, right)
+
+
+	def visit_ArrayNode(self, node, frame):
+		temp = []
+		for value in node.value:
+			temp.append(self.visit(value, frame))
+
+		length = self.visit(node.length, frame)
+		self.limits.check_array(length)
+
+		return DeltaArray(length, temp)
+
+
+	def visit_FunctionCallNode(self, node, frame):
+		limits = self.limits
+		limits.depth += 1
+
+		try:
+			if limits.depth > limits.max_depth:
+				raise DeltaLimitError(f"recursion depth limit of {limits.max_depth:,} exceeded")
+
+			# DeltaExecutor.visit_FunctionCallNode, inline, a python call less on every Delta one
+			name = node.name
+			function = frame.load(self.addresses.get(node), name, FUNCTIONS)
+
+			if not isinstance(function, DeltaFunction):
+				function = define(function, name, frame.namespaces, self.make_function)
+
+			executor = function.executor
+			body = function.body
+			call_frame = Frame(executor.frame_sizes[body], function.frame, frame.namespaces)
+
+			if executor.memo is not None and body in executor.pure and executor.can_memoize(body, frame.namespaces):
+				key = MemoCache.key(body)
+				value = executor.memo.get(key)
+
+				if value is MISS:
+					value = executor.visit(body.scope, call_frame)
+					executor.memo.put(key, value)
+
+				return value
+
+			return executor.visit(body.scope, call_frame)
+		finally:
+			limits.depth -= 1
@@ -0,0 +1,65 @@
+from collections import OrderedDict
+from threading import Lock
+
+
+# what MemoCache.get gives for a key it doesn't hold, null is a valid result
+MISS = object()
+
+
+class MemoCache:
+	"""
+	A bounded LRU cache of pure function results, shared by every run it is given to.
+
+	Keys are made with `key`, from the function's body and the values it
+	was called with. Results stay valid across runs, a pure function can't
+	depend on anything a run changes.
+	"""
+
+	DEFAULT_SIZE = 1024
+
+	def __init__(self, size: int = DEFAULT_SIZE) -> None:
+		self.size = size
+		self.entries = OrderedDict()
+		self.lock = Lock()
+
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+
+	def __repr__(self) -> str:
+		return f"MemoCache({len(self.entries)}/{self.size}, hits={self.hits}, misses={self.misses}, evictions={self.evictions})"
+
+
+	@staticmethod
+	def key(body, arguments: tuple = ()):
+		# functions take no arguments yet, so the body alone decides the result
+		return (body, arguments)
+
+
+	def get(self, key):
+		with self.lock:
+			value = self.entries.get(key, MISS)
+
+			if value is MISS:
+				self.misses += 1
+			else:
+				self.hits += 1
+				self.entries.move_to_end(key)
+
+			return value
+
+
+	def put(self, key, value) -> None:
+		with self.lock:
+			self.entries[key] = value
+			self.entries.move_to_end(key)
+
+			while len(self.entries) > self.size:
+				self.entries.popitem(last=False)
+				self.evictions += 1
+
+
+	def clear(self) -> None:
+		with self.lock:
+			self.entries.clear()
@@ -0,0 +1,224 @@
+import hashlib
+import os
+import threading
+
+from delta_parser import FunctionDefineNode, ImportNode
+from delta_compiler import DeltaCode
+from delta_runtime import FUNCTIONS, MODULES
+from delta_errors import DeltaRuntimeError, DeltaImportError
+
+
+class ModuleFunction:
+	"""
+	Stands in for a function of a lazy module until it is first called.
+
+	It is bound in the importing run's functions by name, like the function
+	would be, and shared by every run. The engine calling it makes the real
+	DeltaFunction for its run from `node`, or `code` on the VM, and binds
+	that in its place.
+	"""
+
+	__slots__ = ("module", "node", "code")
+
+	def __init__(self, module, node: FunctionDefineNode, code) -> None:
+		self.module = module
+		self.node = node
+		self.code = code
+
+
+	def __repr__(self) -> str:
+		return f"ModuleFunction({self.module.name}.{self.node.name})"
+
+
+
+class DeltaModule:
+	"""
+	A .delta file compiled for importing, shared by every run that imports it.
+
+	A module whose top level does nothing but define functions and import
+	other modules is lazy: importing it binds a ModuleFunction for each of
+	its functions, and nothing of it runs until one of them is called.
+	`bindings` holds what such an import does, in order: a dict of stand-ins
+	to bind, or the name of a module to import. Any other module runs its
+	top level when it is imported.
+	"""
+
+	def __init__(self, name: str, path: str, source: str, digest: str) -> None:
+		# the compiler imports the engines, which import this module
+		from delta_program import DeltaProgram
+
+		self.name = name
+		self.path = path
+		self.digest = digest
+
+		self.tree, self.optimization, self.resolution, self.code = DeltaProgram.compile(source)
+
+		statements = self.tree.statements
+		self.lazy = all(isinstance(statement, (FunctionDefineNode, ImportNode)) for statement in statements)
+		self.bindings = []
+
+		if self.lazy:
+			# the function code objects are the top level's only ones, in the order they are defined
+			codes = iter(constant for constant in self.code.constants if isinstance(constant, DeltaCode))
+
+			for statement in statements:
+				if isinstance(statement, ImportNode):
+					self.bindings.append(statement.name)
+					continue
+
+				if not self.bindings or not isinstance(self.bindings[-1], dict):
+					self.bindings.append({})
+
+				self.bindings[-1][statement.name] = ModuleFunction(self, statement, next(codes))
+
+
+	def __repr__(self) -> str:
+		return f"DeltaModule({self.name}, {self.path})"
+
+
+
+class ModuleCache:
+	"""
+	Compiled modules by file, kept for the life of the process.
+
+	`load` finds `<name>.delta` in the directories of `path`, in order, and
+	compiles it the first time. After that, each load only stats the file:
+	while its modification time and size are the same, the module is
+	reused as it is. When they change, the file is read and hashed, and
+	compiled again only if its contents are different. Safe to use from
+	several threads.
+	"""
+
+	EXTENSION = ".delta"
+
+	def __init__(self, path: list = None) -> None:
+		self.path = list(path) if path is not None else ModuleCache.default_path()
+		self.entries = {}	# absolute path -> (modification time, size, DeltaModule)
+		self.lock = threading.Lock()
+
+		self.compiled = 0
+		self.reused = 0
+
+
+	@staticmethod
+	def default_path() -> list:
+		# the working directory, then DELTA_PATH's directories
+		extra = os.environ.get("DELTA_PATH", "")
+		return [os.curdir] + [directory for directory in extra.split(os.pathsep) if directory]
+
+
+	def find(self, name: str) -> str:
+		for directory in self.path:
+			path = os.path.join(directory, name + ModuleCache.EXTENSION)
+
+			if os.path.isfile(path):
+				return os.path.abspath(path)
+
+		raise DeltaImportError(f"no module named '{name}' in {os.pathsep.join(self.path)}")
+
+
+	def load(self, name: str) -> DeltaModule:
+		path = self.find(name)
+		stat = os.stat(path)
+
+		with self.lock:
+			entry = self.entries.get(path)
+
+			if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+				self.reused += 1
+				return entry[2]
+
+		with open(path, "rb") as file:
+			data = file.read()
+
+		digest = hashlib.sha256(data).hexdigest()
+
+		if entry is not None and entry[2].digest == digest:
+			# touched, not changed
+			module = entry[2]
+			self.reused += 1
+		else:
+			module = DeltaModule(name, path, data.decode(), digest)
+			self.compiled += 1
+
+		with self.lock:
+			self.entries[path] = (stat.st_mtime_ns, stat.st_size, module)
+
+		return module
+
+
+	def clear(self) -> None:
+		with self.lock:
+			self.entries.clear()
+
+
+
+# the process' module cache, every engine imports through it
+MODULE_CACHE = ModuleCache()
+
+
+def import_module(name: str, namespaces: tuple, run) -> None:
+	"""
+	Imports module `name` into the run `namespaces` belong to, once per run.
+
+	`run(module)` runs a module's top level, with the importing engine. A
+	lazy module's functions are bound as ModuleFunctions instead, see
+	define.
+	"""
+	imported = namespaces[MODULES]
+
+	for module in import_steps(name, namespaces):
+		try:
+			run(module)
+		except BaseException:
+			# not imported after all, a later import tries again
+			del imported[module.path]
+			raise
+
+
+def import_steps(name: str, namespaces: tuple):
+	"""
+	Does what importing module `name` does, but yields each module whose
+	top level has to run instead of running it, in order. The caller runs
+	it before taking the next one, for an engine that can't run a module
+	on the spot.
+	"""
+	module = MODULE_CACHE.load(name)
+	imported = namespaces[MODULES]
+
+	if module.path in imported:
+		# already imported by this run, or being imported: a cycle
+		return
+
+	# filled in with whatever the engine keeps for the module, see define
+	imported[module.path] = None
+
+	if not module.lazy:
+		yield module
+		return
+
+	for binding in module.bindings:
+		if isinstance(binding, str):
+			yield from import_steps(binding, namespaces)
+		else:
+			namespaces[FUNCTIONS].update(binding)
+
+
+def define(stand_in, name: str, namespaces: tuple, make):
+	"""
+	Replaces a ModuleFunction the run is calling by the real function, and
+	returns that. Raises the usual error for anything else being called.
+
+	`make(stand_in, state, namespaces)` builds the function for the engine.
+	`state` is what the engine keeps for the module in this run, None the
+	first time one of its functions is made; `make` returns the function
+	and the state to keep from then on.
+	"""
+	if not isinstance(stand_in, ModuleFunction):
+		raise DeltaRuntimeError(f"function '{name}' is not defined")
+
+	imported = namespaces[MODULES]
+	function, imported[stand_in.module.path] = make(stand_in, imported.get(stand_in.module.path), namespaces)
+
+	namespaces[FUNCTIONS][stand_in.node.name] = function
+	return function
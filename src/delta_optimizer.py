@@ -0,0 +1,321 @@
+from delta_lexer import Token
+from delta_parser import *
+from delta_executor import DeltaExecutor
+from delta_limits import DeltaLimits
+from delta_errors import DeltaLimitError
+from delta_types import DeltaNumber, DeltaBool, DeltaString, make_number, make_bool
+
+
+LITERAL_NODES = (NumberNode, BooleanNode, StringNode)
+
+
+def count_nodes(node) -> int:
+	if not isinstance(node, Node):
+		return 0
+
+	count = 1
+
+	for name in type(node).__slots__:
+		value = getattr(node, name)
+
+		if isinstance(value, tuple):
+			count += sum(count_nodes(child) for child in value)
+		else:
+			count += count_nodes(value)
+
+	return count
+
+
+def count_node_types(node, counts: dict = None) -> dict:
+	# node class name -> how many of them are in the tree
+	counts = {} if counts is None else counts
+
+	if not isinstance(node, Node):
+		return counts
+
+	name = type(node).__name__
+	counts[name] = counts.get(name, 0) + 1
+
+	for slot in type(node).__slots__:
+		value = getattr(node, slot)
+
+		for child in (value if isinstance(value, tuple) else (value,)):
+			count_node_types(child, counts)
+
+	return counts
+
+
+def declares(node) -> bool:
+	# whether moving `node` out of its scope could change which scope a binding lands in
+	if isinstance(node, (VarAssignNode, FunctionDefineNode)):
+		return True
+
+	if not isinstance(node, Node):
+		return False
+
+	for name in type(node).__slots__:
+		value = getattr(node, name)
+
+		if isinstance(value, ScopeNode):
+			continue
+
+		if any(declares(child) for child in (value if isinstance(value, tuple) else (value,))):
+			return True
+
+	return False
+
+
+
+class OptimizationReport:
+	def __init__(self) -> None:
+		self.nodes_before = 0
+		self.nodes_after = 0
+
+		self.folded = 0		# BinOpNode and UnaryOpNode subtrees replaced by a literal
+		self.branches = 0	# IfNodes with a constant condition
+		self.scopes = 0		# `{ return x; }` scopes replaced by x, and nested scopes inlined
+		self.dead = 0		# statements dropped after a return, or with no effect
+
+
+	@property
+	def removed(self) -> int:
+		return self.nodes_before - self.nodes_after
+
+
+	def __repr__(self) -> str:
+		return (f"OptimizationReport(removed={self.removed} of {self.nodes_before}, folded={self.folded}, "
+			f"branches={self.branches}, scopes={self.scopes}, dead={self.dead})")
+
+
+
+class DeltaOptimizer:
+	"""
+	Rewrites a parsed program into a smaller one that runs the same.
+
+	Operators on literals are folded into a literal, `if`s whose condition is
+	a constant are replaced by their action scope or dropped, `{ return x; }`
+	scopes become `x`, nested scopes that bind nothing are inlined, and
+	statements that can never run or have no effect are removed. Function
+	bodies and the program scope stay ScopeNodes, the engines rely on it.
+	Folding uses the value classes themselves, so an operation that would
+	fail or give no value at runtime is left in place to do so there.
+	"""
+
+	# results bigger than this are left to be computed when the program runs, where limits apply
+	FOLD_LIMITS = DeltaLimits(string_length=1 << 12, integer_bits=1 << 12)
+
+	def __init__(self) -> None:
+		self.report = OptimizationReport()
+
+
+	def optimize(self, program: ScopeNode) -> ScopeNode:
+		self.report.nodes_before += count_nodes(program)
+		program = ScopeNode(self.optimize_statements(program.statements))
+		self.report.nodes_after += count_nodes(program)
+
+		return program
+
+
+	def optimize_statement(self, statement: Node) -> tuple:
+		"""
+		Optimizes a single statement of the program scope, for streaming.
+		Returns the statements to run in its place, which may be none.
+		"""
+		self.report.nodes_before += count_nodes(statement)
+		statements = self.optimize_statements((statement,))
+		self.report.nodes_after += sum(count_nodes(statement) for statement in statements)
+
+		return statements
+
+
+	def visit(self, node):
+		if node is None:
+			return None
+
+		method_name = f"optimize_{(type(node)).__name__}"
+		method = getattr(self, method_name)
+		return method(node)
+
+
+	#####
+
+
+	def optimize_statements(self, statements: tuple) -> tuple:
+		result = []
+
+		for index, statement in enumerate(statements):
+			if isinstance(statement, ReturnNode):
+				# scopes never loop, so nothing after a return can run
+				result.append(self.visit(statement))
+				self.report.dead += len(statements) - index - 1
+				break
+
+			statement = self.visit_statement(statement)
+
+			if isinstance(statement, ScopeNode) and self.is_inlinable(statement):
+				# a nested scope that binds nothing and returns nothing is just its statements
+				result.extend(statement.statements)
+				self.report.scopes += 1
+
+			elif statement is not None:
+				result.append(statement)
+
+		return tuple(result)
+
+
+	def is_inlinable(self, scope: ScopeNode) -> bool:
+		return not any(isinstance(statement, ReturnNode) or declares(statement) for statement in scope.statements)
+
+
+	def visit_statement(self, statement: Node):
+		# a statement's value is thrown away, so a literal or a never taken `if` can go
+		if isinstance(statement, IfNode):
+			condition = self.visit(statement.eval_scope)
+
+			if isinstance(condition, LITERAL_NODES):
+				self.report.branches += 1
+
+				if condition.value == True:
+					return self.visit(statement.action_scope)
+
+				return None
+
+			return IfNode(condition, self.visit(statement.action_scope))
+
+		statement = self.visit(statement)
+
+		if isinstance(statement, LITERAL_NODES) or (isinstance(statement, ScopeNode) and not statement.statements):
+			self.report.dead += 1
+			return None
+
+		return statement
+
+
+	def optimize_NumberNode(self, node):
+		return node
+
+
+	def optimize_BooleanNode(self, node):
+		return node
+
+
+	def optimize_StringNode(self, node):
+		return node
+
+
+	def optimize_ArrayNode(self, node):
+		return ArrayNode(self.visit(node.length), tuple(self.visit(value) for value in node.value))
+
+
+	def optimize_FunctionCallNode(self, node):
+		return node
+
+
+	def optimize_FunctionDefineNode(self, node):
+		return FunctionDefineNode(node.name, ScopeNode(self.optimize_statements(node.scope.statements)))
+
+
+	def optimize_ImportNode(self, node):
+		return node
+
+
+	def optimize_VarAccessNode(self, node):
+		return node
+
+
+	def optimize_VarAssignNode(self, node):
+		return VarAssignNode(node.name, self.visit(node.node))
+
+
+	def optimize_PrintNode(self, node):
+		return PrintNode(self.visit(node.node))
+
+
+	def optimize_ScopeNode(self, node):
+		statements = self.optimize_statements(node.statements)
+
+		if len(statements) == 1 and isinstance(statements[0], ReturnNode) and not declares(statements[0].node):
+			self.report.scopes += 1
+			return statements[0].node
+
+		return ScopeNode(statements)
+
+
+	def optimize_ReturnNode(self, node):
+		return ReturnNode(self.visit(node.node))
+
+
+	def optimize_IfNode(self, node):
+		condition = self.visit(node.eval_scope)
+
+		if isinstance(condition, LITERAL_NODES) and not condition.value == True:
+			self.report.branches += 1
+			return BooleanNode(False)
+
+		return IfNode(condition, self.visit(node.action_scope))
+
+
+	def optimize_BinOpNode(self, node):
+		left = self.visit(node.left_node)
+		right = self.visit(node.right_node)
+
+		if isinstance(left, LITERAL_NODES) and isinstance(right, LITERAL_NODES):
+			name = DeltaExecutor.OP_METHODS[node.op]
+			method = getattr(self.constant(left), name, None)
+
+			if method is not None:
+				folded = self.fold(lambda: self.checked(name, method, self.constant(left), self.constant(right)))
+
+				if folded is not None:
+					return folded
+
+		return BinOpNode(left, node.op, right)
+
+
+	def optimize_UnaryOpNode(self, node):
+		operand = self.visit(node.node)
+
+		if isinstance(operand, NumberNode):
+			value = self.constant(operand)
+			folded = self.fold(value.abs if node.op == Token.OP_PLUS else value.neg)
+
+			if folded is not None:
+				return folded
+
+		return UnaryOpNode(node.op, operand)
+
+
+	#####
+
+
+	def constant(self, node):
+		if isinstance(node, NumberNode):
+			return make_number(node.value)
+		elif isinstance(node, BooleanNode):
+			return make_bool(node.value)
+
+		return DeltaString(node.value)
+
+
+	def checked(self, name: str, method, left, right):
+		DeltaOptimizer.FOLD_LIMITS.check_operation(name, left, right)
+		return method(right)
+
+
+	def fold(self, operation):
+		try:
+			value = operation()
+		except (ArithmeticError, ValueError, DeltaLimitError):
+			return None
+
+		if isinstance(value, DeltaNumber):
+			node = NumberNode(value.value)
+		elif isinstance(value, DeltaBool):
+			node = BooleanNode(value.value)
+		elif isinstance(value, DeltaString):
+			node = StringNode(value.value)
+		else:
+			return None
+
+		self.report.folded += 1
+		return node
@@ -0,0 +1,149 @@
+import sys
+
+
+class DeltaOutput:
+	"""
+	Where `print` statements write to.
+
+	Printed lines are buffered and handed to `write` joined together, once
+	`buffer_size` characters have built up and whenever the flush policy
+	says so:
+
+		FLUSH_LINE	after every line, like a terminal
+		FLUSH_RUN	when a run finishes, the default
+		FLUSH_FULL	only when the buffer is full or `flush` is called
+
+	An output is meant for one run at a time, runs going on at once should
+	each be given their own.
+	"""
+
+	FLUSH_LINE = "line"
+	FLUSH_RUN = "run"
+	FLUSH_FULL = "full"
+
+	DEFAULT_BUFFER_SIZE = 1 << 16
+
+	def __init__(self, buffer_size: int = DEFAULT_BUFFER_SIZE, flush: str = FLUSH_RUN) -> None:
+		if flush not in (DeltaOutput.FLUSH_LINE, DeltaOutput.FLUSH_RUN, DeltaOutput.FLUSH_FULL):
+			raise ValueError(f"unknown flush policy '{flush}'")
+
+		self.policy = flush
+		self.buffer_size = buffer_size if flush != DeltaOutput.FLUSH_LINE else 0
+
+		self.buffer = []
+		self.pending = 0	# characters in the buffer
+
+		self.lines = 0
+		self.writes = 0
+
+
+	def print(self, value) -> None:
+		text = f"{value}\n"
+
+		self.buffer.append(text)
+		self.pending += len(text)
+		self.lines += 1
+
+		if self.pending >= self.buffer_size:
+			self.flush()
+
+
+	def flush(self) -> None:
+		if self.buffer:
+			text = "".join(self.buffer)
+
+			self.buffer.clear()
+			self.pending = 0
+
+			self.write(text)
+			self.writes += 1
+
+		self.flush_stream()
+
+
+	def finish(self) -> None:
+		# called by the engines when a run ends, however it ends
+		if self.policy != DeltaOutput.FLUSH_FULL:
+			self.flush()
+
+
+	def close(self) -> None:
+		self.flush()
+
+
+	def write(self, text: str) -> None:
+		raise NotImplementedError
+
+
+	def flush_stream(self) -> None:
+		pass
+
+
+
+class TextOutput(DeltaOutput):
+	"""
+	Writes to a text stream, sys.stdout as it is at the time of writing if none is given.
+	"""
+
+	def __init__(self, stream=None, buffer_size: int = DeltaOutput.DEFAULT_BUFFER_SIZE, flush: str = DeltaOutput.FLUSH_RUN) -> None:
+		super().__init__(buffer_size, flush)
+		self.stream = stream
+
+
+	def write(self, text: str) -> None:
+		(self.stream or sys.stdout).write(text)
+
+
+	def flush_stream(self) -> None:
+		(self.stream or sys.stdout).flush()
+
+
+
+class BinaryOutput(DeltaOutput):
+	"""
+	Encodes the text itself and writes it to a binary stream, a file opened
+	with "wb", a socket's makefile("wb") or sys.stdout.buffer.
+	"""
+
+	def __init__(self, stream, encoding: str = "utf-8", buffer_size: int = DeltaOutput.DEFAULT_BUFFER_SIZE, flush: str = DeltaOutput.FLUSH_RUN) -> None:
+		super().__init__(buffer_size, flush)
+		self.stream = stream
+		self.encoding = encoding
+
+
+	def write(self, text: str) -> None:
+		self.stream.write(text.encode(self.encoding))
+
+
+	def flush_stream(self) -> None:
+		self.stream.flush()
+
+
+
+class CaptureOutput(DeltaOutput):
+	"""
+	Keeps everything printed in memory, for embedding and for checking what a script printed.
+	"""
+
+	def __init__(self) -> None:
+		# nothing is gained by flushing a list into a list before it's read
+		super().__init__(sys.maxsize, DeltaOutput.FLUSH_FULL)
+		self.chunks = []
+
+
+	def write(self, text: str) -> None:
+		self.chunks.append(text)
+
+
+	def getvalue(self) -> str:
+		self.flush()
+		return "".join(self.chunks)
+
+
+	def getlines(self) -> list:
+		return self.getvalue().splitlines()
+
+
+	def clear(self) -> None:
+		self.flush()
+		self.chunks.clear()
@@ -1,141 +1,126 @@
-from os import stat
-from delta_lexer import Token
+from delta_lexer import Token, TokenBuffer, TokenCursor, TokenIterCursor
 from delta_types import DeltaNone, DeltaNumber
+from delta_errors import DeltaSyntaxError
 
 
 class Node:
-	pass
+	# every node is slotted, a parsed program is kept around for as long as it may run
+	__slots__ = ()
 
 
 class NumberNode(Node):
-	def __init__(self, tok) -> None:
-		self.tok = tok
+	__slots__ = ("value",)
+
+	def __init__(self, value) -> None:
+		self.value = value
 	
 
 	def __repr__(self) -> str:
-		return f"{self.tok.value}"
+		return f"{self.value}"
 
 
 class BooleanNode(Node):
-	def __init__(self, tok) -> None:
-		self.tok = tok
+	__slots__ = ("value",)
+
+	def __init__(self, value: bool) -> None:
+		self.value = value
 	
 
 	def __repr__(self) -> str:
-		return f"{self.tok}"
+		return str(self.value).lower()
 
 
 class StringNode(Node):
-	def __init__(self, tok) -> None:
-		self.tok = tok
+	__slots__ = ("value",)
+
+	def __init__(self, value: str) -> None:
+		self.value = value
 	
 
 	def __repr__(self) -> str:
-		return f"\"{self.tok.value}\""
+		return f"\"{self.value}\""
 
 
 class ArrayNode(Node):
+	__slots__ = ("length", "value")
+
 	def __init__(self, length, value) -> None:
 		self.length = length
 		self.value = value
 	
 
 	def __repr__(self) -> str:
-		return f"{self.value}"
+		return f"{list(self.value)}"
 
 
 class FunctionDefineNode(Node):
-	def __init__(self, name_tok, scope) -> None:
-		self.name_tok = name_tok
+	__slots__ = ("name", "scope")
+
+	def __init__(self, name: str, scope) -> None:
+		self.name = name
 		self.scope = scope
 	
 
 	def __repr__(self) -> str:
-		return f"FunctionDefine({self.name_tok.value})"
+		return f"FunctionDefine({self.name})"
 
 
 class FunctionCallNode(Node):
-	def __init__(self, name_tok) -> None:
-		self.name_tok = name_tok
+	__slots__ = ("name",)
+
+	def __init__(self, name: str) -> None:
+		self.name = name
 	
 
 	def __repr__(self) -> str:
-		return f"FunctionCall({self.name_tok.value})"
+		return f"FunctionCall({self.name})"
 
 
 class VarAccessNode(Node):
-	def __init__(self, name_tok) -> None:
-		self.name_tok = name_tok
+	__slots__ = ("name",)
+
+	def __init__(self, name: str) -> None:
+		self.name = name
 	
 
 	def __repr__(self) -> str:
-		return f"VariableAccess({self.name_tok.value})"
+		return f"VariableAccess({self.name})"
 
 
 class VarAssignNode(Node):
-	def __init__(self, name_tok, node) -> None:
-		self.name_tok = name_tok
+	__slots__ = ("name", "node")
+
+	def __init__(self, name: str, node) -> None:
+		self.name = name
 		self.node = node
 	
 
 	def __repr__(self) -> str:
-		return f"VariableAssign({self.name_tok.value} = {self.node})"
+		return f"VariableAssign({self.name} = {self.node})"
 
 
 class ScopeNode(Node):
-	def __init__(self, statements) -> None:
-		self.statements = statements
+	__slots__ = ("statements",)
 
-		# we use these for the executor
-		self.variables = {}
-		self.functions = {}
-		self.parent = None
+	def __init__(self, statements: tuple) -> None:
+		self.statements = statements
 	
 
 	def __repr__(self) -> str:
-		return f"Scope{self.statements}"
-
-	
-	# also used for the executor
-	def get_owner(self, name, meta_var_name):
-		meta_var = getattr(self, meta_var_name)
-
-		if name in meta_var:
-			return self
-
-		elif self.parent:
-			return self.parent.get_owner(name, meta_var_name)
-		
-		else:
-			return None
-
-	
-	def get(self, name, meta_var_name):
-		owner = self.get_owner(name, meta_var_name)
-
-		if owner:
-			return getattr(owner, meta_var_name)[name]
-		else:
-			return DeltaNone()
-	
-
-	def set(self, name, value, meta_var_name):
-		owner = self.get_owner(name, meta_var_name)
-
-		if owner:
-			meta_var = getattr(owner, meta_var_name)
-		else:
-			meta_var = getattr(self, meta_var_name)
-		meta_var[name] = value
+		return f"Scope{list(self.statements)}"
 
 
 class IfNode(Node):
+	__slots__ = ("eval_scope", "action_scope")
+
 	def __init__(self, eval_scope, action_scope) -> None:
 		self.eval_scope = eval_scope
 		self.action_scope = action_scope
 
 
 class PrintNode(Node):
+	__slots__ = ("node",)
+
 	def __init__(self, node) -> None:
 		self.node = node
 	
@@ -145,195 +130,282 @@ class PrintNode(Node):
 
 
 class ReturnNode(Node):
+	__slots__ = ("node",)
+
 	def __init__(self, node) -> None:
 		self.node = node
 	
 
 	def __repr__(self) -> str:
-		return f"Print({self.node})"
+		return f"Return({self.node})"
+
+
+class ImportNode(Node):
+	__slots__ = ("name",)
+
+	def __init__(self, name: str) -> None:
+		self.name = name
+	
+
+	def __repr__(self) -> str:
+		return f"Import({self.name})"
 
 
 class BinOpNode(Node):
-	def __init__(self, left_node, op_tok, right_node) -> None:
+	__slots__ = ("left_node", "op", "right_node")
+
+	def __init__(self, left_node, op: int, right_node) -> None:
 		self.left_node = left_node
-		self.op_tok = op_tok
+		self.op = op
 		self.right_node = right_node
 
 	
 	def __repr__(self) -> str:
-		return f"({self.left_node} {self.op_tok} {self.right_node})"
+		return f"({self.left_node} {Token.REPR_KEY[self.op]} {self.right_node})"
 
 
 class UnaryOpNode(Node):
-	def __init__(self, op_tok, node) -> None:
-		self.op_tok = op_tok
+	__slots__ = ("op", "node")
+
+	def __init__(self, op: int, node) -> None:
+		self.op = op
 		self.node = node
 	
 
 	def __repr__(self) -> str:
-		return f"({self.op_tok} {self.node})"
+		return f"({Token.REPR_KEY[self.op]} {self.node})"
 
 
 
 class DeltaParser:
-	def __init__(self, tokens: list) -> None:
-		self.tokens = tokens
+	COMP_OPS = frozenset([Token.OP_EQUALS, Token.OP_NEQUALS, Token.OP_LESSER, Token.OP_GREATER, Token.OP_LEQUALS, Token.OP_GEQUALS])
+	ARITH_OPS = frozenset([Token.OP_PLUS, Token.OP_MINUS])
+	TERM_OPS = frozenset([Token.OP_MULTIPLY, Token.OP_DIVIDE])
+	POWER_OPS = frozenset([Token.OP_POWER])
+	SIGN_OPS = ARITH_OPS
+	NUMBER_TYPES = frozenset([Token.TYPE_INT, Token.TYPE_FLOAT])
+
+	def __init__(self, tokens) -> None:
+		# a TokenBuffer is read in place, any other iterable of Tokens works too.
+		# the parser never looks further than the current token.
+		if isinstance(tokens, TokenBuffer):
+			self.cursor = tokens.cursor()
+		elif isinstance(tokens, TokenCursor):
+			self.cursor = tokens
+		else:
+			self.cursor = TokenIterCursor(tokens)
 
-		self.index = -1
-		self.token = None
+		self.next_token = self.cursor.next
+
+		self.tok_type = None
+		self.tok_value = None
 
 		self.advance()
 	
 
 	def advance(self) -> None:
-		self.index += 1
-		self.token = self.tokens[self.index] if self.index < len(self.tokens) else None
+		self.tok_type, self.tok_value = self.next_token()
+
+
+	def take(self) -> Token:
+		# the current token as an object, for error messages
+		return Token(self.tok_type, self.tok_value)
 	
 
 	def parse(self) -> Node:
 		expr = self.make_expression()
 		return expr
+
+
+	def parse_statements(self):
+		"""
+		Yields the statements of the top-level scope one at a time.
+
+		Each statement is yielded as soon as it is complete, before any of the
+		statements after it are parsed, so it can be run and let go of first.
+		A statement that doesn't parse raises a DeltaSyntaxError, the ones
+		before it having already been yielded.
+		"""
+		if self.tok_type != Token.OP_SCOPE_BEGIN:
+			raise DeltaSyntaxError(f"expected the script to start with OP_SCOPE_BEGIN, not {Token.REPR_KEY.get(self.tok_type, 'INVALID')}")
+
+		self.advance()
+		count = 0
+
+		while True:
+			try:
+				expr = self.make_expression()
+			except RecursionError:
+				raise DeltaSyntaxError("a statement nests too deeply to parse") from None
+
+			if not expr:
+				# an empty script or a `;` before the end, anything else is a statement that didn't parse
+				if self.tok_type == Token.OP_SCOPE_END:
+					break
+
+				raise DeltaSyntaxError(f"statement {count + 1} doesn't parse, it stopped at {Token.REPR_KEY.get(self.tok_type, 'INVALID')}")
+
+			count += 1
+
+			yield expr
+
+			if self.tok_type == Token.OP_EOS:
+				self.advance()
+
+			elif self.tok_type == Token.OP_SCOPE_END:
+				break
 	
 
 	#####
 		
 
 	def make_expression(self) -> Node:
-		if self.token.matches(Token.TYPE_KEYWORD):
-			if self.token.value == "print":
+		if self.tok_type == Token.TYPE_KEYWORD:
+			if self.tok_value == "print":
 				self.advance()
 				return PrintNode(self.make_expression())
 			
-			elif self.token.value == "return":
+			elif self.tok_value == "return":
 				self.advance()
 				return ReturnNode(self.make_expression())
 			
-			elif self.token.value == "let":
+			elif self.tok_value == "let":
 				self.advance()
 
-				if self.token.matches(Token.TYPE_IDENTIFER):
-					var_name = self.token
+				if self.tok_type == Token.TYPE_IDENTIFER:
+					var_name = self.tok_value
 					self.advance()
 
-					if self.token.matches(Token.OP_ASSIGN):
+					if self.tok_type == Token.OP_ASSIGN:
 						self.advance()
 
 						return VarAssignNode(var_name, self.make_expression())
 			
-			elif self.token.value == "func":
+			elif self.tok_value == "func":
 				self.advance()
 
-				if self.token.matches(Token.TYPE_IDENTIFER):
-					func_name = self.token
+				if self.tok_type == Token.TYPE_IDENTIFER:
+					func_name = self.tok_value
 					self.advance()
 
-					if self.token.matches(Token.OP_LBRACKET):
+					if self.tok_type == Token.OP_LBRACKET:
 						self.advance()
 
 						# argument parsing later!
 
-						if self.token.matches(Token.OP_RBRACKET):
+						if self.tok_type == Token.OP_RBRACKET:
 							self.advance()
 
 							return FunctionDefineNode(func_name, self.make_scope())
+
+			elif self.tok_value == "import":
+				self.advance()
+
+				if self.tok_type == Token.TYPE_IDENTIFER:
+					module_name = self.tok_value
+					self.advance()
+
+					return ImportNode(module_name)
 		
 		return self.make_comp_expr()
 
 
 	def make_comp_expr(self) -> Node:
-		return self.binary_op(self.make_arith_expression, [Token.OP_EQUALS, Token.OP_NEQUALS, Token.OP_LESSER, Token.OP_GREATER, Token.OP_LEQUALS, Token.OP_GEQUALS])
+		return self.binary_op(self.make_arith_expression, DeltaParser.COMP_OPS)
 
 
 	def make_arith_expression(self) -> Node:
-		return self.binary_op(self.make_term, [Token.OP_PLUS, Token.OP_MINUS])
+		return self.binary_op(self.make_term, DeltaParser.ARITH_OPS)
 	
 
 	def make_term(self) -> Node:
-		return self.binary_op(self.make_factor, [Token.OP_MULTIPLY, Token.OP_DIVIDE])
+		return self.binary_op(self.make_factor, DeltaParser.TERM_OPS)
 
 
 	def make_factor(self) -> Node:
-		token = self.token
-
-		if token.matches_any([Token.OP_PLUS, Token.OP_MINUS]):
+		if self.tok_type in DeltaParser.SIGN_OPS:
+			op = self.tok_type
 			self.advance()
 
 			factor = self.make_factor()
 
-			return UnaryOpNode(token, factor)
+			return UnaryOpNode(op, factor)
 		
 
 		return self.make_power()
 	
 
 	def make_power(self) -> Node:
-		return self.binary_op(self.make_atom, [Token.OP_POWER], self.make_factor)
+		return self.binary_op(self.make_atom, DeltaParser.POWER_OPS, self.make_factor)
 	
 
 	def make_atom(self) -> Node:
-		token = self.token
+		tok_type = self.tok_type
 
-		if token.matches_any([Token.TYPE_INT, Token.TYPE_FLOAT]):
+		if tok_type in DeltaParser.NUMBER_TYPES:
+			value = self.tok_value
 			self.advance()
 
-			return NumberNode(token)
+			return NumberNode(value)
 		
 
-		elif token.matches(Token.TYPE_STRING):
+		elif tok_type == Token.TYPE_STRING:
+			value = self.tok_value
 			self.advance()
 
-			return StringNode(token)
+			return StringNode(value)
 		
 
-		elif token.matches(Token.TYPE_IDENTIFER):
+		elif tok_type == Token.TYPE_IDENTIFER:
+			name = self.tok_value
 			self.advance()
 
-			if self.token.matches(Token.OP_LBRACKET):
+			if self.tok_type == Token.OP_LBRACKET:
 				self.advance()
 
 				# argument parsing
 
-				if self.token.matches(Token.OP_RBRACKET):
+				if self.tok_type == Token.OP_RBRACKET:
 					self.advance()
 
-					return FunctionCallNode(token)
+					return FunctionCallNode(name)
 
 			else:
-				return VarAccessNode(token)
+				return VarAccessNode(name)
 		
 
-		elif token.matches(Token.TYPE_KEYWORD):
-			if token.value == "true":
+		elif tok_type == Token.TYPE_KEYWORD:
+			if self.tok_value == "true":
 				self.advance()
-				return BooleanNode(token)
+				return BooleanNode(True)
 
-			elif token.value == "false":
+			elif self.tok_value == "false":
 				self.advance()
-				return BooleanNode(token)
+				return BooleanNode(False)
 			
-			elif token.value == "if":
+			elif self.tok_value == "if":
 				self.advance()
 
 				eval_scope = self.make_expression()
 
-				if self.token.matches(Token.TYPE_KEYWORD) and self.token.value == "then":
+				if self.tok_type == Token.TYPE_KEYWORD and self.tok_value == "then":
 					self.advance()
 
 					return IfNode(eval_scope, self.make_scope())
 		
 
-		elif token.matches(Token.OP_LBRACKET):
+		elif tok_type == Token.OP_LBRACKET:
 			self.advance()
 
 			expr = self.make_expression()
 
-			if self.token.matches(Token.OP_RBRACKET):
+			if self.tok_type == Token.OP_RBRACKET:
 				self.advance()
 
 				return expr
 		
 
-		elif token.matches(Token.OP_ARRAY_BEGIN):
+		elif tok_type == Token.OP_ARRAY_BEGIN:
 			self.advance()
 
 			expressions = []
@@ -341,16 +413,16 @@ class DeltaParser:
 			while True:
 				expr = self.make_expression()
 
-				if self.token.matches(Token.OP_ARRAY_END):
+				if self.tok_type == Token.OP_ARRAY_END:
 					expressions.append(expr)
 					self.advance()
 					break
 
-				elif self.token.matches(Token.OP_COMMA):
+				elif self.tok_type == Token.OP_COMMA:
 					expressions.append(expr)
 					self.advance()
 
-					if self.token.matches(Token.OP_ARRAY_END):
+					if self.tok_type == Token.OP_ARRAY_END:
 						break
 
 					else:
@@ -358,30 +430,30 @@ class DeltaParser:
 				
 				else:
 					# error!
-					print(f"warning: did not expect {self.token}!")
+					print(f"warning: did not expect {self.take()}!")
 
-			length = NumberNode(Token(Token.TYPE_INT, len(expressions)))
+			length = NumberNode(len(expressions))
 
-			if self.token.matches(Token.OP_SPECIFY):
+			if self.tok_type == Token.OP_SPECIFY:
 				self.advance()
 
-				if self.token.matches(Token.OP_ARRAY_BEGIN):
+				if self.tok_type == Token.OP_ARRAY_BEGIN:
 					self.advance()
 
 					expr = self.make_expression()
 
-					if self.token.matches(Token.OP_ARRAY_END):
+					if self.tok_type == Token.OP_ARRAY_END:
 						self.advance()
 
 						length = expr
 
-			return ArrayNode(length, expressions)
+			return ArrayNode(length, tuple(expressions))
 
 		return self.make_scope()
 
 
 	def make_scope(self) -> Node:
-		if self.token.matches(Token.OP_SCOPE_BEGIN):
+		if self.tok_type == Token.OP_SCOPE_BEGIN:
 			self.advance()
 
 			statements = []
@@ -390,12 +462,12 @@ class DeltaParser:
 				expr = self.make_expression()
 
 				if expr:
-					if self.token.matches(Token.OP_EOS):
+					if self.tok_type == Token.OP_EOS:
 						statements.append(expr)
 						self.advance()
 						continue
 
-					elif self.token.matches(Token.OP_SCOPE_END):
+					elif self.tok_type == Token.OP_SCOPE_END:
 						statements.append(expr)
 						break
 
@@ -407,10 +479,10 @@ class DeltaParser:
 					break
 				
 
-			if self.token.matches(Token.OP_SCOPE_END):
+			if self.tok_type == Token.OP_SCOPE_END:
 				self.advance()
 
-				return ScopeNode(statements)
+				return ScopeNode(tuple(statements))
 
 
 	#####
@@ -421,12 +493,63 @@ class DeltaParser:
 
 		left = func_a()
 
-		while self.token.matches_any(ops):
-			op_tok = self.token
+		while self.tok_type in ops:
+			op = self.tok_type
 			self.advance()
 
 			right = func_b()
 
-			left = BinOpNode(left, op_tok, right)
+			left = BinOpNode(left, op, right)
 		
-		return left
\ No newline at end of file
+		return left
+
+
+class DeltaPrattParser(DeltaParser):
+	"""
+	DeltaParser with operator expressions parsed by precedence climbing.
+
+	Instead of one method per precedence level, each called for every atom,
+	a single loop looks the current operator up in BINDING_POWERS and keeps
+	extending the expression while it binds tighter than the caller's.
+	The trees are the same as DeltaParser's: every operator is left
+	associative except `^`, and a sign binds looser than `^` and tighter than
+	the other operators, like make_factor does (-a ^ b is -(a ^ b)).
+	"""
+
+	BINDING_POWERS = {
+		**dict.fromkeys(DeltaParser.COMP_OPS, 1),
+		**dict.fromkeys(DeltaParser.ARITH_OPS, 2),
+		**dict.fromkeys(DeltaParser.TERM_OPS, 3),
+		**dict.fromkeys(DeltaParser.POWER_OPS, 5),
+	}
+
+	SIGN_POWER = 4
+	RIGHT_ASSOCIATIVE = DeltaParser.POWER_OPS
+
+	def make_comp_expr(self) -> Node:
+		return self.make_operation(0)
+
+
+	def make_operation(self, min_power: int) -> Node:
+		if self.tok_type in DeltaParser.SIGN_OPS:
+			op = self.tok_type
+			self.advance()
+
+			left = UnaryOpNode(op, self.make_operation(DeltaPrattParser.SIGN_POWER))
+		else:
+			left = self.make_atom()
+
+		powers = DeltaPrattParser.BINDING_POWERS
+
+		while True:
+			power = powers.get(self.tok_type, 0)
+
+			if power <= min_power:
+				return left
+
+			op = self.tok_type
+			self.advance()
+
+			# a right associative operator lets an operator of its own power continue the right side
+			right = self.make_operation(power - 1 if op in DeltaPrattParser.RIGHT_ASSOCIATIVE else power)
+			left = BinOpNode(left, op, right)
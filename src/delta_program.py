@@ -0,0 +1,236 @@
+from contextlib import nullcontext
+
+from delta_lexer import DeltaLexer, Token
+from delta_parser import DeltaPrattParser, ReturnNode
+from delta_optimizer import DeltaOptimizer
+from delta_resolver import DeltaResolver
+from delta_compiler import DeltaCompiler
+from delta_executor import DeltaExecutor
+from delta_stack_executor import DeltaStackExecutor
+from delta_instrument import DeltaInstrumentedExecutor, Instrumentation
+from delta_async import DeltaAsyncExecutor
+from delta_limits import DeltaLimitedExecutor, DeltaLimits
+from delta_vm import DeltaVM
+from delta_cache import DeltaCache
+from delta_memo import MemoCache
+from delta_output import DeltaOutput, TextOutput
+from delta_runtime import VARIABLES, make_namespaces
+from delta_errors import DeltaSyntaxError
+
+
+class DeltaProgram:
+	"""
+	A script lexed, parsed, resolved and compiled once, ready to run any number of times.
+
+	Nothing a run does is written back to the program, so `run` can be
+	called repeatedly and from several threads at once. Each run gets
+	engines of its own, built around the output it prints to.
+	"""
+
+	ENGINE_VM = "vm"
+	ENGINE_TREE = "tree"
+	ENGINE_STACK = "stack"	# the tree walker, without recursing on the python stack
+
+	def __init__(self, source: str, name: str = "<script>", optimize: bool = True, cache: DeltaCache = None, memo: MemoCache = None, phase=None) -> None:
+		self.name = name
+
+		compiled = None
+
+		if cache:
+			key = cache.key(source, (optimize,))
+			compiled = cache.load(key)
+
+		if compiled is None:
+			compiled = DeltaProgram.compile(source, optimize, phase)
+
+			if cache:
+				cache.store(key, compiled)
+
+		# optimization is the DeltaOptimizer's OptimizationReport, None when optimizing is turned off
+		self.tree, self.optimization, self.resolution, self.code = compiled
+
+		# memo, if given, caches the results of pure functions across every run of the program
+		self.memo = memo
+
+
+	@staticmethod
+	def compile(source: str, optimize: bool = True, phase=None) -> tuple:
+		"""
+		`phase`, if given, is called with the name of each step and must
+		return a context manager, which the step runs inside of. The CLI
+		uses it to time and measure them.
+		"""
+		phase = phase or (lambda name: nullcontext())
+
+		with phase("lex"):
+			tokens = DeltaLexer(source).parse()
+
+		# the lexer is a loop, every step after it recurses over the tree
+		step = "parse"
+
+		try:
+			with phase("parse"):
+				tree = DeltaPrattParser(tokens).parse()
+
+			optimization = None
+
+			if optimize:
+				step = "optimize"
+
+				with phase("optimize"):
+					optimizer = DeltaOptimizer()
+					tree = optimizer.optimize(tree)
+					optimization = optimizer.report
+
+			step = "resolve"
+
+			with phase("resolve"):
+				resolution = DeltaResolver().resolve(tree)
+
+			step = "compile"
+
+			with phase("compile"):
+				code = DeltaCompiler(resolution).compile(tree)
+		except RecursionError:
+			# the engines can run deeper trees than this, but the steps before them recurse on the python stack
+			depth = DeltaProgram.nesting(tokens)
+			raise DeltaSyntaxError(f"the script nests too deeply to {step}" + (f" (its brackets go {depth:,} levels deep)" if depth > 1 else "")) from None
+
+		# kept together, the resolution is keyed by the tree's nodes
+		return (tree, optimization, resolution, code)
+
+
+	@staticmethod
+	def nesting(tokens) -> int:
+		# how deep the brackets of a lexed script go, for the error above
+		opening = (Token.OP_LBRACKET, Token.OP_SCOPE_BEGIN, Token.OP_ARRAY_BEGIN)
+		closing = (Token.OP_RBRACKET, Token.OP_SCOPE_END, Token.OP_ARRAY_END)
+
+		depth = deepest = 0
+
+		for tok_type in tokens.types:
+			if tok_type in opening:
+				depth += 1
+				deepest = max(deepest, depth)
+			elif tok_type in closing:
+				depth -= 1
+
+		return deepest
+
+
+	@classmethod
+	def from_file(cls, path: str, optimize: bool = True, cache: DeltaCache = None, memo: MemoCache = None, phase=None):
+		with open(path) as file:
+			return cls(file.read(), path, optimize, cache, memo, phase)
+
+
+	def run(self, variables: dict = None, engine: str = ENGINE_VM, output: DeltaOutput = None, instrumentation: Instrumentation = None, limits: DeltaLimits = None) -> dict:
+		"""
+		Runs the program with `variables` injected as globals, and returns the
+		globals as they are when it finishes. What it prints goes to `output`,
+		buffered stdout by default. Given an `instrumentation`, the program is
+		run by the tree engine, measured into it, and given `limits`, by the
+		tree engine held to them.
+		"""
+		output = output if output is not None else TextOutput()
+
+		if instrumentation is not None and limits is not None:
+			raise ValueError("a run can be instrumented or limited, not both")
+
+		if instrumentation is not None:
+			DeltaProgram.check_tree_only(engine, "instrumented")
+			return DeltaInstrumentedExecutor(self.tree, self.resolution, self.memo, output, instrumentation).execute(variables)
+
+		if limits is not None:
+			DeltaProgram.check_tree_only(engine, "limited")
+			return DeltaLimitedExecutor(self.tree, self.resolution, self.memo, output, limits).execute(variables)
+
+		if engine == DeltaProgram.ENGINE_VM:
+			return DeltaVM(self.code, self.memo, output).run(variables)
+		elif engine == DeltaProgram.ENGINE_TREE:
+			return DeltaExecutor(self.tree, self.resolution, self.memo, output).execute(variables)
+		elif engine == DeltaProgram.ENGINE_STACK:
+			return DeltaStackExecutor(self.tree, self.resolution, self.memo, output).execute(variables)
+
+		raise ValueError(f"unknown engine '{engine}'")
+
+
+	async def run_async(self, variables: dict = None, output: DeltaOutput = None, slice: int = DeltaAsyncExecutor.DEFAULT_SLICE, budget: int = None, timeout: float = None) -> dict:
+		"""
+		Runs the program as a coroutine that lets the event loop have a turn
+		every `slice` steps, so any number of programs can run side by side
+		in one loop. `budget` caps its steps and `timeout` its seconds, see
+		DeltaAsyncExecutor.
+		"""
+		output = output if output is not None else TextOutput()
+		executor = DeltaAsyncExecutor(self.tree, self.resolution, self.memo, output, slice, budget, timeout)
+
+		return await executor.execute_async(variables)
+
+
+	@staticmethod
+	def check_tree_only(engine: str, what: str) -> None:
+		if engine != DeltaProgram.ENGINE_TREE:
+			raise ValueError(f"only the tree engine can be {what}, not '{engine}'")
+
+
+	@staticmethod
+	def run_stream(file, variables: dict = None, engine: str = ENGINE_VM, chunk_size: int = 1 << 16, optimize: bool = True, memo: MemoCache = None, output: DeltaOutput = None, instrumentation: Instrumentation = None, limits: DeltaLimits = None) -> dict:
+		"""
+		Runs a script straight from a file object, one top-level statement at a time.
+
+		Each statement is lexed, parsed, resolved, compiled and run before the
+		next one is read, then dropped, so memory stays flat however long the
+		script is. Output starts as soon as a buffer's worth has been printed,
+		pass an output flushing every line to see it as it happens. Returns
+		the globals at the end.
+		"""
+		namespaces = make_namespaces(variables)
+		output = output if output is not None else TextOutput()
+
+		if instrumentation is not None and limits is not None:
+			raise ValueError("a run can be instrumented or limited, not both")
+
+		if instrumentation is not None:
+			DeltaProgram.check_tree_only(engine, "instrumented")
+
+		if limits is not None:
+			DeltaProgram.check_tree_only(engine, "limited")
+
+		parser = DeltaPrattParser(DeltaLexer.stream(file, chunk_size))
+		resolver = DeltaResolver()
+		optimizer = DeltaOptimizer() if optimize else None
+
+		try:
+			for parsed in parser.parse_statements():
+				try:
+					statements = optimizer.optimize_statement(parsed) if optimizer else (parsed,)
+				except RecursionError:
+					raise DeltaSyntaxError("a statement nests too deeply to optimize") from None
+
+				for statement in statements:
+					try:
+						resolution = resolver.resolve_statement(statement)
+						code = DeltaCompiler(resolution).compile_toplevel(statement) if engine == DeltaProgram.ENGINE_VM and instrumentation is None and limits is None else None
+					except RecursionError:
+						raise DeltaSyntaxError("a statement nests too deeply to compile") from None
+
+					if instrumentation is not None:
+						DeltaInstrumentedExecutor(statement, resolution, memo, output, instrumentation).execute_in(namespaces)
+					elif limits is not None:
+						DeltaLimitedExecutor(statement, resolution, memo, output, limits).execute_in(namespaces)
+					elif engine == DeltaProgram.ENGINE_VM:
+						DeltaVM(code, memo, output).run_in(namespaces)
+					elif engine == DeltaProgram.ENGINE_TREE:
+						DeltaExecutor(statement, resolution, memo, output).execute_in(namespaces)
+					elif engine == DeltaProgram.ENGINE_STACK:
+						DeltaStackExecutor(statement, resolution, memo, output).execute_in(namespaces)
+					else:
+						raise ValueError(f"unknown engine '{engine}'")
+
+					if isinstance(statement, ReturnNode):
+						return namespaces[VARIABLES]
+		finally:
+			output.finish()
+
+		return namespaces[VARIABLES]
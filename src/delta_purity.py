@@ -0,0 +1,122 @@
+from delta_runtime import VARIABLES, FUNCTIONS
+
+
+class DeltaPurity:
+	"""
+	Decides whether calls to a function can be memoized.
+
+	A function is pure when its body never prints and only touches bindings
+	of its own frame, or of functions defined inside it: every variable it
+	reads or writes and every function it defines or calls resolved to such
+	a slot. It then can't see or change anything outside, so a call always
+	gives the same value.
+
+	A slot that hasn't been written yet still falls back to the global of its
+	name, so `check` also gives the (namespace, name) pairs the body uses.
+	Calls are only memoized while none of them exist as a global.
+	"""
+
+	def __init__(self, addresses: dict) -> None:
+		self.addresses = addresses
+
+		self.level = 0
+		self.guards = None
+
+
+	def check(self, function):
+		"""
+		Returns the guard names of a pure FunctionDefineNode, or None if it isn't pure.
+		"""
+		self.level = 0
+		self.guards = set()
+
+		if not all(self.visit(statement) for statement in function.scope.statements):
+			return None
+
+		return frozenset(self.guards)
+
+
+	def visit(self, node) -> bool:
+		method_name = f"check_{(type(node)).__name__}"
+		method = getattr(self, method_name)
+		return method(node)
+
+
+	def local(self, node, namespace: int) -> bool:
+		address = self.addresses.get(node)
+
+		if address is None or address[0] > self.level:
+			return False
+
+		self.guards.add((namespace, node.name))
+		return True
+
+
+	#####
+
+
+	def check_NumberNode(self, node) -> bool:
+		return True
+
+
+	def check_BooleanNode(self, node) -> bool:
+		return True
+
+
+	def check_StringNode(self, node) -> bool:
+		return True
+
+
+	def check_ArrayNode(self, node) -> bool:
+		return all(self.visit(value) for value in node.value) and self.visit(node.length)
+
+
+	def check_FunctionCallNode(self, node) -> bool:
+		return self.local(node, FUNCTIONS)
+
+
+	def check_FunctionDefineNode(self, node) -> bool:
+		if not self.local(node, FUNCTIONS):
+			return False
+
+		self.level += 1
+		pure = all(self.visit(statement) for statement in node.scope.statements)
+		self.level -= 1
+
+		return pure
+
+
+	def check_VarAccessNode(self, node) -> bool:
+		return self.local(node, VARIABLES)
+
+
+	def check_VarAssignNode(self, node) -> bool:
+		return self.visit(node.node) and self.local(node, VARIABLES)
+
+
+	def check_PrintNode(self, node) -> bool:
+		return False
+
+
+	def check_ImportNode(self, node) -> bool:
+		return False
+
+
+	def check_ScopeNode(self, node) -> bool:
+		return all(self.visit(statement) for statement in node.statements)
+
+
+	def check_ReturnNode(self, node) -> bool:
+		return self.visit(node.node)
+
+
+	def check_IfNode(self, node) -> bool:
+		return self.visit(node.eval_scope) and self.visit(node.action_scope)
+
+
+	def check_BinOpNode(self, node) -> bool:
+		return self.visit(node.left_node) and self.visit(node.right_node)
+
+
+	def check_UnaryOpNode(self, node) -> bool:
+		return self.visit(node.node)
@@ -0,0 +1,250 @@
+from delta_parser import Node, ScopeNode
+from delta_purity import DeltaPurity
+
+
+class Resolution:
+	"""
+	Result of a DeltaResolver pass.
+
+	`addresses` maps VarAccessNode, VarAssignNode, FunctionCallNode and
+	FunctionDefineNode to a (depth, slot) pair, where depth is the number of
+	function frames to walk outwards and slot indexes that frame. Nodes that
+	are missing from it refer to a global, looked up by name at runtime.
+
+	`frame_sizes` maps every FunctionDefineNode to the number of slots its
+	frame needs, and `frame_size` is the same for the outermost frame.
+
+	`pure` maps the FunctionDefineNodes DeltaPurity found pure to the names
+	that must not exist as globals for a call to be memoized.
+	"""
+
+	def __init__(self) -> None:
+		self.addresses = {}
+		self.frame_sizes = {}
+		self.frame_size = 0
+		self.pure = {}
+
+
+
+class ResolverUnit:
+	# one per frame: the whole program, or a single function body
+	def __init__(self, node: Node, level: int) -> None:
+		self.node = node
+		self.level = level
+		self.size = 0
+
+
+	def allocate(self) -> int:
+		self.size += 1
+		return self.size - 1
+
+
+
+class ResolverScope:
+	def __init__(self, parent, unit: ResolverUnit, is_global: bool = False) -> None:
+		self.parent = parent
+		self.unit = unit
+		self.is_global = is_global
+
+		self.variables = {}
+		self.functions = {}
+
+
+	def get_owner(self, name, meta_var_name):
+		scope = self
+
+		while scope:
+			if name in getattr(scope, meta_var_name):
+				return scope
+
+			scope = scope.parent
+
+		return None
+
+
+
+class DeltaResolver:
+	"""
+	Assigns every binding a fixed frame slot ahead of execution.
+
+	Nested scopes share the frame of the function (or program) they are in,
+	each `let`/`func` getting a slot of its own, so a lookup is an index into
+	a list no matter how deeply its scope is nested. Declarations made
+	directly in the program scope are globals instead, kept by name, so they
+	can be injected from outside and looked up from function bodies defined
+	before them.
+
+	A name refers to the binding it resolves to at the point it appears in the
+	source. A `let` or `func` whose name isn't bound yet declares it in the
+	current scope, otherwise it overwrites the existing binding. Globals can
+	appear at runtime (a function body may run after a later `let`), so the
+	VM treats a slot that hasn't been written yet as the global of its name.
+	"""
+
+	def __init__(self) -> None:
+		self.resolution = None
+		self.scope = None
+
+		# the program scope used by resolve_statement, kept between calls
+		self.globals = ResolverScope(None, None, True)
+
+
+	def resolve(self, program: ScopeNode) -> Resolution:
+		self.resolution = Resolution()
+
+		unit = ResolverUnit(program, 0)
+		self.scope = ResolverScope(None, unit, True)
+
+		for statement in program.statements:
+			self.visit(statement)
+
+		self.resolution.frame_size = unit.size
+		self.scope = None
+
+		return self.resolution
+
+
+	def resolve_statement(self, statement: Node) -> Resolution:
+		"""
+		Resolves a single statement of the program scope, for streaming.
+
+		The statement gets a frame of its own, and globals declared by the
+		statements resolved before it are remembered.
+		"""
+		self.resolution = Resolution()
+
+		unit = ResolverUnit(statement, 0)
+		self.globals.unit = unit
+		self.scope = self.globals
+
+		self.visit(statement)
+
+		self.resolution.frame_size = unit.size
+		self.scope = None
+
+		return self.resolution
+
+
+	def visit(self, node) -> None:
+		method_name = f"resolve_{(type(node)).__name__}"
+		method = getattr(self, method_name)
+		method(node)
+
+
+	#####
+
+
+	def lookup(self, node, name, meta_var_name) -> bool:
+		owner = self.scope.get_owner(name, meta_var_name)
+
+		if owner is None:
+			return False
+
+		if not owner.is_global:
+			depth = self.scope.unit.level - owner.unit.level
+			self.resolution.addresses[node] = (depth, getattr(owner, meta_var_name)[name])
+
+		return True
+
+
+	def declare(self, node, name, meta_var_name) -> None:
+		if self.lookup(node, name, meta_var_name):
+			return
+
+		scope = self.scope
+
+		if scope.is_global:
+			getattr(scope, meta_var_name)[name] = None
+		else:
+			slot = scope.unit.allocate()
+			getattr(scope, meta_var_name)[name] = slot
+			self.resolution.addresses[node] = (0, slot)
+
+
+	def resolve_NumberNode(self, node) -> None:
+		pass
+
+
+	def resolve_BooleanNode(self, node) -> None:
+		pass
+
+
+	def resolve_StringNode(self, node) -> None:
+		pass
+
+
+	def resolve_ArrayNode(self, node) -> None:
+		for value in node.value:
+			self.visit(value)
+
+		self.visit(node.length)
+
+
+	def resolve_FunctionCallNode(self, node) -> None:
+		self.lookup(node, node.name, "functions")
+
+
+	def resolve_FunctionDefineNode(self, node) -> None:
+		# declared before the body so the function can call itself
+		self.declare(node, node.name, "functions")
+
+		unit = ResolverUnit(node, self.scope.unit.level + 1)
+		outer = self.scope
+		self.scope = ResolverScope(outer, unit)
+
+		for statement in node.scope.statements:
+			self.visit(statement)
+
+		self.scope = outer
+		self.resolution.frame_sizes[node] = unit.size
+
+		# every address in the body is known by now, nested functions included
+		guards = DeltaPurity(self.resolution.addresses).check(node)
+
+		if guards is not None:
+			self.resolution.pure[node] = guards
+
+
+	def resolve_ImportNode(self, node) -> None:
+		# a module's bindings are globals, made when it runs
+		pass
+
+
+	def resolve_VarAccessNode(self, node) -> None:
+		self.lookup(node, node.name, "variables")
+
+
+	def resolve_VarAssignNode(self, node) -> None:
+		self.visit(node.node)
+		self.declare(node, node.name, "variables")
+
+
+	def resolve_PrintNode(self, node) -> None:
+		self.visit(node.node)
+
+
+	def resolve_ScopeNode(self, node) -> None:
+		self.scope = ResolverScope(self.scope, self.scope.unit)
+
+		for statement in node.statements:
+			self.visit(statement)
+
+		self.scope = self.scope.parent
+
+
+	def resolve_ReturnNode(self, node) -> None:
+		self.visit(node.node)
+
+
+	def resolve_IfNode(self, node) -> None:
+		self.visit(node.eval_scope)
+		self.visit(node.action_scope)
+
+
+	def resolve_BinOpNode(self, node) -> None:
+		self.visit(node.left_node)
+		self.visit(node.right_node)
+
+
+	def resolve_UnaryOpNode(self, node) -> None:
+		self.visit(node.node)
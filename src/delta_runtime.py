@@ -0,0 +1,87 @@
+from delta_types import *
+
+
+# marks a slot whose binding hasn't been made yet, reads and writes go to the global of the same name
+UNBOUND = object()
+
+VARIABLES = 0
+FUNCTIONS = 1
+MODULES = 2		# not a namespace of names: the modules a run has imported, see delta_modules
+
+# what a global lookup gives for a name that was never bound, per namespace
+MISSING = (NULL, None)
+
+
+class Frame:
+	"""
+	Runtime storage for one program run or function call.
+
+	Frames are created per execution and never stored on the AST, so one
+	parsed program can be run any number of times, from any number of
+	threads. `namespaces` holds the (variables, functions) globals dicts, and
+	the run's imported modules after them, and is shared by every frame of
+	the same run.
+	"""
+
+	def __init__(self, size: int, parent, namespaces: tuple) -> None:
+		self.slots = [UNBOUND] * size
+		self.parent = parent	# frame of the enclosing function, if any
+		self.namespaces = namespaces
+
+
+	def outer(self, depth: int):
+		frame = self
+
+		for _ in range(depth):
+			frame = frame.parent
+
+		return frame
+
+
+	def load(self, address, name, namespace):
+		if address is not None:
+			value = self.outer(address[0]).slots[address[1]]
+
+			if value is not UNBOUND:
+				return value
+
+		return self.namespaces[namespace].get(name, MISSING[namespace])
+
+
+	def store(self, address, name, namespace, value) -> None:
+		names = self.namespaces[namespace]
+
+		if address is None:
+			names[name] = value
+			return
+
+		slots = self.outer(address[0]).slots
+
+		if slots[address[1]] is UNBOUND and name in names:
+			names[name] = value
+		else:
+			slots[address[1]] = value
+
+
+
+class DeltaFunction:
+	def __init__(self, name: str, body, frame: Frame, executor=None) -> None:
+		self.name = name
+		self.body = body	# FunctionDefineNode for the executor, DeltaCode for the VM
+		self.frame = frame	# the frame the function was defined in
+		self.executor = executor	# the DeltaExecutor holding the body's resolution
+
+
+	def __repr__(self) -> str:
+		return f"Function({self.name})"
+
+
+
+def make_namespaces(variables: dict = None) -> tuple:
+	# injected bindings may be plain python values, they are wrapped here
+	globals_ = {}
+
+	for name, value in (variables or {}).items():
+		globals_[name] = to_delta(value)
+
+	return (globals_, {}, {})
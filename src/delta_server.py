@@ -0,0 +1,368 @@
+"""
+A server keeping the interpreter loaded, running scripts sent over a Unix
+domain socket.
+
+The protocol is a sequence of frames, each a one byte type, a four byte
+big endian length and that many bytes of payload. A client sends RUN
+frames, whose payload is a JSON object:
+
+	{"source": "...", "engine": "vm", "optimize": true, "variables": {...}}
+
+of which only "source" is required. The server answers each with any
+number of OUTPUT frames, the script's printed text as UTF-8, as it is
+flushed, then one DONE frame holding a JSON object:
+
+	{"ok": true, "error": null, "cached": true, "compile_time": 0.0, "execute_time": 0.0}
+
+A connection can carry any number of requests, one after the other.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from delta_program import DeltaProgram
+from delta_output import DeltaOutput
+
+
+FRAME_RUN = b"R"
+FRAME_OUTPUT = b"O"
+FRAME_DONE = b"D"
+
+HEADER = struct.Struct(">cI")
+
+MAX_FRAME = 64 << 20
+
+
+class ProtocolError(Exception):
+	pass
+
+
+
+def send_frame(sock, kind: bytes, payload: bytes) -> None:
+	sock.sendall(HEADER.pack(kind, len(payload)) + payload)
+
+
+def read_frame(file) -> tuple:
+	"""
+	Reads one frame from a binary file, returns (type, payload), or None at
+	the end of the stream.
+	"""
+	header = file.read(HEADER.size)
+
+	if not header:
+		return None
+
+	if len(header) < HEADER.size:
+		raise ProtocolError("connection closed inside a frame header")
+
+	kind, length = HEADER.unpack(header)
+
+	if length > MAX_FRAME:
+		raise ProtocolError(f"frame of {length:,} bytes is over the limit")
+
+	payload = file.read(length)
+
+	if len(payload) < length:
+		raise ProtocolError("connection closed inside a frame")
+
+	return kind, payload
+
+
+
+class SocketOutput(DeltaOutput):
+	# sends each flush of printed text back as an OUTPUT frame
+	def __init__(self, sock) -> None:
+		super().__init__()
+		self.sock = sock
+
+
+	def write(self, text: str) -> None:
+		send_frame(self.sock, FRAME_OUTPUT, text.encode())
+
+
+
+class ProgramCache:
+	"""
+	Compiled programs by a hash of their source and options, least recently used dropped first.
+	"""
+
+	DEFAULT_SIZE = 256
+
+	def __init__(self, size: int = DEFAULT_SIZE) -> None:
+		self.size = size
+		self.programs = OrderedDict()
+		self.lock = Lock()
+
+		self.hits = 0
+		self.misses = 0
+
+
+	@staticmethod
+	def key(source: str, optimize: bool) -> str:
+		digest = hashlib.sha256(b"1" if optimize else b"0")
+		digest.update(source.encode())
+
+		return digest.hexdigest()
+
+
+	def get(self, source: str, optimize: bool) -> tuple:
+		# returns (program, whether it was cached), compiling outside the lock
+		key = ProgramCache.key(source, optimize)
+
+		with self.lock:
+			program = self.programs.get(key)
+
+			if program is not None:
+				self.programs.move_to_end(key)
+				self.hits += 1
+				return program, True
+
+			self.misses += 1
+
+		program = DeltaProgram(source, "<request>", optimize)
+
+		with self.lock:
+			self.programs[key] = program
+
+			while len(self.programs) > self.size:
+				self.programs.popitem(last=False)
+
+		return program, False
+
+
+
+class DeltaRequestHandler(socketserver.StreamRequestHandler):
+	def handle(self) -> None:
+		while True:
+			try:
+				frame = read_frame(self.rfile)
+			except (ProtocolError, OSError):
+				return
+
+			if frame is None:
+				return
+
+			kind, payload = frame
+
+			if kind != FRAME_RUN:
+				return
+
+			try:
+				self.run(payload)
+			except OSError:
+				# the client went away mid request
+				return
+
+
+	def run(self, payload: bytes) -> None:
+		result = {"ok": False, "error": None, "cached": False, "compile_time": 0.0, "execute_time": 0.0}
+		output = SocketOutput(self.connection)
+
+		try:
+			request = json.loads(payload)
+
+			start = time.perf_counter()
+			program, result["cached"] = self.server.programs.get(request["source"], request.get("optimize", True))
+			result["compile_time"] = time.perf_counter() - start
+
+			start = time.perf_counter()
+
+			try:
+				program.run(request.get("variables"), request.get("engine", DeltaProgram.ENGINE_VM), output)
+			finally:
+				result["execute_time"] = time.perf_counter() - start
+
+			result["ok"] = True
+		except Exception as error:
+			# a bad request or a failing script only fails its own request
+			result["error"] = f"{type(error).__name__}: {error}"
+
+		send_frame(self.connection, FRAME_DONE, json.dumps(result).encode())
+
+
+
+class DeltaServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+	"""
+	Runs scripts sent over a Unix domain socket, in a process that stays up.
+
+	Every connection gets a thread of its own, all of them sharing the
+	imported interpreter and a ProgramCache, so a script that was sent
+	before skips straight to running. The socket is only accessible to
+	the user that started the server.
+	"""
+
+	daemon_threads = True
+
+	def __init__(self, path: str, cache_size: int = ProgramCache.DEFAULT_SIZE) -> None:
+		DeltaServer.remove_stale(path)
+
+		super().__init__(path, DeltaRequestHandler, bind_and_activate=False)
+
+		try:
+			self.server_bind()
+			# nothing can connect before listen(), so the socket is private before anyone can use it
+			os.chmod(path, 0o600)
+			self.server_activate()
+		except BaseException:
+			# only the socket, the path may not be ours
+			super().server_close()
+			raise
+
+		self.path = path
+		self.programs = ProgramCache(cache_size)
+
+
+	@staticmethod
+	def remove_stale(path: str) -> None:
+		# a socket left behind by a server that is gone; a live one, or anything else, isn't ours to remove
+		try:
+			mode = os.lstat(path).st_mode
+		except FileNotFoundError:
+			return
+
+		if not stat.S_ISSOCK(mode):
+			raise FileExistsError(f"{path} exists and is not a socket")
+
+		probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+		try:
+			probe.connect(path)
+		except (ConnectionRefusedError, FileNotFoundError):
+			pass
+		else:
+			raise FileExistsError(f"a server is already listening on {path}")
+		finally:
+			probe.close()
+
+		try:
+			os.remove(path)
+		except FileNotFoundError:
+			pass
+
+
+	def server_close(self) -> None:
+		super().server_close()
+
+		try:
+			os.remove(self.path)
+		except OSError:
+			pass
+
+
+
+class DeltaClient:
+	"""
+	One connection to a DeltaServer, reused for every request made through it.
+	"""
+
+	def __init__(self, path: str) -> None:
+		self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		self.sock.connect(path)
+		self.file = self.sock.makefile("rb")
+
+
+	def run(self, source: str, engine: str = DeltaProgram.ENGINE_VM, optimize: bool = True, variables: dict = None, on_output=None) -> dict:
+		"""
+		Runs `source` on the server and returns the DONE frame's result.
+		Output is passed to `on_output` as it arrives, if given, and is
+		otherwise collected under "output" in the result.
+		"""
+		request = {"source": source, "engine": engine, "optimize": optimize}
+
+		if variables:
+			request["variables"] = variables
+
+		send_frame(self.sock, FRAME_RUN, json.dumps(request).encode())
+
+		chunks = []
+
+		while True:
+			frame = read_frame(self.file)
+
+			if frame is None:
+				raise ProtocolError("the server closed the connection")
+
+			kind, payload = frame
+
+			if kind == FRAME_OUTPUT:
+				if on_output:
+					on_output(payload.decode())
+				else:
+					chunks.append(payload.decode())
+			elif kind == FRAME_DONE:
+				result = json.loads(payload)
+
+				if not on_output:
+					result["output"] = "".join(chunks)
+
+				return result
+			else:
+				raise ProtocolError(f"unexpected frame {kind!r}")
+
+
+	def close(self) -> None:
+		self.file.close()
+		self.sock.close()
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, *exc) -> None:
+		self.close()
+
+
+
+def main(argv: list = None) -> int:
+	parser = argparse.ArgumentParser(prog="delta-server", description="Keeps a Delta interpreter running behind a Unix domain socket.")
+	commands = parser.add_subparsers(dest="command", required=True)
+
+	serve = commands.add_parser("serve", help="run the server")
+	serve.add_argument("socket", help="path of the socket to listen on")
+	serve.add_argument("--cache-size", type=int, default=ProgramCache.DEFAULT_SIZE, help="compiled programs kept in memory")
+
+	run = commands.add_parser("run", help="run a script on a running server")
+	run.add_argument("socket", help="path of the server's socket")
+	run.add_argument("script", nargs="?", help="path of the script, - or nothing to read it from stdin")
+	run.add_argument("-e", "--engine", choices=(DeltaProgram.ENGINE_VM, DeltaProgram.ENGINE_TREE, DeltaProgram.ENGINE_STACK), default=DeltaProgram.ENGINE_VM)
+
+	args = parser.parse_args(argv)
+
+	if args.command == "serve":
+		with DeltaServer(args.socket, args.cache_size) as server:
+			try:
+				server.serve_forever()
+			except KeyboardInterrupt:
+				pass
+
+		return 0
+
+	if args.script in (None, "-"):
+		source = sys.stdin.read()
+	else:
+		with open(args.script) as file:
+			source = file.read()
+
+	with DeltaClient(args.socket) as client:
+		result = client.run(source, args.engine, on_output=sys.stdout.write)
+
+	if not result["ok"]:
+		print(result["error"], file=sys.stderr)
+		return 1
+
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,189 @@
+from delta_types import DeltaNumber, DeltaBool, DeltaString, TRUE, FALSE, SMALL_INTS, SMALL_INT_MIN, SMALL_INT_MAX, make_number
+
+
+# the fast paths, each one the body of the method it stands in for with the type checks done by the site;
+# the int ones look the small ints up themselves, that saves make_number's call on every operation
+
+def number_add(left, right):
+	value = left.value + right.value
+
+	if type(value) is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+		return SMALL_INTS[value - SMALL_INT_MIN]
+
+	return DeltaNumber(value)
+
+
+def number_subtract(left, right):
+	value = left.value - right.value
+
+	if type(value) is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+		return SMALL_INTS[value - SMALL_INT_MIN]
+
+	return DeltaNumber(value)
+
+
+def number_multiply(left, right):
+	value = left.value * right.value
+
+	if type(value) is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+		return SMALL_INTS[value - SMALL_INT_MIN]
+
+	return DeltaNumber(value)
+
+
+def number_divide(left, right):
+	return make_number(left.value / right.value)
+
+
+def number_power(left, right):
+	return make_number(pow(left.value, right.value))
+
+
+def value_comp_ee(left, right):
+	return TRUE if left.value == right.value else FALSE
+
+
+def value_comp_ne(left, right):
+	return TRUE if left.value != right.value else FALSE
+
+
+def value_comp_lr(left, right):
+	return TRUE if left.value < right.value else FALSE
+
+
+def value_comp_gr(left, right):
+	return TRUE if left.value > right.value else FALSE
+
+
+def value_comp_le(left, right):
+	return TRUE if left.value <= right.value else FALSE
+
+
+def value_comp_ge(left, right):
+	return TRUE if left.value >= right.value else FALSE
+
+
+def string_add(left, right):
+	return DeltaString.concat(left, right)
+
+
+def string_comp_ee(left, right):
+	return TRUE if left.equals(right) else FALSE
+
+
+def string_comp_ne(left, right):
+	return FALSE if left.equals(right) else TRUE
+
+
+SPECIALIZATIONS = {
+	(DeltaNumber, "add", DeltaNumber):			number_add,
+	(DeltaNumber, "subtract", DeltaNumber):		number_subtract,
+	(DeltaNumber, "multiply", DeltaNumber):		number_multiply,
+	(DeltaNumber, "divide", DeltaNumber):		number_divide,
+	(DeltaNumber, "power", DeltaNumber):		number_power,
+	(DeltaNumber, "comp_ee", DeltaNumber):		value_comp_ee,
+	(DeltaNumber, "comp_ne", DeltaNumber):		value_comp_ne,
+	(DeltaNumber, "comp_lr", DeltaNumber):		value_comp_lr,
+	(DeltaNumber, "comp_gr", DeltaNumber):		value_comp_gr,
+	(DeltaNumber, "comp_le", DeltaNumber):		value_comp_le,
+	(DeltaNumber, "comp_ge", DeltaNumber):		value_comp_ge,
+	(DeltaBool, "comp_ee", DeltaBool):			value_comp_ee,
+	(DeltaBool, "comp_ne", DeltaBool):			value_comp_ne,
+	(DeltaString, "add", DeltaString):			string_add,
+	(DeltaString, "comp_ee", DeltaString):		string_comp_ee,
+	(DeltaString, "comp_ne", DeltaString):		string_comp_ne,
+}
+
+
+def generic(method: str):
+	# any other pair of types goes through the method by name, which does its own checks
+	def operation(left, right):
+		return getattr(left, method)(right)
+
+	return operation
+
+
+
+class BinOpSite:
+	"""
+	The inline cache of one BinOpNode, for one run.
+
+	The site remembers the operand types it last saw and the fast path
+	for them. While the types stay the same, and they mostly do, an
+	operation is a type check and a direct call. When they change it
+	misses, and specializes again for the new types. A site that has
+	had to specialize MAX_SPECIALIZATIONS times is megamorphic: it stops
+	trying and calls the method by name from then on, counting misses.
+
+	Delta has no loops, so only the operators in function bodies can run
+	more than once; the executors give the program's own statements no
+	site, they would only ever miss.
+	"""
+
+	__slots__ = ("method", "generic", "left", "right", "function", "hits", "misses", "specializations")
+
+	MAX_SPECIALIZATIONS = 8
+
+	def __init__(self, method: str) -> None:
+		self.method = method
+		self.generic = generic(method)
+
+		# the types a hit needs, None while unspecialized or megamorphic, which nothing matches
+		self.left = None
+		self.right = None
+		self.function = None
+
+		self.hits = 0
+		self.misses = 0
+		self.specializations = 0
+
+
+	@property
+	def megamorphic(self) -> bool:
+		return self.specializations >= BinOpSite.MAX_SPECIALIZATIONS
+
+
+	def miss(self, left, right):
+		self.misses += 1
+
+		if self.megamorphic:
+			return self.generic(left, right)
+
+		self.specializations += 1
+
+		if self.megamorphic:
+			self.left = self.right = self.function = None
+			return self.generic(left, right)
+
+		self.left = type(left)
+		self.right = type(right)
+		self.function = SPECIALIZATIONS.get((self.left, self.method, self.right), self.generic)
+
+		return self.function(left, right)
+
+
+	def describe(self) -> str:
+		if self.megamorphic:
+			return "megamorphic"
+
+		if self.function is None:
+			return "unspecialized"
+
+		return f"{self.left.__name__.removeprefix('Delta')} {self.method} {self.right.__name__.removeprefix('Delta')}"
+
+
+
+def report_sites(sites: dict, file, limit: int = 20) -> None:
+	# the busiest sites first, a hot site with many misses is one whose types keep changing
+	print("binary operator sites:                              hits      misses   state", file=file)
+
+	busiest = sorted(sites.items(), key=lambda item: -(item[1].hits + item[1].misses))
+
+	for node, site in busiest[:limit]:
+		label = repr(node)
+		label = label if len(label) <= 40 else label[:37] + "..."
+
+		print(f"\t{label:<40}{site.hits:>12,}{site.misses:>12,}   {site.describe()}", file=file)
+
+	if len(busiest) > limit:
+		print(f"\t... and {len(busiest) - limit:,} more", file=file)
@@ -0,0 +1,297 @@
+from delta_types import *
+from delta_parser import *
+from delta_executor import DeltaExecutor
+from delta_runtime import Frame, DeltaFunction, VARIABLES, FUNCTIONS
+from delta_modules import import_steps, define
+from delta_memo import MemoCache, MISS
+from delta_output import DeltaOutput
+
+
+class DeltaStackExecutor(DeltaExecutor):
+	"""
+	Runs the same trees as DeltaExecutor without recursing on the python stack.
+
+	Evaluation is driven by an explicit work stack of (handler, node, frame,
+	owner) tasks and a stack of values. Entering a node pushes the tasks for
+	its children and a task that finishes it once their values are on the
+	value stack, so nesting depth, in expressions, scopes or Delta function
+	calls, only grows those two lists. `owner` is the executor whose
+	resolution applies to the node: the one that defined the function being
+	run, streamed statements each having their own.
+
+	Only execution is covered, the parser, optimizer, resolver and compiler
+	still recurse over the tree they are given. Scripts nested deeper than
+	they can follow, around 200 brackets, fail in DeltaProgram with a
+	DeltaSyntaxError, deep Delta function calls run here as usual.
+	"""
+
+	LEAVES = frozenset([NumberNode, VarAccessNode, StringNode, BooleanNode])
+
+	def __init__(self, program: ScopeNode, resolution=None, memo: MemoCache = None, output: DeltaOutput = None) -> None:
+		super().__init__(program, resolution, memo, output)
+
+		self.enter = {
+			NumberNode:				self.enter_NumberNode,
+			BooleanNode:			self.enter_BooleanNode,
+			StringNode:				self.enter_StringNode,
+			ArrayNode:				self.enter_ArrayNode,
+			FunctionCallNode:		self.enter_FunctionCallNode,
+			FunctionDefineNode:		self.enter_FunctionDefineNode,
+			ImportNode:				self.enter_ImportNode,
+			VarAccessNode:			self.enter_VarAccessNode,
+			VarAssignNode:			self.enter_VarAssignNode,
+			PrintNode:				self.enter_PrintNode,
+			ScopeNode:				self.enter_ScopeNode,
+			ReturnNode:				self.enter_ReturnNode,
+			IfNode:					self.enter_IfNode,
+			BinOpNode:				self.enter_BinOpNode,
+			UnaryOpNode:			self.enter_UnaryOpNode,
+		}
+
+
+	def visit(self, node, frame):
+		# also what a DeltaExecutor calling one of our functions ends up in
+		return self.run(node, frame, self)
+
+
+	def run(self, node, frame, owner):
+		# handlers push their children as (self.enter[type(child)], child, frame, owner) themselves
+		work = [(self.enter[type(node)], node, frame, owner)]
+		values = []
+
+		while work:
+			handler, node, frame, owner = work.pop()
+			handler(node, frame, owner, work, values)
+
+		return values.pop()
+
+
+	def leaf(self, node, frame, owner):
+		# literals and variables are evaluated on the spot, they can't nest
+		if type(node) is NumberNode:
+			return make_number(node.value)
+		elif type(node) is VarAccessNode:
+			return frame.load(owner.addresses.get(node), node.name, VARIABLES)
+		elif type(node) is StringNode:
+			return DeltaString(node.value)
+
+		return make_bool(node.value)
+
+
+	#####
+
+
+	def enter_NumberNode(self, node, frame, owner, work, values) -> None:
+		values.append(make_number(node.value))
+
+
+	def enter_BooleanNode(self, node, frame, owner, work, values) -> None:
+		values.append(make_bool(node.value))
+
+
+	def enter_StringNode(self, node, frame, owner, work, values) -> None:
+		values.append(DeltaString(node.value))
+
+
+	def enter_ArrayNode(self, node, frame, owner, work, values) -> None:
+		# the elements run first, in order, then the length
+		work.append((self.exit_ArrayNode, node, frame, owner))
+		work.append((self.enter[type(node.length)], node.length, frame, owner))
+
+		for value in reversed(node.value):
+			work.append((self.enter[type(value)], value, frame, owner))
+
+
+	def exit_ArrayNode(self, node, frame, owner, work, values) -> None:
+		length = values.pop()
+		start = len(values) - len(node.value)
+
+		array = DeltaArray(length, values[start:])
+		del values[start:]
+
+		values.append(array)
+
+
+	def enter_FunctionCallNode(self, node, frame, owner, work, values) -> None:
+		name = node.name
+		function = frame.load(owner.addresses.get(node), name, FUNCTIONS)
+
+		if not isinstance(function, DeltaFunction):
+			function = define(function, name, frame.namespaces, self.make_function)
+
+		executor = function.executor
+		body = function.body
+		call_frame = Frame(executor.frame_sizes[body], function.frame, frame.namespaces)
+
+		if executor.memo is not None and body in executor.pure and executor.can_memoize(body, frame.namespaces):
+			key = MemoCache.key(body)
+			value = executor.memo.get(key)
+
+			if value is not MISS:
+				values.append(value)
+				return
+
+			work.append((self.exit_memoized, key, None, executor))
+
+		work.append((self.enter[type(body.scope)], body.scope, call_frame, executor))
+
+
+	def exit_memoized(self, key, frame, owner, work, values) -> None:
+		owner.memo.put(key, values[-1])
+
+
+	def enter_FunctionDefineNode(self, node, frame, owner, work, values) -> None:
+		name = node.name
+		frame.store(owner.addresses.get(node), name, FUNCTIONS, DeltaFunction(name, node, frame, owner))
+		values.append(NULL)
+
+
+	def enter_ImportNode(self, node, frame, owner, work, values) -> None:
+		self.step_ImportNode((import_steps(node.name, frame.namespaces), False), frame, owner, work, values)
+
+
+	def step_ImportNode(self, position, frame, owner, work, values) -> None:
+		# runs the next module the import needs to on this work stack, then comes back for the one after
+		steps, ran = position
+
+		if ran:
+			# the value of the module's top level, thrown away
+			values.pop()
+
+		module = next(steps, None)
+
+		if module is None:
+			values.append(NULL)
+			return
+
+		executor = self.spawn(module)
+		module_frame = Frame(module.resolution.frame_size, None, frame.namespaces)
+
+		work.append((self.step_ImportNode, (steps, True), frame, owner))
+		work.append((self.enter[type(module.tree)], module.tree, module_frame, executor))
+
+
+	def enter_VarAccessNode(self, node, frame, owner, work, values) -> None:
+		values.append(frame.load(owner.addresses.get(node), node.name, VARIABLES))
+
+
+	def enter_VarAssignNode(self, node, frame, owner, work, values) -> None:
+		if type(node.node) in DeltaStackExecutor.LEAVES:
+			frame.store(owner.addresses.get(node), node.name, VARIABLES, self.leaf(node.node, frame, owner))
+			values.append(NULL)
+			return
+
+		work.append((self.exit_VarAssignNode, node, frame, owner))
+		work.append((self.enter[type(node.node)], node.node, frame, owner))
+
+
+	def exit_VarAssignNode(self, node, frame, owner, work, values) -> None:
+		frame.store(owner.addresses.get(node), node.name, VARIABLES, values[-1])
+		values[-1] = NULL
+
+
+	def enter_PrintNode(self, node, frame, owner, work, values) -> None:
+		work.append((self.exit_PrintNode, node, frame, owner))
+		work.append((self.enter[type(node.node)], node.node, frame, owner))
+
+
+	def exit_PrintNode(self, node, frame, owner, work, values) -> None:
+		self.output.print(values[-1])
+		values[-1] = NULL
+
+
+	def enter_ScopeNode(self, node, frame, owner, work, values) -> None:
+		self.step_ScopeNode((node, 0), frame, owner, work, values)
+
+
+	def step_ScopeNode(self, position, frame, owner, work, values) -> None:
+		# runs the statement at `position`, then comes back for the next one
+		node, index = position
+		statements = node.statements
+
+		if index:
+			# the value of the statement before, thrown away
+			values.pop()
+
+		if index == len(statements):
+			values.append(NULL)
+			return
+
+		statement = statements[index]
+
+		if type(statement) is ReturnNode:
+			# its value is the scope's, and nothing after it runs
+			work.append((self.enter[type(statement.node)], statement.node, frame, owner))
+			return
+
+		work.append((self.step_ScopeNode, (node, index + 1), frame, owner))
+		work.append((self.enter[type(statement)], statement, frame, owner))
+
+
+	def enter_ReturnNode(self, node, frame, owner, work, values) -> None:
+		work.append((self.enter[type(node.node)], node.node, frame, owner))
+
+
+	def enter_IfNode(self, node, frame, owner, work, values) -> None:
+		if type(node.eval_scope) in DeltaStackExecutor.LEAVES:
+			values.append(self.leaf(node.eval_scope, frame, owner))
+			self.test_IfNode(node, frame, owner, work, values)
+			return
+
+		work.append((self.test_IfNode, node, frame, owner))
+		work.append((self.enter[type(node.eval_scope)], node.eval_scope, frame, owner))
+
+
+	def test_IfNode(self, node, frame, owner, work, values) -> None:
+		if values.pop().value == True:
+			work.append((self.exit_IfNode, node, frame, owner))
+			work.append((self.enter[type(node.action_scope)], node.action_scope, frame, owner))
+		else:
+			values.append(FALSE)
+
+
+	def exit_IfNode(self, node, frame, owner, work, values) -> None:
+		values[-1] = TRUE
+
+
+	def enter_BinOpNode(self, node, frame, owner, work, values) -> None:
+		left = node.left_node
+		right = node.right_node
+		leaves = DeltaStackExecutor.LEAVES
+
+		if type(right) in leaves:
+			if type(left) in leaves:
+				value = self.leaf(left, frame, owner)
+				values.append(getattr(value, DeltaExecutor.OP_METHODS[node.op])(self.leaf(right, frame, owner)))
+				return
+
+			# the right side is only read once the left one has run, as in the recursive visitor
+			work.append((self.exit_BinOpNode_leaf, node, frame, owner))
+			work.append((self.enter[type(left)], left, frame, owner))
+			return
+
+		work.append((self.exit_BinOpNode, node, frame, owner))
+		work.append((self.enter[type(right)], right, frame, owner))
+		work.append((self.enter[type(left)], left, frame, owner))
+
+
+	def exit_BinOpNode_leaf(self, node, frame, owner, work, values) -> None:
+		right = self.leaf(node.right_node, frame, owner)
+		values[-1] = getattr(values[-1], DeltaExecutor.OP_METHODS[node.op])(right)
+
+
+	def exit_BinOpNode(self, node, frame, owner, work, values) -> None:
+		right = values.pop()
+		values[-1] = getattr(values[-1], DeltaExecutor.OP_METHODS[node.op])(right)
+
+
+	def enter_UnaryOpNode(self, node, frame, owner, work, values) -> None:
+		work.append((self.exit_UnaryOpNode, node, frame, owner))
+		work.append((self.enter[type(node.node)], node.node, frame, owner))
+
+
+	def exit_UnaryOpNode(self, node, frame, owner, work, values) -> None:
+		if node.op == Token.OP_PLUS:
+			values[-1] = values[-1].abs()
+		elif node.op == Token.OP_MINUS:
+			values[-1] = values[-1].neg()
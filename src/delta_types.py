@@ -1,138 +1,622 @@
+import operator
+
+try:
+	import numpy
+except ImportError:
+	numpy = None	# arrays then keep their elements in python lists, with the same results
+
+
+
 class DeltaNumber:
+	__slots__ = ("value",)
+
 	def __init__(self, value) -> None:
 		self.value = value
 	
 
 	def __repr__(self) -> str:
 		return f"{self.value}"
+
+
+	def __reduce__(self):
+		# small ints unpickle as the cached ones
+		return (make_number, (self.value,))
 	
 
 	def abs(self):
-		return abs(DeltaNumber(self.value))
+		return make_number(abs(self.value))
 
 	
 	def neg(self):
-		return DeltaNumber(self.value * -1)
+		return make_number(self.value * -1)
 
 
 	def add(self, right):
 		if isinstance(right, DeltaNumber):
-			return DeltaNumber(self.value + right.value)
+			return make_number(self.value + right.value)
+		elif isinstance(right, DeltaArray):
+			return right.elementwise("add", self, True)
 	
 
 	def subtract(self, right):
 		if isinstance(right, DeltaNumber):
-			return DeltaNumber(self.value - right.value)
+			return make_number(self.value - right.value)
+		elif isinstance(right, DeltaArray):
+			return right.elementwise("subtract", self, True)
 	
 
 	def multiply(self, right):
 		if isinstance(right, DeltaNumber):
-			return DeltaNumber(self.value * right.value)
+			return make_number(self.value * right.value)
+		elif isinstance(right, DeltaArray):
+			return right.elementwise("multiply", self, True)
 	
 
 	def divide(self, right):
 		if isinstance(right, DeltaNumber):
-			return DeltaNumber(self.value / right.value)
+			return make_number(self.value / right.value)
+		elif isinstance(right, DeltaArray):
+			return right.elementwise("divide", self, True)
 	
 
 	def power(self, right):
 		if isinstance(right, DeltaNumber):
-			return DeltaNumber(pow(self.value, right.value))
+			return make_number(pow(self.value, right.value))
+		elif isinstance(right, DeltaArray):
+			return right.elementwise("power", self, True)
 	
 
 	def comp_ee(self, right):
 		if isinstance(right, DeltaNumber):
-			return DeltaBool(bool(self.value == right.value))
+			return TRUE if self.value == right.value else FALSE
+		elif isinstance(right, DeltaArray):
+			return right.elementwise("comp_ee", self, True)
 	
 
 	def comp_ne(self, right):
 		if isinstance(right, DeltaNumber):
-			return DeltaBool(bool(self.value != right.value))
+			return TRUE if self.value != right.value else FALSE
+		elif isinstance(right, DeltaArray):
+			return right.elementwise("comp_ne", self, True)
 	
 
 	def comp_lr(self, right):
 		if isinstance(right, DeltaNumber):
-			return DeltaBool(bool(self.value < right.value))
+			return TRUE if self.value < right.value else FALSE
+		elif isinstance(right, DeltaArray):
+			return right.elementwise("comp_lr", self, True)
 
 
 	def comp_gr(self, right):
 		if isinstance(right, DeltaNumber):
-			return DeltaBool(bool(self.value > right.value))
+			return TRUE if self.value > right.value else FALSE
+		elif isinstance(right, DeltaArray):
+			return right.elementwise("comp_gr", self, True)
 
 
 	def comp_le(self, right):
 		if isinstance(right, DeltaNumber):
-			return DeltaBool(bool(self.value <= right.value))
+			return TRUE if self.value <= right.value else FALSE
+		elif isinstance(right, DeltaArray):
+			return right.elementwise("comp_le", self, True)
 
 
 	def comp_ge(self, right):
 		if isinstance(right, DeltaNumber):
-			return DeltaBool(bool(self.value >= right.value))
+			return TRUE if self.value >= right.value else FALSE
+		elif isinstance(right, DeltaArray):
+			return right.elementwise("comp_ge", self, True)
 
 
 
 class DeltaBool:
+	# there are only two, TRUE and FALSE below, compare them by identity
+	__slots__ = ("value",)
+
 	def __init__(self, value) -> None:
 		self.value = value
 	
 
 	def __repr__(self) -> str:
 		return str(self.value).lower()
+
+
+	def __reduce__(self):
+		# unpickles as the singleton again
+		return "TRUE" if self.value else "FALSE"
 	
 
 	def comp_ee(self, right):
 		if isinstance(right, DeltaBool):
-			return DeltaBool(bool(self.value == right.value))
+			return TRUE if self.value == right.value else FALSE
+		elif isinstance(right, DeltaArray):
+			return right.elementwise("comp_ee", self, True)
 	
 
 	def comp_ne(self, right):
 		if isinstance(right, DeltaBool):
-			return DeltaBool(bool(self.value != right.value))
+			return TRUE if self.value != right.value else FALSE
+		elif isinstance(right, DeltaArray):
+			return right.elementwise("comp_ne", self, True)
 
 
 
 class DeltaString:
-	def __init__(self, value) -> None:
-		self.value = value
-	
+	"""
+	A string, kept as a rope while it is being built.
+
+	Concatenating makes a node holding both sides instead of copying them,
+	so a string grown one piece at a time costs time linear in its final
+	length, not quadratic. The pieces are joined the first time the text
+	itself is needed, through `value`, by printing or comparing it, and
+	the node keeps the result. `length` is known all along, so equality
+	only joins strings of the same length, and compares their hashes,
+	which python caches on each string, before their characters.
+	"""
+
+	__slots__ = ("flat", "left", "right", "length")
+
+	# both sides shorter than this together are copied, a node would take more room than them
+	FLAT_LENGTH = 64
+
+	def __init__(self, value: str) -> None:
+		self.flat = value
+		self.left = None
+		self.right = None
+		self.length = len(value)
+
+
+	@staticmethod
+	def concat(left, right):
+		length = left.length + right.length
+
+		if length < DeltaString.FLAT_LENGTH and left.flat is not None and right.flat is not None:
+			return DeltaString(left.flat + right.flat)
+
+		result = DeltaString.__new__(DeltaString)
+		result.flat = None
+		result.left = left
+		result.right = right
+		result.length = length
+
+		return result
+
+
+	@property
+	def value(self) -> str:
+		if self.flat is None:
+			self.flatten()
+
+		return self.flat
+
+
+	def flatten(self) -> None:
+		# without recursing, a string built by thousands of `+` is a rope as deep
+		parts = []
+		stack = [self]
+
+		while stack:
+			node = stack.pop()
+
+			if node.flat is not None:
+				parts.append(node.flat)
+			else:
+				stack.append(node.right)
+				stack.append(node.left)
+
+		self.flat = "".join(parts)
+		self.left = self.right = None
+
+
+	def equals(self, right) -> bool:
+		if self.length != right.length:
+			return False
+
+		if self is right:
+			return True
+
+		left, right = self.value, right.value
+		return hash(left) == hash(right) and left == right
+
 
 	def __repr__(self) -> str:
 		return self.value
 
 
+	def __reduce__(self):
+		# flat, a deep rope would be pickled recursively
+		return (DeltaString, (self.value,))
+
+
 	def add(self, right):
 		if isinstance(right, DeltaString):
-			return DeltaString(self.value + right.value)
+			return DeltaString.concat(self, right)
 	
 
 	def comp_ee(self, right):
 		if isinstance(right, DeltaString):
-			return DeltaBool(bool(self.value == right.value))
+			return TRUE if self.equals(right) else FALSE
 	
 
 	def comp_ne(self, right):
 		if isinstance(right, DeltaString):
-			return DeltaBool(bool(self.value != right.value))
+			return FALSE if self.equals(right) else TRUE
 
 
 
 class DeltaArray:
+	"""
+	An array of delta values with room for `length` of them.
+
+	Arrays of only ints, only numbers or only booleans are kept unboxed in
+	`buffer`, which holds exactly their `size` elements, however long the
+	declared length. Ints and floats together are all kept as floats, as
+	numpy has them. The buffer is a numpy array when numpy is installed and
+	a python list otherwise. Arithmetic and comparisons on them are
+	elementwise, against an array of the same size or a single value
+	broadcast over every element, and run as one call over the whole
+	buffer. Results are the same either way: ints that don't fit in 64
+	bits, or an operation that could overflow them, use a python list for
+	that array. Any other array keeps its values boxed.
+	"""
+
+	__slots__ = ("length", "buffer", "size", "kind")
+
+	KIND_BOXED = 0
+	KIND_INT = 1
+	KIND_FLOAT = 2
+	KIND_BOOL = 3
+
+	NUMERIC_KINDS = (KIND_INT, KIND_FLOAT)
+
+	# the only elementwise methods boolean arrays take
+	EQUALITY = frozenset(["comp_ee", "comp_ne"])
+
+	PYTHON_OPS = {
+		"add":			operator.add,
+		"subtract":		operator.sub,
+		"multiply":		operator.mul,
+		"divide":		operator.truediv,
+		"power":		pow,
+		"comp_ee":		operator.eq,
+		"comp_ne":		operator.ne,
+		"comp_lr":		operator.lt,
+		"comp_gr":		operator.gt,
+		"comp_le":		operator.le,
+		"comp_ge":		operator.ge,
+	}
+
+	NUMPY_OPS = {
+		"add":			"add",
+		"subtract":		"subtract",
+		"multiply":		"multiply",
+		"divide":		"true_divide",
+		"power":		"power",
+		"comp_ee":		"equal",
+		"comp_ne":		"not_equal",
+		"comp_lr":		"less",
+		"comp_gr":		"greater",
+		"comp_le":		"less_equal",
+		"comp_ge":		"greater_equal",
+	}
+
+	INT_MIN = -(1 << 63)
+	INT_MAX = (1 << 63) - 1
+
+	# ints at least this big can't be made floats
+	FLOAT_INT = 1 << 1024
+
 	def __init__(self, length, value) -> None:
 		self.length = length
-		self.value = value
+		self.size = len(value)
+		self.kind = DeltaArray.kind_of(value)
+
+		if self.kind == DeltaArray.KIND_BOXED:
+			self.buffer = list(value)
+		elif self.kind == DeltaArray.KIND_FLOAT:
+			self.buffer = DeltaArray.allocate([float(item.value) for item in value], self.kind)
+		else:
+			self.buffer = DeltaArray.allocate([item.value for item in value], self.kind)
+
+
+	@property
+	def value(self) -> list:
+		if self.kind == DeltaArray.KIND_BOXED:
+			return self.buffer
+
+		box = make_bool if self.kind == DeltaArray.KIND_BOOL else make_number
+		return [box(item) for item in self.raw(list)]
 
 
 	def __repr__(self) -> str:
 		return str(self.value)
 
 
+	def raw(self, into=None):
+		# the elements, unboxed; as a list if `into` is list
+		if into is list and not isinstance(self.buffer, list):
+			return self.buffer.tolist()
+
+		return self.buffer
+
+
+	@staticmethod
+	def kind_of(values) -> int:
+		if not values:
+			return DeltaArray.KIND_BOXED
+
+		first = type(values[0])
+
+		if not all(type(item) is first for item in values):
+			return DeltaArray.KIND_BOXED
+
+		if first is DeltaBool:
+			return DeltaArray.KIND_BOOL
+
+		if first is not DeltaNumber:
+			return DeltaArray.KIND_BOXED
+
+		literals = set(type(item.value) for item in values)
+
+		if literals == {int}:
+			return DeltaArray.KIND_INT
+
+		if literals == {float}:
+			return DeltaArray.KIND_FLOAT
+
+		if literals == {int, float} and all(type(item.value) is float or -DeltaArray.FLOAT_INT < item.value < DeltaArray.FLOAT_INT for item in values):
+			# ints and floats together are floats, as numpy has them
+			return DeltaArray.KIND_FLOAT
+
+		return DeltaArray.KIND_BOXED
+
+
+	@staticmethod
+	def allocate(values: list, kind: int):
+		if numpy is None:
+			return values
+
+		if kind == DeltaArray.KIND_INT and not all(DeltaArray.INT_MIN <= item <= DeltaArray.INT_MAX for item in values):
+			# numpy would wrap these around, a list keeps them exact
+			return values
+
+		dtype = {DeltaArray.KIND_INT: numpy.int64, DeltaArray.KIND_FLOAT: numpy.float64, DeltaArray.KIND_BOOL: numpy.bool_}[kind]
+		return numpy.array(values, dtype)
+
+
+	@staticmethod
+	def kind_of_raw(values) -> int:
+		# the kind of an unboxed result, None if its elements no longer agree; ints and floats together are floats
+		if not isinstance(values, list):
+			return {"i": DeltaArray.KIND_INT, "f": DeltaArray.KIND_FLOAT, "b": DeltaArray.KIND_BOOL}[values.dtype.kind]
+
+		kinds = {bool: DeltaArray.KIND_BOOL, int: DeltaArray.KIND_INT, float: DeltaArray.KIND_FLOAT}
+		found = set(kinds.get(type(item)) for item in values)
+
+		if found == {DeltaArray.KIND_INT, DeltaArray.KIND_FLOAT}:
+			return DeltaArray.KIND_FLOAT
+
+		return found.pop() if len(found) == 1 else None
+
+
+	def elementwise(self, method: str, right, reflected: bool = False):
+		"""
+		Applies `method` to every element against `right`, an array of the
+		same size or a single value, and returns the resulting array. Gives
+		None, like any other unsupported operation, if the operands don't fit.
+		"""
+		numeric = self.kind in DeltaArray.NUMERIC_KINDS
+
+		if numeric:
+			accepted = DeltaNumber
+		elif self.kind == DeltaArray.KIND_BOOL and method in DeltaArray.EQUALITY:
+			accepted = DeltaBool
+		else:
+			return None
+
+		if isinstance(right, DeltaArray):
+			if right.size != self.size or (right.kind in DeltaArray.NUMERIC_KINDS) != numeric or right.kind == DeltaArray.KIND_BOXED:
+				return None
+
+			other = right.raw()
+
+		elif isinstance(right, accepted):
+			other = right.value
+
+		else:
+			return None
+
+		left = self.raw()
+
+		if reflected:
+			left, other = other, left
+
+		if numpy is not None and DeltaArray.numpy_safe(method, left, other):
+			values = DeltaArray.apply_numpy(method, left, other)
+		else:
+			op = DeltaArray.PYTHON_OPS[method]
+
+			if numpy is not None:
+				left = left.tolist() if isinstance(left, numpy.ndarray) else left
+				other = other.tolist() if isinstance(other, numpy.ndarray) else other
+
+			if isinstance(other, list) and isinstance(left, list):
+				values = [op(a, b) for a, b in zip(left, other)]
+			elif isinstance(left, list):
+				values = [op(a, other) for a in left]
+			else:
+				values = [op(left, b) for b in other]
+
+		kind = DeltaArray.kind_of_raw(values)
+
+		if kind is None:
+			# no longer numbers alone, e.g. complex powers of negative floats
+			box = [make_number(item) for item in values]
+			return DeltaArray(self.length, box)
+
+		if kind == DeltaArray.KIND_FLOAT and isinstance(values, list):
+			# python mixes ints and floats, e.g. in a power with negative exponents; numpy makes them all floats
+			values = [float(item) for item in values]
+
+		result = DeltaArray.__new__(DeltaArray)
+		result.length = self.length
+		result.size = self.size
+		result.kind = kind
+		result.buffer = DeltaArray.allocate(values, kind) if isinstance(values, list) else values
+
+		return result
+
+
+	@staticmethod
+	def numpy_safe(method: str, left, right) -> bool:
+		# whether numpy gives python's result: not for python ints, nor for 64 bit ints that could overflow
+		if isinstance(left, list) or isinstance(right, list):
+			return False
+
+		left_int = DeltaArray.int_magnitude(left)
+		right_int = DeltaArray.int_magnitude(right)
+
+		if left_int is None or right_int is None:
+			# ints only on one side, against floats or booleans numpy agrees with python while they fit
+			return max(left_int or 0, right_int or 0) <= DeltaArray.INT_MAX
+
+		if method in ("add", "subtract"):
+			return left_int + right_int <= DeltaArray.INT_MAX
+		elif method == "multiply":
+			return left_int * right_int <= DeltaArray.INT_MAX
+		elif method == "power":
+			exponent = int(numpy.max(right))
+			return left_int <= 1 or exponent <= 0 or left_int.bit_length() * exponent < 63
+
+		return max(left_int, right_int) <= DeltaArray.INT_MAX
+
+
+	@staticmethod
+	def int_magnitude(values):
+		# the largest absolute value of an int operand, None for anything else
+		if type(values) is int:
+			return abs(values)
+
+		if isinstance(values, numpy.ndarray) and values.dtype.kind == "i":
+			return max(int(values.max()), -int(values.min()))
+
+		return None
+
+
+	@staticmethod
+	def apply_numpy(method: str, left, right):
+		if method == "power" and numpy.asarray(left).dtype.kind == "i" and numpy.any(numpy.asarray(right) < 0):
+			# numpy refuses negative powers of ints, python makes them floats
+			left = numpy.asarray(left, numpy.float64)
+
+		with numpy.errstate(divide="raise", invalid="raise"):
+			try:
+				return getattr(numpy, DeltaArray.NUMPY_OPS[method])(left, right)
+			except FloatingPointError:
+				raise ZeroDivisionError("division by zero") from None
+
+
+	def add(self, right):
+		return self.elementwise("add", right)
+
+
+	def subtract(self, right):
+		return self.elementwise("subtract", right)
+
+
+	def multiply(self, right):
+		return self.elementwise("multiply", right)
+
+
+	def divide(self, right):
+		return self.elementwise("divide", right)
+
+
+	def power(self, right):
+		return self.elementwise("power", right)
+
+
+	def comp_ee(self, right):
+		return self.elementwise("comp_ee", right)
+
+
+	def comp_ne(self, right):
+		return self.elementwise("comp_ne", right)
+
+
+	def comp_lr(self, right):
+		return self.elementwise("comp_lr", right)
+
+
+	def comp_gr(self, right):
+		return self.elementwise("comp_gr", right)
+
+
+	def comp_le(self, right):
+		return self.elementwise("comp_le", right)
+
+
+	def comp_ge(self, right):
+		return self.elementwise("comp_ge", right)
+
+
 
 class DeltaNone:
+	# NULL below is the only instance the engines use
+	__slots__ = ()
+
 	def __repr__(self) -> str:
 		return "null"
 
 
+	def __reduce__(self):
+		return "NULL"
+
+
 
 class DeltaScope:
+	__slots__ = ("statements",)
+
 	def __init__(self, statements) -> None:
-		self.statements = statements
\ No newline at end of file
+		self.statements = statements
+
+
+
+TRUE = DeltaBool(True)
+FALSE = DeltaBool(False)
+NULL = DeltaNone()
+
+# numbers in this range are made once and shared, like python's own small ints
+SMALL_INT_MIN = -5
+SMALL_INT_MAX = 256
+SMALL_INTS = [DeltaNumber(value) for value in range(SMALL_INT_MIN, SMALL_INT_MAX + 1)]
+
+
+def make_number(value) -> DeltaNumber:
+	if type(value) is int and SMALL_INT_MIN <= value <= SMALL_INT_MAX:
+		return SMALL_INTS[value - SMALL_INT_MIN]
+
+	return DeltaNumber(value)
+
+
+def make_bool(value) -> DeltaBool:
+	return TRUE if value else FALSE
+
+
+def to_delta(value):
+	if isinstance(value, (DeltaNumber, DeltaBool, DeltaString, DeltaArray, DeltaNone)):
+		return value
+	elif value is None:
+		return NULL
+	elif isinstance(value, bool):
+		return make_bool(value)
+	elif isinstance(value, (int, float)):
+		return make_number(value)
+	elif isinstance(value, str):
+		return DeltaString(value)
+	elif isinstance(value, (list, tuple)):
+		return DeltaArray(make_number(len(value)), [to_delta(item) for item in value])
+	elif numpy is not None and isinstance(value, numpy.ndarray):
+		return to_delta(value.tolist())
+
+	raise TypeError(f"cannot convert {type(value).__name__} to a delta value")
@@ -0,0 +1,169 @@
+from delta_compiler import DeltaCode, Op
+from delta_runtime import UNBOUND, MISSING, VARIABLES, Frame, DeltaFunction, make_namespaces
+from delta_types import *
+from delta_memo import MemoCache, MISS
+from delta_modules import import_module, define
+from delta_output import DeltaOutput, TextOutput
+
+
+class DeltaVM:
+	def __init__(self, code: DeltaCode, memo: MemoCache = None, output: DeltaOutput = None) -> None:
+		self.code = code
+		self.memo = memo	# pure function results are kept here, if given
+		self.output = output if output is not None else TextOutput()
+
+
+	def run(self, variables: dict = None) -> dict:
+		namespaces = make_namespaces(variables)
+
+		try:
+			self.run_in(namespaces)
+		finally:
+			self.output.finish()
+
+		return namespaces[VARIABLES]
+
+
+	def run_module(self, module, namespaces: tuple) -> None:
+		DeltaVM(module.code, self.memo, self.output).run_in(namespaces)
+
+
+	def make_function(self, stand_in, frame, namespaces: tuple):
+		# see delta_modules.define, a lazy module's functions share a frame per run
+		if frame is None:
+			frame = Frame(stand_in.module.code.frame_size, None, namespaces)
+
+		return DeltaFunction(stand_in.node.name, stand_in.code, frame), frame
+
+
+	def run_in(self, namespaces: tuple):
+		# all run state but the output is local to this call
+		instructions = self.code.instructions
+		constants = self.code.constants
+		pc = 0
+
+		missing = MISSING
+		memo = self.memo
+		write = self.output.print
+
+		frame = Frame(self.code.frame_size, None, namespaces)
+		slots = frame.slots
+
+		stack = []
+		calls = []
+
+		while True:
+			opcode, arg = instructions[pc]
+			pc += 1
+
+			if opcode == Op.LOAD_CONST:
+				stack.append(constants[arg])
+
+			elif opcode == Op.LOAD_LOCAL:
+				slot, name, namespace = arg
+				value = slots[slot]
+				stack.append(value if value is not UNBOUND else namespaces[namespace].get(name, missing[namespace]))
+
+			elif opcode == Op.BINARY_OP:
+				right = stack.pop()
+				stack[-1] = getattr(stack[-1], arg)(right)
+
+			elif opcode == Op.STORE_LOCAL:
+				slot, name, namespace = arg
+
+				if slots[slot] is UNBOUND and name in namespaces[namespace]:
+					namespaces[namespace][name] = stack.pop()
+				else:
+					slots[slot] = stack.pop()
+
+			elif opcode == Op.POP:
+				stack.pop()
+
+			elif opcode == Op.PRINT:
+				write(stack.pop())
+
+			elif opcode == Op.LOAD_GLOBAL:
+				name, namespace = arg
+				stack.append(namespaces[namespace].get(name, missing[namespace]))
+
+			elif opcode == Op.STORE_GLOBAL:
+				name, namespace = arg
+				namespaces[namespace][name] = stack.pop()
+
+			elif opcode == Op.LOAD_OUTER:
+				depth, slot, name, namespace = arg
+				value = frame.outer(depth).slots[slot]
+				stack.append(value if value is not UNBOUND else namespaces[namespace].get(name, missing[namespace]))
+
+			elif opcode == Op.STORE_OUTER:
+				depth, slot, name, namespace = arg
+				outer_slots = frame.outer(depth).slots
+
+				if outer_slots[slot] is UNBOUND and name in namespaces[namespace]:
+					namespaces[namespace][name] = stack.pop()
+				else:
+					outer_slots[slot] = stack.pop()
+
+			elif opcode == Op.JUMP_IF_FALSE:
+				if not stack.pop().value == True:
+					pc = arg
+
+			elif opcode == Op.JUMP:
+				pc = arg
+
+			elif opcode == Op.CALL:
+				function = stack.pop()
+
+				if not isinstance(function, DeltaFunction):
+					# a lazy module's function, called for the first time, or an error
+					function = define(function, arg, namespaces, self.make_function)
+
+				code = function.body
+				key = None
+
+				if memo is not None and code.guards is not None and not any(name in namespaces[namespace] for namespace, name in code.guards):
+					key = MemoCache.key(code)
+					value = memo.get(key)
+
+					if value is not MISS:
+						stack.append(value)
+						continue
+
+				# key is set when the result should be stored in the memo on return
+				calls.append((instructions, constants, pc, frame, key))
+
+				instructions = code.instructions
+				constants = code.constants
+				pc = 0
+
+				frame = Frame(code.frame_size, function.frame, namespaces)
+				slots = frame.slots
+
+			elif opcode == Op.RETURN:
+				if not calls:
+					return stack.pop()
+
+				instructions, constants, pc, frame, key = calls.pop()
+				slots = frame.slots
+
+				if key is not None:
+					memo.put(key, stack[-1])
+
+			elif opcode == Op.MAKE_FUNCTION:
+				code = constants[arg]
+				stack.append(DeltaFunction(code.name, code, frame))
+
+			elif opcode == Op.UNARY_MINUS:
+				stack[-1] = stack[-1].neg()
+
+			elif opcode == Op.UNARY_PLUS:
+				stack[-1] = stack[-1].abs()
+
+			elif opcode == Op.BUILD_ARRAY:
+				length = stack.pop()
+				values = stack[len(stack) - arg:]
+				del stack[len(stack) - arg:]
+				stack.append(DeltaArray(length, values))
+
+			elif opcode == Op.IMPORT:
+				import_module(arg, namespaces, lambda module: self.run_module(module, namespaces))
@@ -1,16 +1,225 @@
-from delta_lexer import DeltaLexer
-from delta_parser import DeltaParser
-from delta_executor import DeltaExecutor
-from delta_types import *
+import argparse
+import cProfile
+import io
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
 
+from delta_lexer import DeltaLexer, Token
+from delta_optimizer import count_nodes, count_node_types
+from delta_program import DeltaProgram
+from delta_cache import DeltaCache
+from delta_errors import DeltaError
+from delta_instrument import Instrumentation
+from delta_modules import MODULE_CACHE
+from delta_output import DeltaOutput, TextOutput
 
-source = open("delta_scripts/functions_test.delta").read()
 
-lexer = DeltaLexer(source)
-tokens = lexer.parse()
+ENGINES = (DeltaProgram.ENGINE_VM, DeltaProgram.ENGINE_TREE, DeltaProgram.ENGINE_STACK)
 
-parser = DeltaParser(tokens)
-program = parser.parse()
+PROFILE_SORTS = ("cumulative", "tottime", "ncalls", "name")
 
-executor = DeltaExecutor(program)
-executor.execute()
\ No newline at end of file
+
+class Phases:
+	"""
+	Times each phase of a run and, if tracemalloc is on, the peak memory it used.
+
+	Peaks are measured from what was allocated when the phase started, so
+	what earlier phases left behind isn't counted again.
+	"""
+
+	def __init__(self, memory: bool) -> None:
+		self.memory = memory
+		self.results = []	# (name, seconds, peak bytes or None)
+
+
+	@contextmanager
+	def __call__(self, name: str):
+		if self.memory:
+			base = tracemalloc.get_traced_memory()[0]
+			tracemalloc.reset_peak()
+
+		start = time.perf_counter()
+
+		try:
+			yield
+		finally:
+			elapsed = time.perf_counter() - start
+			peak = tracemalloc.get_traced_memory()[1] - base if self.memory else None
+
+			self.results.append((name, elapsed, peak))
+
+
+	def report(self, file) -> None:
+		total = sum(elapsed for _, elapsed, _ in self.results)
+
+		print("phase          wall time" + ("      peak memory" if self.memory else ""), file=file)
+
+		for name, elapsed, peak in self.results:
+			memory = f"{peak / 1024:>14,.1f} KiB" if peak is not None else ""
+			print(f"{name:<10}{elapsed * 1000:>12.3f} ms{memory}", file=file)
+
+		print(f"{'total':<10}{total * 1000:>12.3f} ms", file=file)
+
+		if self.memory:
+			print("(times include tracemalloc's overhead)", file=file)
+
+
+
+def read_source(args) -> tuple:
+	if args.command is not None:
+		return args.command, "<string>"
+
+	if args.script in (None, "-"):
+		return sys.stdin.read(), "<stdin>"
+
+	with open(args.script) as file:
+		return file.read(), args.script
+
+
+def open_stream(args) -> tuple:
+	# for --stream, the source is read as it runs rather than all at once
+	if args.command is not None:
+		return io.StringIO(args.command), "<string>"
+
+	if args.script in (None, "-"):
+		return sys.stdin, "<stdin>"
+
+	return open(args.script), args.script
+
+
+def report_counts(source: str, program: DeltaProgram, file) -> None:
+	tokens = DeltaLexer(source).parse()
+	token_types = {}
+
+	for tok_type in tokens.types:
+		name = Token.REPR_KEY.get(tok_type, "INVALID")
+		token_types[name] = token_types.get(name, 0) + 1
+
+	print(f"tokens: {len(tokens):,} from {len(source):,} characters", file=file)
+
+	for name, count in sorted(token_types.items(), key=lambda item: -item[1]):
+		print(f"\t{name:<16}{count:>10,}", file=file)
+
+	if program.optimization is not None:
+		print(f"nodes: {program.optimization.nodes_before:,} parsed, {program.optimization.nodes_after:,} after optimizing", file=file)
+	else:
+		print(f"nodes: {count_nodes(program.tree):,}", file=file)
+
+	for name, count in sorted(count_node_types(program.tree).items(), key=lambda item: -item[1]):
+		print(f"\t{name:<20}{count:>10,}", file=file)
+
+	print(f"instructions: {len(program.code.instructions):,} at the top level", file=file)
+
+
+def make_parser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(prog="delta", description="Runs a Delta script.")
+
+	parser.add_argument("script", nargs="?", help="path of the script, - or nothing to read it from stdin")
+	parser.add_argument("-c", dest="command", metavar="SOURCE", help="run SOURCE instead of a script file")
+	parser.add_argument("-e", "--engine", choices=ENGINES, help="what runs the program (default: vm, tree when instrumenting)")
+	parser.add_argument("-O", "--no-optimize", dest="optimize", action="store_false", help="skip the optimizer")
+	parser.add_argument("--cache", nargs="?", const="", metavar="DIR", help="load and store compiled programs in DIR, or the default cache directory")
+	parser.add_argument("--stream", action="store_true", help="read, compile and run the script one top-level statement at a time, printing each line as it is written")
+	parser.add_argument("-I", "--import-path", action="append", default=[], metavar="DIR", help="also look for imported modules in DIR, after the script's own directory")
+
+	report = parser.add_argument_group("reports, written to stderr")
+	report.add_argument("-t", "--time", action="store_true", help="wall time of each phase: lex, parse, optimize, resolve, compile and execute")
+	report.add_argument("-m", "--memory", action="store_true", help="peak memory of each phase, measured with tracemalloc")
+	report.add_argument("--counts", action="store_true", help="token and node counts, by type")
+	report.add_argument("-p", "--profile", action="store_true", help="run everything under cProfile")
+	report.add_argument("--sort", choices=PROFILE_SORTS, default="cumulative", help="what the profile is sorted by (default: %(default)s)")
+	report.add_argument("--limit", type=int, default=30, help="how many profile entries are shown (default: %(default)s)")
+	report.add_argument("--profile-out", metavar="FILE", help="also save the raw profile to FILE, for pstats or snakeviz")
+	report.add_argument("-i", "--instrument", action="store_true", help="node visits, time per Delta function, lookup depths and binary operator inline caches, from the tree engine")
+	report.add_argument("--collapsed", metavar="FILE", help="write the Delta call stacks to FILE in the folded format flamegraph tools read, implies --instrument")
+
+	return parser
+
+
+def main(argv: list = None) -> int:
+	parser = make_parser()
+	args = parser.parse_args(argv)
+
+	if args.script is not None and args.command is not None:
+		parser.error("give either a script or -c, not both")
+
+	instrumentation = Instrumentation() if args.instrument or args.collapsed else None
+
+	if instrumentation and args.engine not in (None, DeltaProgram.ENGINE_TREE):
+		parser.error("only the tree engine can be instrumented")
+
+	if args.stream and (args.cache is not None or args.time or args.memory or args.counts):
+		parser.error("--stream can't be used with --cache, -t, -m or --counts, a streamed script is never compiled whole")
+
+	engine = args.engine or (DeltaProgram.ENGINE_TREE if instrumentation else DeltaProgram.ENGINE_VM)
+
+	source, name = open_stream(args) if args.stream else read_source(args)
+
+	# imports look next to the script first, then in -I's directories, then the working directory and DELTA_PATH
+	script_directory = [os.path.dirname(os.path.abspath(args.script))] if args.script not in (None, "-") and args.command is None else []
+	MODULE_CACHE.path[:0] = script_directory + args.import_path
+	cache = DeltaCache(args.cache or None) if args.cache is not None else None
+
+	phases = Phases(args.memory)
+	profile = cProfile.Profile() if args.profile else None
+
+	if args.memory:
+		tracemalloc.start()
+
+	if profile:
+		profile.enable()
+
+	try:
+		if args.stream:
+			# every line goes out as it is printed, not in 64 KiB runs
+			DeltaProgram.run_stream(source, engine=engine, optimize=args.optimize, output=TextOutput(flush=DeltaOutput.FLUSH_LINE), instrumentation=instrumentation)
+		else:
+			program = DeltaProgram(source, name, args.optimize, cache, phase=phases)
+
+			with phases("execute"):
+				program.run(engine=engine, instrumentation=instrumentation)
+	except DeltaError as error:
+		print(f"{name}: {type(error).__name__}: {error}", file=sys.stderr)
+		return 1
+	finally:
+		if args.stream and source is not sys.stdin:
+			source.close()
+
+		if profile:
+			profile.disable()
+
+		if args.memory:
+			tracemalloc.stop()
+
+	if args.time or args.memory:
+		if cache is not None and cache.hits:
+			print("delta: the program came from the cache, lexing, parsing and compiling were skipped and don't show", file=sys.stderr)
+
+		phases.report(sys.stderr)
+
+	if args.counts:
+		report_counts(source, program, sys.stderr)
+
+	if args.instrument:
+		instrumentation.report(sys.stderr)
+
+	if args.collapsed:
+		with open(args.collapsed, "w") as file:
+			instrumentation.write_collapsed(file)
+
+	if profile:
+		stats = pstats.Stats(profile, stream=sys.stderr)
+		stats.sort_stats(args.sort).print_stats(args.limit)
+
+		if args.profile_out:
+			stats.dump_stats(args.profile_out)
+
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
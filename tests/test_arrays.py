@@ -0,0 +1,83 @@
+import pytest
+
+import delta_types
+from delta_types import DeltaArray
+from delta_program import DeltaProgram
+from delta_output import CaptureOutput
+
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+
+@pytest.fixture(params=["python", "numpy"])
+def backend(request, monkeypatch):
+	# every test runs with the list buffers, and again with numpy's when it is installed
+	if request.param == "numpy":
+		if numpy is None:
+			pytest.skip("numpy is not installed")
+
+		monkeypatch.setattr(delta_types, "numpy", numpy)
+	else:
+		monkeypatch.setattr(delta_types, "numpy", None)
+
+	return request.param
+
+
+def run(source: str, engine: str = DeltaProgram.ENGINE_TREE) -> str:
+	output = CaptureOutput()
+	DeltaProgram(source).run(engine=engine, output=output)
+	return output.getvalue()
+
+
+def test_buffer_holds_only_the_elements(backend):
+	array = DeltaArray(delta_types.make_number(20_000_000), [delta_types.make_number(1), delta_types.make_number(2)])
+	result = array.multiply(delta_types.make_number(3))
+
+	assert len(array.buffer) == 2
+	assert len(result.buffer) == 2
+	assert result.length.value == 20_000_000
+
+
+def test_elementwise(backend):
+	assert run("let a = [1, 2, 3] : [3]; print a * 2 + 1; print a / 2; print a == 2; print 10 - a;") == \
+		"[3, 5, 7]\n[0.5, 1.0, 1.5]\n[false, true, false]\n[9, 8, 7]\n"
+
+
+@pytest.mark.parametrize("expression, expected", [
+	("a + 1", "[9223372036854775808, 2]"),
+	("a * a", "[85070591730234615847396907784232501249, 1]"),
+	("a - (0 - 9223372036854775807)", "[18446744073709551614, 9223372036854775808]"),
+	("(a - a + 2) ^ 64", "[18446744073709551616, 18446744073709551616]"),
+])
+def test_int_overflow_matches_python(backend, expression, expected):
+	assert run(f"let a = [9223372036854775807, 1] : [2]; print {expression};") == expected + "\n"
+
+
+def test_ints_past_64_bits(backend):
+	# an element too big for numpy keeps the array's arithmetic working
+	assert run("let a = [9223372036854775808, 1] : [2]; print a + 1; print a - 9223372036854775808;") == \
+		"[9223372036854775809, 2]\n[0, -9223372036854775807]\n"
+
+
+def test_engines_agree(backend):
+	source = "let a = [4611686018427387904, 3] : [2]; print a * 4; print a ^ 2;"
+	expected = run(source)
+
+	assert run(source, DeltaProgram.ENGINE_VM) == expected
+	assert run(source, DeltaProgram.ENGINE_STACK) == expected
+
+
+@pytest.mark.parametrize("source, expected", [
+	("print [2, 4] ^ [0 - 1, 2];", "[0.5, 16.0]"),
+	("let a = [2, 4] ^ [0 - 1, 2]; print a * 2;", "[1.0, 32.0]"),
+	("print [1, 2.5] * 2;", "[2.0, 5.0]"),
+	("print [1, 2.5] + [1, 2];", "[2.0, 4.5]"),
+	("print [2, 4] ^ (0 - 1);", "[0.5, 0.25]"),
+	("print [1, 2] == [1.0, 3];", "[true, false]"),
+])
+def test_ints_and_floats_together_are_floats(backend, source, expected):
+	for engine in (DeltaProgram.ENGINE_TREE, DeltaProgram.ENGINE_VM):
+		assert run(source, engine) == expected + "\n"
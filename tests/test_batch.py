@@ -0,0 +1,28 @@
+from delta_batch import DeltaBatch
+
+
+# doubles the calls at every level, it would run for hours
+ENDLESS = "func f0( ) { return 1; };\n" + "".join(f"func f{n}( ) {{ let a = f{n - 1}( ); let b = f{n - 1}( ); return a + b; }};\n" for n in range(1, 60)) + "print f59( );\n"
+
+
+def test_a_script_that_never_ends_fails_alone(tmp_path):
+	(tmp_path / "a.delta").write_text("print 1;\n")
+	(tmp_path / "b.delta").write_text(ENDLESS)
+	(tmp_path / "c.delta").write_text("print 3;\n")
+
+	paths = [str(tmp_path / name) for name in ("a.delta", "b.delta", "c.delta")]
+	report = DeltaBatch(workers=1, timeout=0.5).run(paths)
+
+	assert [result.ok for result in report.results] == [True, False, True]
+	assert "DeltaTimeoutError" in report.results[1].error
+	assert report.results[2].output == "3\n"
+
+
+
+def test_errors_are_reported_as_type_and_message(tmp_path):
+	(tmp_path / "a.delta").write_text("print 1;\nprint 1 / 0;\n")
+
+	report = DeltaBatch(workers=1).run([str(tmp_path / "a.delta")])
+
+	assert report.results[0].error == "ZeroDivisionError: division by zero"
+	assert report.results[0].output == "1\n"
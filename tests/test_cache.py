@@ -0,0 +1,53 @@
+from delta_cache import DeltaCache
+from delta_program import DeltaProgram
+from delta_modules import MODULE_CACHE
+from delta_output import CaptureOutput
+import main
+
+
+SOURCE = "import helpers;\nprint greet( );\n"
+
+
+def test_entry_from_an_older_version_is_rebuilt(tmp_path, monkeypatch):
+	(tmp_path / "helpers.delta").write_text("func greet( ) { return \"hello\"; };\n")
+	monkeypatch.setattr(MODULE_CACHE, "path", [str(tmp_path)])
+
+	cache = DeltaCache(str(tmp_path / "cache"))
+
+	# what an interpreter from before `import` was a keyword compiled the script to, under the key it would use now
+	stale = DeltaProgram.compile("print greet( );\n")
+	key = cache.key(SOURCE, (True,))
+
+	version = DeltaCache.VERSION
+	monkeypatch.setattr(DeltaCache, "VERSION", version - 1)
+	cache.store(key, stale)
+	monkeypatch.setattr(DeltaCache, "VERSION", version)
+
+	output = CaptureOutput()
+	DeltaProgram(SOURCE, cache=cache).run(output=output)
+
+	assert output.getvalue() == "hello\n"
+	assert cache.invalid == 1
+	assert cache.hits == 0
+
+	# and the entry written in its place is used from then on
+	DeltaProgram(SOURCE, cache=cache).run(output=CaptureOutput())
+	assert cache.hits == 1
+
+
+def test_version_is_part_of_the_key(monkeypatch):
+	cache = DeltaCache("unused")
+	key = cache.key(SOURCE)
+
+	monkeypatch.setattr(DeltaCache, "VERSION", DeltaCache.VERSION - 1)
+	assert cache.key(SOURCE) != key
+
+
+def test_phase_warning_only_on_a_hit(tmp_path, capsys):
+	arguments = ["--cache", str(tmp_path), "-t", "-c", "print 1;"]
+
+	assert main.main(arguments) == 0
+	assert "came from the cache" not in capsys.readouterr().err
+
+	assert main.main(arguments) == 0
+	assert "came from the cache" in capsys.readouterr().err
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from delta_program import DeltaProgram
+from delta_async import DeltaAsyncExecutor
+from delta_modules import MODULE_CACHE
+from delta_errors import DeltaLimitError
+from delta_output import CaptureOutput
+
+
+# a module whose top level runs when it is imported, and takes a good many steps doing it
+HEAVY = "func f( ) { let x = 1 + 2 * 3; return x; };\n" + "let y = f( ) + f( );\n" * 200 + "func done( ) { return \"done\"; };\n"
+
+
+@pytest.fixture
+def modules(tmp_path, monkeypatch):
+	(tmp_path / "heavy.delta").write_text(HEAVY)
+	(tmp_path / "lazy.delta").write_text("import heavy;\nfunc twice( ) { return 2 * 21; };\n")
+	monkeypatch.setattr(MODULE_CACHE, "path", [str(tmp_path)])
+
+
+def run_async(source: str, **options) -> str:
+	output = CaptureOutput()
+	asyncio.run(DeltaProgram(source).run_async(output=output, **options))
+	return output.getvalue()
+
+
+@pytest.mark.parametrize("source", ["import heavy;\nprint done( );\n", "import lazy;\nprint twice( );\nprint done( );\n"])
+def test_budget_covers_imported_modules(modules, source):
+	with pytest.raises(DeltaLimitError):
+		run_async(source, budget=100)
+
+
+def test_imported_modules_yield_to_the_loop(modules):
+	program = DeltaProgram("import heavy;\nprint done( );\n")
+	output = CaptureOutput()
+
+	async def main():
+		executor = DeltaAsyncExecutor(program.tree, program.resolution, output=output, slice=50)
+		await executor.execute_async()
+		return executor
+
+	executor = asyncio.run(main())
+
+	assert output.getvalue() == "done\n"
+	assert executor.steps > 1000
+	assert executor.yields >= executor.steps // 50
+
+
+@pytest.mark.parametrize("engine", [DeltaProgram.ENGINE_VM, DeltaProgram.ENGINE_TREE, DeltaProgram.ENGINE_STACK])
+def test_engines_agree_with_async(modules, engine):
+	source = "import lazy;\nprint twice( );\nprint done( );\nprint y;\n"
+	output = CaptureOutput()
+	DeltaProgram(source).run(engine=engine, output=output)
+
+	assert output.getvalue() == run_async(source) == "42\ndone\n14\n"
@@ -0,0 +1,59 @@
+import pytest
+
+from delta_program import DeltaProgram
+from delta_limits import DeltaLimits
+from delta_errors import DeltaLimitError
+from delta_output import CaptureOutput
+
+
+def run_limited(source: str, limits: DeltaLimits = None) -> str:
+	output = CaptureOutput()
+	DeltaProgram(source).run(engine=DeltaProgram.ENGINE_TREE, output=output, limits=limits or DeltaLimits.untrusted())
+	return output.getvalue()
+
+
+@pytest.mark.parametrize("source", [
+	"print 2 ^ 10000000;",
+	"print 1.5 ^ 10000000;",
+	"print 2 ^ 10000000.0;",
+	"print 0.5 ^ (0 - 10000000);",
+	"print [1.5, 2.5] : [2] ^ 5000;",
+	"print (10 ^ 400) / 3;",
+])
+def test_numbers_too_big_are_refused(source):
+	with pytest.raises(DeltaLimitError):
+		run_limited(source)
+
+
+def test_numbers_within_limits():
+	assert run_limited("print 1.5 ^ 2; print 0.5 ^ 10000000; print 2 ^ (0 - 3); print 2 ^ 64;") == \
+		"2.25\n0.0\n0.125\n18446744073709551616\n"
+
+
+def test_steps_and_depth():
+	with pytest.raises(DeltaLimitError, match="step limit"):
+		run_limited("let a = 1;\n" * 20, DeltaLimits(steps=10))
+
+	with pytest.raises(DeltaLimitError, match="depth"):
+		run_limited("func f( ) { return f( ); };\nprint f( );\n", DeltaLimits(depth=50))
+
+
+@pytest.mark.parametrize("source, refused", [
+	("let a = 15; print a * a;", False),
+	("let a = 16; print a * a;", True),
+	("let a = 1.5; print a * 300;", False),
+	("let a = 3; print a ^ 4;", False),
+	("let a = 3; print a ^ 5;", True),
+	("let a = 2; print a ^ 0.5;", False),
+	("let a = [15, 3]; print a * [15, 1];", False),
+	("let a = [16, 3]; print a * [16, 1];", True),
+	("let a = [3, 2]; print a ^ 4;", False),
+	("let a = [3, 2]; print a ^ 5;", True),
+])
+def test_small_operands_against_a_small_limit(source, refused):
+	# the shortcuts for small numbers must refuse exactly what the full checks do, the optimizer folds constants so they go through variables
+	if refused:
+		with pytest.raises(DeltaLimitError):
+			run_limited(source, DeltaLimits(integer_bits=8))
+	else:
+		run_limited(source, DeltaLimits(integer_bits=8))
@@ -0,0 +1,56 @@
+import asyncio
+import io
+
+import pytest
+
+from delta_program import DeltaProgram
+from delta_limits import DeltaLimits
+from delta_instrument import Instrumentation
+from delta_output import CaptureOutput
+
+
+# a `let` binds the nearest enclosing name it finds, functions included, and only makes a new one when there is none
+SOURCE = """
+let x = 1;
+func f( ) { let x = x + 1; let y = 3; return x + y; };
+print f( );
+print x;
+print y;
+{ let x = 10; };
+print x;
+if x > 0 then { let x = 20; };
+print x;
+func g( ) { let z = 1; func h( ) { let z = z + 1; return z; }; return h( ) + z; };
+print g( );
+print z;
+"""
+
+EXPECTED = "5\n2\nnull\n10\n20\n4\nnull\n"
+
+
+def run(engine: str, stream: bool = False, **options) -> str:
+	output = CaptureOutput()
+
+	if stream:
+		DeltaProgram.run_stream(io.StringIO(SOURCE), engine=engine, output=output, **options)
+	else:
+		DeltaProgram(SOURCE).run(engine=engine, output=output, **options)
+
+	return output.getvalue()
+
+
+@pytest.mark.parametrize("stream", [False, True])
+@pytest.mark.parametrize("engine", [DeltaProgram.ENGINE_VM, DeltaProgram.ENGINE_TREE, DeltaProgram.ENGINE_STACK])
+def test_engines_agree(engine, stream):
+	assert run(engine, stream) == EXPECTED
+
+
+def test_limited_and_instrumented_agree():
+	assert run(DeltaProgram.ENGINE_TREE, limits=DeltaLimits.untrusted()) == EXPECTED
+	assert run(DeltaProgram.ENGINE_TREE, instrumentation=Instrumentation()) == EXPECTED
+
+
+def test_async_agrees():
+	output = CaptureOutput()
+	asyncio.run(DeltaProgram(SOURCE).run_async(output=output, slice=3))
+	assert output.getvalue() == EXPECTED
@@ -0,0 +1,73 @@
+import os
+import socket
+import stat
+import threading
+
+import pytest
+
+from delta_server import DeltaServer, DeltaClient
+
+
+def test_socket_is_private_and_serves(tmp_path):
+	path = str(tmp_path / "delta.sock")
+	server = DeltaServer(path)
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+
+	try:
+		assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+		client = DeltaClient(path)
+		outputs = []
+		result = client.run("print 1 + 2;", on_output=outputs.append)
+		client.close()
+
+		assert result["ok"]
+		assert "".join(outputs) == "3\n"
+	finally:
+		server.shutdown()
+		server.server_close()
+
+
+def test_replaces_a_stale_socket(tmp_path):
+	path = str(tmp_path / "delta.sock")
+
+	# what a server that died without cleaning up leaves behind
+	stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	stale.bind(path)
+	stale.close()
+
+	server = DeltaServer(path)
+	assert stat.S_ISSOCK(os.lstat(path).st_mode)
+	server.server_close()
+
+
+def test_refuses_to_remove_other_files(tmp_path):
+	path = tmp_path / "not-a-socket"
+	path.write_text("keep me")
+
+	with pytest.raises(FileExistsError):
+		DeltaServer(str(path))
+
+	assert path.read_text() == "keep me"
+
+
+def test_refuses_a_live_socket(tmp_path):
+	path = str(tmp_path / "delta.sock")
+	server = DeltaServer(path)
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+
+	try:
+		with pytest.raises(FileExistsError):
+			DeltaServer(path)
+
+		# the first server still has its socket and answers
+		client = DeltaClient(path)
+		result = client.run("print 5;")
+		client.close()
+
+		assert result["ok"]
+	finally:
+		server.shutdown()
+		server.server_close()
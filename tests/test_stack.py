@@ -0,0 +1,24 @@
+import io
+
+import pytest
+
+from delta_program import DeltaProgram
+from delta_errors import DeltaSyntaxError
+
+
+@pytest.mark.parametrize("source", [
+	"let x = " + "{ return " * 3000 + "1" + "; }" * 3000 + ";",
+	"let x = " + "( " * 3000 + "1" + " + 1 )" * 3000 + ";",
+	"let x = 1" + " + 1" * 3000 + ";",
+])
+def test_too_deep_to_compile(source):
+	with pytest.raises(DeltaSyntaxError, match="nests too deeply"):
+		DeltaProgram(source)
+
+	with pytest.raises(DeltaSyntaxError, match="nests too deeply"):
+		DeltaProgram.run_stream(io.StringIO(source), engine=DeltaProgram.ENGINE_STACK)
+
+
+def test_deep_calls():
+	source = "let n = 3000; func down( ) { let n = n - 1; if n > 0 then { down( ); }; return n; }; let result = down( );"
+	assert DeltaProgram(source).run(engine=DeltaProgram.ENGINE_STACK)["n"].value == 0
@@ -0,0 +1,36 @@
+import io
+
+import pytest
+
+from delta_program import DeltaProgram
+from delta_errors import DeltaSyntaxError
+from delta_output import CaptureOutput
+import main
+
+
+@pytest.mark.parametrize("engine", [DeltaProgram.ENGINE_VM, DeltaProgram.ENGINE_TREE, DeltaProgram.ENGINE_STACK])
+@pytest.mark.parametrize("source", ["print 1; ) print 2;", "print 1; let = 3; print 2;"])
+def test_a_statement_that_does_not_parse(source, engine):
+	output = CaptureOutput()
+
+	with pytest.raises(DeltaSyntaxError, match="statement 2"):
+		DeltaProgram.run_stream(io.StringIO(source), engine=engine, output=output)
+
+	# what ran before it still printed
+	assert output.getvalue() == "1\n"
+
+
+def test_empty_and_trailing_semicolons():
+	output = CaptureOutput()
+	DeltaProgram.run_stream(io.StringIO(""), output=output)
+	DeltaProgram.run_stream(io.StringIO("print 1;;"), output=output)
+	assert output.getvalue() == "1\n"
+
+
+def test_stream_flag(capsys):
+	assert main.main(["--stream", "-c", "let a = 2; print a * 3; print a;"]) == 0
+	assert capsys.readouterr().out == "6\n2\n"
+
+	assert main.main(["--stream", "-e", "stack", "-c", "print 1; ) print 2;"]) == 1
+	captured = capsys.readouterr()
+	assert captured.out == "1\n" and "DeltaSyntaxError" in captured.err